@@ -0,0 +1,51 @@
+"""Memory of ChatHistory objects versus their compact columnar form.
+
+Run with ``python -m benchmarks.bench_columnar`` from the repository root.
+"""
+import gc
+import json
+import tracemalloc
+
+from suvvyapi import ChatHistory
+from suvvyapi.columnar import CompactHistory
+from tests.mock_api import make_history, make_message
+
+HISTORIES = 1_000
+MESSAGES = 50
+
+
+def _traced(fn):
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 2**20
+
+
+def main() -> None:
+    payloads = [
+        json.dumps(
+            make_history(
+                f"history-{h}",
+                [make_message(i, f"Message number {i} " * 3) for i in range(MESSAGES)],
+            )
+        )
+        for h in range(HISTORIES)
+    ]
+
+    histories, models = _traced(
+        lambda: [ChatHistory.model_validate_json(p) for p in payloads]
+    )
+    _, compact = _traced(
+        lambda: [CompactHistory.from_chat_history(h) for h in histories]
+    )
+
+    total = HISTORIES * MESSAGES
+    print(f"{HISTORIES} histories x {MESSAGES} messages")
+    print(f"ChatHistory     {models:7.1f}MiB  {models * 2**20 / total:6.0f}B/message")
+    print(f"CompactHistory  {compact:7.1f}MiB  {compact * 2**20 / total:6.0f}B/message")
+
+
+if __name__ == "__main__":
+    main()
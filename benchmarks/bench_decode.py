@@ -0,0 +1,52 @@
+"""Response decoding and request encoding cost for large histories.
+
+Compares the stdlib JSON -> dict -> pydantic path used before with
+validating straight from bytes, and request bodies built from
+model_dump() dicts with dumping models directly with pydantic-core.
+
+Run with ``python -m benchmarks.bench_decode`` from the repository root.
+"""
+import json
+import timeit
+
+import pydantic_core
+
+from suvvyapi import ChatHistory, Message
+from tests.mock_api import make_history, make_message
+
+SIZES = (1_000, 10_000)
+
+
+def _best(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def _row(name: str, size: int, old: float, new: float) -> None:
+    print(
+        f"{name:<8} {size:>6} messages: "
+        f"old={old * 1000:8.2f}ms new={new * 1000:8.2f}ms "
+        f"speedup={old / new:5.2f}x"
+    )
+
+
+def main() -> None:
+    for size in SIZES:
+        messages = [make_message(i, f"Message number {i} " * 5) for i in range(size)]
+        content = json.dumps(make_history("bench", messages)).encode()
+        number = max(1, 20_000 // size)
+
+        old = _best(lambda: ChatHistory(**json.loads(content)), number)
+        new = _best(lambda: ChatHistory.model_validate_json(content), number)
+        _row("decode", size, old, new)
+
+        models = [Message(text=m["text"]) for m in messages]
+        old = _best(
+            lambda: json.dumps({"messages": [m.model_dump() for m in models]}).encode(),
+            number,
+        )
+        new = _best(lambda: pydantic_core.to_json({"messages": models}), number)
+        _row("encode", size, old, new)
+
+
+if __name__ == "__main__":
+    main()
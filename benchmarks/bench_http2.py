@@ -0,0 +1,163 @@
+"""Sockets and throughput of concurrent predictions over HTTP/1.1 and HTTP/2.
+
+Run with ``python -m benchmarks.bench_http2`` from the repository root.
+Needs the ``h2`` package (``pip install suvvyapi[http2]``). The HTTP/2 mock
+speaks cleartext HTTP/2 with prior knowledge, the API itself negotiates it
+over TLS.
+"""
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from suvvyapi import Suvvy
+from suvvyapi.pool import ConnectionPool
+from tests.mock_api import MockSuvvyAPI
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    h2 = None
+
+REQUESTS = 1000
+CONCURRENCY = 200
+LATENCY = 0.02
+
+
+class H2MockSuvvyAPI(object):
+    """Answers like MockSuvvyAPI, over cleartext HTTP/2"""
+
+    def __init__(self, latency: float = 0.0):
+        # only borrows the request handling, the HTTP/1.1 server never starts
+        self._api = MockSuvvyAPI(latency=latency)
+        self._api.server_close()
+        self.latency = latency
+        self.connections = 0
+        self._loop = asyncio.new_event_loop()
+        self._server: asyncio.AbstractServer | None = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        config = h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        connection = h2.connection.H2Connection(config=config)
+        connection.local_settings.max_concurrent_streams = 1000
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+
+        streams: dict[int, tuple[dict, bytearray]] = {}
+        while data := await reader.read(65535):
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    streams[event.stream_id] = (dict(event.headers), bytearray())
+                elif isinstance(event, h2.events.DataReceived):
+                    streams[event.stream_id][1].extend(event.data)
+                    connection.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, h2.events.StreamEnded):
+                    headers, body = streams.pop(event.stream_id)
+                    asyncio.create_task(
+                        self._respond(
+                            connection, writer, event.stream_id, headers, body
+                        )
+                    )
+            writer.write(connection.data_to_send())
+        writer.close()
+
+    async def _respond(
+        self,
+        connection: "h2.connection.H2Connection",
+        writer: asyncio.StreamWriter,
+        stream_id: int,
+        headers: dict,
+        body: bytearray,
+    ) -> None:
+        await asyncio.sleep(self.latency)
+        url = urlsplit(headers[":path"])
+        status, answer = self._api.dispatch(
+            headers[":method"],
+            url.path,
+            dict(parse_qsl(url.query)),
+            json.loads(body) if body else None,
+        )
+        content = json.dumps(answer).encode() if answer is not None else b""
+        connection.send_headers(
+            stream_id,
+            [
+                (":status", str(status)),
+                ("content-type", "application/json"),
+                ("content-length", str(len(content))),
+            ],
+        )
+        connection.send_data(stream_id, content, end_stream=True)
+        writer.write(connection.data_to_send())
+
+    def __enter__(self) -> "H2MockSuvvyAPI":
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._serve_connection, "127.0.0.1", 0), self._loop
+        ).result()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        assert self._server is not None
+        self._server.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class PriorKnowledgePool(ConnectionPool):
+    """Speaks HTTP/2 to a cleartext server without the HTTP/1.1 upgrade"""
+
+    def _client_options(self) -> dict:
+        return {**super()._client_options(), "http1": False}
+
+
+async def _run(suvvy: Suvvy) -> float:
+    jobs = [f"bench-{i}" for i in range(REQUESTS)]
+    start = time.perf_counter()
+    async for result in suvvy.apredict_many(jobs, concurrency=CONCURRENCY):
+        assert result.error is None, result.error
+    return time.perf_counter() - start
+
+
+def _report(name: str, elapsed: float, connections: int) -> None:
+    print(
+        f"{name:<10} {REQUESTS / elapsed:8.1f} predictions/s "
+        f"elapsed={elapsed:6.3f}s sockets={connections}"
+    )
+
+
+async def _bench(suvvy: Suvvy) -> float:
+    async with suvvy, suvvy.pool:
+        return await _run(suvvy)
+
+
+def main() -> None:
+    if h2 is None:
+        print("h2 is not installed, run `pip install suvvyapi[http2]`")
+        return
+
+    with MockSuvvyAPI(latency=LATENCY) as server:
+        elapsed = asyncio.run(_bench(Suvvy("token", api_url=server.url)))
+        _report("HTTP/1.1", elapsed, server.connections)
+
+    with H2MockSuvvyAPI(latency=LATENCY) as h2_server:
+        pool = PriorKnowledgePool(h2_server.url, http2=True, max_concurrent_streams=500)
+        elapsed = asyncio.run(_bench(Suvvy("token", pool=pool)))
+        _report("HTTP/2", elapsed, h2_server.connections)
+
+
+if __name__ == "__main__":
+    main()
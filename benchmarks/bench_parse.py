@@ -0,0 +1,38 @@
+"""Parse cost per message with and without response validation.
+
+Run with ``python -m benchmarks.bench_parse`` from the repository root.
+"""
+import json
+import timeit
+
+from suvvyapi._parsing import ResponseParser
+from tests.mock_api import make_history, make_message
+
+SIZES = (100, 1_000, 10_000)
+
+
+def _per_message(fn, size: int) -> float:
+    number = max(1, 20_000 // size)
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number / size
+
+
+def main() -> None:
+    validating = ResponseParser(validate=True)
+    trusted = ResponseParser(validate=False)
+
+    for size in SIZES:
+        messages = [make_message(i, f"Message number {i} " * 5) for i in range(size)]
+        content = json.dumps(make_history("bench", messages)).encode()
+
+        validated = _per_message(lambda: validating.history(content), size)
+        constructed = _per_message(lambda: trusted.history(content), size)
+        print(
+            f"{size:>6} messages: "
+            f"validated={validated * 1e6:6.2f}us/message "
+            f"trusted={constructed * 1e6:6.2f}us/message "
+            f"speedup={validated / constructed:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Latency of a fresh client per call versus the pooled client of Suvvy.
+
+Run with ``python -m benchmarks.bench_pool`` from the repository root.
+"""
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+from suvvyapi import Suvvy
+from tests.mock_api import MockSuvvyAPI
+
+CALLS = 500
+
+
+def _report(name: str, timings: list[float], connections: int) -> None:
+    timings = sorted(timings)
+    print(
+        f"{name:<28} mean={statistics.mean(timings) * 1000:7.3f}ms "
+        f"p50={timings[len(timings) // 2] * 1000:7.3f}ms "
+        f"p99={timings[int(len(timings) * 0.99)] * 1000:7.3f}ms "
+        f"connections={connections}"
+    )
+
+
+def _measure(call: Callable[[], object]) -> list[float]:
+    timings = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def _ameasure(call: Callable[[], Awaitable[object]]) -> list[float]:
+    timings = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _client_per_call(url: str) -> None:
+    with httpx.Client(base_url=url, timeout=300) as client:
+        client.get("/api/check")
+
+
+async def _async_client_per_call(url: str) -> None:
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        await client.get("/api/check")
+
+
+def main() -> None:
+    with MockSuvvyAPI() as server:
+        timings = _measure(lambda: _client_per_call(server.url))
+        _report("sync, client per call", timings, server.connections)
+
+        server.connections = 0
+        with Suvvy("token", api_url=server.url) as suvvy:
+            timings = _measure(suvvy.check_connection)
+        _report("sync, pooled", timings, server.connections)
+
+        server.connections = 0
+        timings = asyncio.run(_ameasure(lambda: _async_client_per_call(server.url)))
+        _report("async, client per call", timings, server.connections)
+
+        async def pooled() -> list[float]:
+            async with Suvvy("token", api_url=server.url) as suvvy:
+                return await _ameasure(suvvy.acheck_connection)
+
+        server.connections = 0
+        timings = asyncio.run(pooled())
+        _report("async, pooled", timings, server.connections)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Peak client memory of get_history versus streaming with iter_history.
+
+The mock API runs in a separate process, so only client allocations
+are traced. Run with ``python -m benchmarks.bench_stream``.
+"""
+import multiprocessing
+import time
+import tracemalloc
+from typing import Callable
+
+from suvvyapi import Message, Suvvy
+from tests.mock_api import MockSuvvyAPI
+
+MESSAGES = 50_000
+
+
+def _serve(urls: multiprocessing.Queue) -> None:
+    with MockSuvvyAPI() as server:
+        urls.put(server.url)
+        while True:
+            time.sleep(1)
+
+
+def _peak(fn: Callable[[], object]) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def main() -> None:
+    urls: multiprocessing.Queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(urls,), daemon=True)
+    server.start()
+
+    try:
+        with Suvvy("token", api_url=urls.get()) as suvvy:
+            for start in range(0, MESSAGES, 5_000):
+                suvvy.add_message_to_history(
+                    "bench",
+                    [
+                        Message(text=f"Message {i} " * 10)
+                        for i in range(start, start + 5_000)
+                    ],
+                )
+
+            def stream() -> None:
+                for _ in suvvy.iter_history("bench"):
+                    pass
+
+            full = _peak(lambda: suvvy.get_history("bench"))
+            streamed = _peak(stream)
+
+        print(f"{MESSAGES} messages: get_history peak={full:7.1f}MiB")
+        print(f"{MESSAGES} messages: iter_history peak={streamed:7.1f}MiB")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
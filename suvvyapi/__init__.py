@@ -1,10 +1,12 @@
 from suvvyapi.asynchronous.wrapper import AsyncSuvvyAPIWrapper
 from suvvyapi.models.history import (
     ChatHistory,
+    ChatHistoryMetadata,
     Message,
     HistoryMessage,
     FunctionDetails,
 )
+from suvvyapi.models.lazy import LazyChatHistory
 from suvvyapi.models.responses import (
     Prediction,
     LLMResult,
@@ -23,6 +25,8 @@ __all__ = [
     "TokenUsage",
     "BalanceUsage",
     "ChatHistory",
+    "ChatHistoryMetadata",
+    "LazyChatHistory",
     "Message",
     "HistoryMessage",
     "FunctionDetails",
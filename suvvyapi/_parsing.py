@@ -0,0 +1,209 @@
+import copy
+import os
+from datetime import datetime
+from typing import Any, Generic, Type, TypeVar
+
+import pydantic_core
+from pydantic import BaseModel, TypeAdapter
+
+from suvvyapi.models.history import (
+    ChatHistory,
+    ChatHistoryMetadata,
+    FunctionDetails,
+    HistoryMessage,
+)
+from suvvyapi.models.lazy import LazyChatHistory, LazyMessages
+from suvvyapi.models.responses import (
+    BalanceUsage,
+    DeletedHistory,
+    LLMResult,
+    Prediction,
+    TokenUsage,
+)
+
+STRICT_VALIDATION_ENV = "SUVVYAPI_STRICT_VALIDATION"
+
+M = TypeVar("M", bound=BaseModel)
+
+_datetime_adapter = TypeAdapter(datetime)
+
+# slot setters of BaseModel, much cheaper than object.__setattr__ calls
+_set_dict = BaseModel.__dict__["__dict__"].__set__
+_set_fields_set = BaseModel.__dict__["__pydantic_fields_set__"].__set__
+_set_extra = BaseModel.__dict__["__pydantic_extra__"].__set__
+_set_private = BaseModel.__dict__["__pydantic_private__"].__set__
+
+
+def strict_validation_forced() -> bool:
+    """Debug switch: validate every response, even if Suvvy was told not to"""
+    return os.getenv(STRICT_VALIDATION_ENV, "").lower() in ("1", "true", "yes")
+
+
+def _parse_datetime(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.fromisoformat(
+            value[:-1] + "+00:00" if value.endswith("Z") else value
+        )
+    except ValueError:
+        # fromisoformat of python 3.10 is picky, pydantic is not
+        return _datetime_adapter.validate_python(value)
+
+
+class _Builder(Generic[M]):
+    """Builds a model from trusted data without validation,
+    in the same way BaseModel.model_construct does, but faster"""
+
+    def __init__(self, model: Type[M]):
+        self.model = model
+        self.fields = frozenset(model.model_fields)
+
+    def __call__(self, data: dict[str, Any]) -> M:
+        fields_set = self.fields
+        if data.keys() != self.fields:
+            data, fields_set = self._complete(data)
+
+        obj = object.__new__(self.model)
+        _set_dict(obj, data)
+        # every instance needs a set of its own, assignments add to it
+        _set_fields_set(obj, set(fields_set))
+        _set_extra(obj, None)
+        _set_private(obj, None)
+        return obj
+
+    def _complete(self, data: dict[str, Any]) -> tuple[dict[str, Any], frozenset]:
+        """Drop unknown keys and fill in defaults of missing fields"""
+        values = {}
+        for name, field in self.model.model_fields.items():
+            if name in data:
+                values[name] = data[name]
+            else:
+                default = field.get_default(call_default_factory=True)
+                values[name] = copy.deepcopy(default)
+        return values, self.fields & data.keys()
+
+
+_function = _Builder(FunctionDetails)
+_message = _Builder(HistoryMessage)
+_history = _Builder(ChatHistory)
+_metadata = _Builder(ChatHistoryMetadata)
+_lazy_history = _Builder(LazyChatHistory)
+_token_usage = _Builder(TokenUsage)
+_balance_usage = _Builder(BalanceUsage)
+_llm_result = _Builder(LLMResult)
+_prediction = _Builder(Prediction)
+
+
+def construct_message(data: dict[str, Any]) -> HistoryMessage:
+    data["time"] = _parse_datetime(data.get("time"))
+    if data.get("function") is not None:
+        data["function"] = _function(data["function"])
+    return _message(data)
+
+
+def construct_messages(raw: list[dict[str, Any]]) -> list[HistoryMessage]:
+    """construct_message() for many messages. This is the hot loop of
+    trusted parsing, so the common case is inlined"""
+    fields = _message.fields
+    fromisoformat = datetime.fromisoformat
+    new = object.__new__
+
+    messages: list[HistoryMessage] = []
+    append = messages.append
+    for data in raw:
+        if data.keys() != fields or data["function"] is not None:
+            append(construct_message(data))
+            continue
+        try:
+            data["time"] = fromisoformat(data["time"])
+        except (TypeError, ValueError):
+            data["time"] = _parse_datetime(data["time"])
+        obj = new(HistoryMessage)
+        _set_dict(obj, data)
+        _set_fields_set(obj, set(fields))
+        _set_extra(obj, None)
+        _set_private(obj, None)
+        append(obj)
+    return messages
+
+
+def _parse_metadata_times(data: dict[str, Any]) -> None:
+    data["last_interaction_time"] = _parse_datetime(data.get("last_interaction_time"))
+    data["created_time"] = _parse_datetime(data.get("created_time"))
+
+
+def construct_history(data: dict[str, Any]) -> ChatHistory:
+    data["history"] = construct_messages(data.get("history", []))
+    _parse_metadata_times(data)
+    return _history(data)
+
+
+def construct_metadata(data: dict[str, Any]) -> ChatHistoryMetadata:
+    data.pop("history", None)
+    _parse_metadata_times(data)
+    return _metadata(data)
+
+
+def construct_lazy_history(data: dict[str, Any]) -> LazyChatHistory:
+    data["history"] = LazyMessages(data.get("history", []), construct_message)
+    _parse_metadata_times(data)
+    return _lazy_history(data)
+
+
+def construct_prediction(data: dict[str, Any]) -> Prediction:
+    data["new_messages"] = construct_messages(data.get("new_messages", []))
+    info = data.get("generation_info")
+    if info is not None:
+        if info.get("token_usage") is not None:
+            info["token_usage"] = _token_usage(info["token_usage"])
+        if info.get("balance_usage") is not None:
+            info["balance_usage"] = _balance_usage(info["balance_usage"])
+        data["generation_info"] = _llm_result(info)
+    return _prediction(data)
+
+
+class ResponseParser(object):
+    """Parses raw response bodies into models.
+
+    With `validate` unset, responses are trusted and models are built
+    without validation. Setting SUVVYAPI_STRICT_VALIDATION=1 in the
+    environment turns validation back on for debugging."""
+
+    def __init__(self, validate: bool = True):
+        self.validate = validate or strict_validation_forced()
+
+    def history(self, content: bytes) -> ChatHistory:
+        if self.validate:
+            return ChatHistory.model_validate_json(content)
+        return construct_history(pydantic_core.from_json(content))
+
+    def message(self, data: dict[str, Any]) -> HistoryMessage:
+        if self.validate:
+            return HistoryMessage.model_validate(data)
+        return construct_message(data)
+
+    def metadata(self, data: dict[str, Any]) -> ChatHistoryMetadata:
+        if self.validate:
+            return ChatHistoryMetadata.model_validate(data)
+        return construct_metadata(data)
+
+    def lazy_history(self, content: bytes) -> LazyChatHistory:
+        data = pydantic_core.from_json(content)
+        if not self.validate:
+            return construct_lazy_history(data)
+
+        raw = data.pop("history", [])
+        return LazyChatHistory.model_validate(
+            {**data, "history": LazyMessages(raw, HistoryMessage.model_validate)}
+        )
+
+    def deleted_history(self, content: bytes) -> ChatHistory:
+        if self.validate:
+            return DeletedHistory.model_validate_json(content).deleted_history
+        return construct_history(pydantic_core.from_json(content)["deleted_history"])
+
+    def prediction(self, content: bytes) -> Prediction:
+        if self.validate:
+            return Prediction.model_validate_json(content)
+        return construct_prediction(pydantic_core.from_json(content))
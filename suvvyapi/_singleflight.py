@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+_LoopKey = tuple[asyncio.AbstractEventLoop, Hashable]
+
+
+class _Call(object):
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(object):
+    """Lets concurrent callers with the same key share one execution"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget(self, key: Hashable) -> None:
+        """Make later callers with key start a new execution
+        instead of joining the running one"""
+        with self._lock:
+            self._calls.pop(key, None)
+
+
+class AsyncSingleFlight(object):
+    """Lets concurrent coroutines with the same key share one execution"""
+
+    def __init__(self) -> None:
+        self._calls: dict[_LoopKey, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        # futures can't be awaited from another event loop
+        loop_key = (asyncio.get_running_loop(), key)
+        future = self._calls.get(loop_key)
+        if future is None:
+            future = self._calls[loop_key] = asyncio.ensure_future(fn())
+            future.add_done_callback(partial(self._done, loop_key))
+        # one caller being cancelled must not cancel the request for the others
+        return await asyncio.shield(future)
+
+    def _done(self, key: _LoopKey, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def forget(self, key: Hashable) -> None:
+        """Make later callers with key start a new execution
+        instead of joining the running one, in every event loop"""
+        for running in list(self._calls):
+            if running[1] == key:
+                self._calls.pop(running, None)
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+from suvvyapi.exceptions.api import DeadlineExceededError
+from suvvyapi.ratelimit import Slots
+from suvvyapi.timeouts import remaining
+
+PREDICT_PATHS = frozenset(
+    {"/api/v1/history/predict", "/api/v1/history/message/predict"}
+)
+
+
+class AdaptiveLimiter(object):
+    """Limit of requests in flight that adapts to the API (AIMD).
+
+    Every successful request that was sent while the limit was in use
+    grows the limit by 1/limit, about one per round trip of all requests
+    in flight. A failed request (5xx, 429 or transport error), or smoothed
+    latency above `latency_tolerance` times the lowest of the last
+    `window` requests, cuts the limit by `backoff`, at most once per
+    round trip.
+
+    Only requests to `paths` are limited, predictions by default."""
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff: float = 0.75,
+        latency_tolerance: float = 2.0,
+        window: int = 100,
+        paths: frozenset[str] = PREDICT_PATHS,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "Limits must be 1 <= min_limit <= initial_limit <= max_limit"
+            )
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.paths = paths
+
+        self._limit = float(initial_limit)
+        self._slots = Slots(initial_limit)
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._smoothed: float | None = None
+        self._decreased_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight"""
+        return self._slots.limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._slots.in_use
+
+    def applies_to(self, path: str) -> bool:
+        return path in self.paths
+
+    def acquire(self) -> None:
+        if not self._slots.acquire(remaining()):
+            raise DeadlineExceededError("Deadline exceeded waiting for a request slot")
+
+    async def aacquire(self) -> None:
+        try:
+            await asyncio.wait_for(self._slots.aacquire(), remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(
+                "Deadline exceeded waiting for a request slot"
+            ) from None
+
+    def release(self) -> None:
+        self._slots.release()
+
+    def observe(self, latency: float, failed: bool) -> None:
+        """Adapt the limit to the outcome of a request holding a slot"""
+        with self._lock:
+            saturated = self._slots.in_use >= self._slots.limit
+            self._update(latency, failed, saturated)
+            limit = max(self.min_limit, min(self.max_limit, int(self._limit)))
+        if limit != self._slots.limit:
+            self._slots.set_limit(limit)
+
+    def _update(self, latency: float, failed: bool, saturated: bool) -> None:
+        if not failed:
+            self._latencies.append(latency)
+            self._smoothed = (
+                latency
+                if self._smoothed is None
+                else self._smoothed * 0.8 + latency * 0.2
+            )
+
+        congested = failed or (
+            self._smoothed is not None
+            and len(self._latencies) >= 10
+            and self._smoothed > min(self._latencies) * self.latency_tolerance
+        )
+        now = time.monotonic()
+        if congested:
+            # requests sent before the last decrease report the old load
+            if now - self._decreased_at >= (self._smoothed or latency):
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._decreased_at = now
+        elif saturated:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
@@ -15,6 +15,7 @@ from suvvyapi.exceptions.api import (
 )
 from suvvyapi.models.history import ChatHistory, Message
 from suvvyapi.models.responses import Prediction
+from suvvyapi.timeouts import OperationTimeouts, bounded
 
 
 class AsyncSuvvyAPIWrapper:
@@ -29,11 +30,13 @@ class AsyncSuvvyAPIWrapper:
         base_url: str = "https://api.suvvy.ai/",
         placeholders: dict | None = None,
         custom_log_info: dict | None = None,
+        timeouts: OperationTimeouts | None = None,
     ) -> None:
         self.token = token
         self.base_url = base_url.lstrip("/")
         self.placeholders = placeholders or {}
         self.custom_log_info = custom_log_info or {}
+        self.timeouts = timeouts or OperationTimeouts()
 
     async def _make_request(
         self,
@@ -42,8 +45,9 @@ class AsyncSuvvyAPIWrapper:
         body: dict | None = None,
     ) -> httpx.Response:
         headers = {"Authorization": f"bearer {self.token}"}
+        timeout = bounded(self.timeouts.for_request(method, path))
         async with httpx.AsyncClient(
-            headers=headers, base_url=self.base_url, timeout=300
+            headers=headers, base_url=self.base_url, timeout=timeout
         ) as c:
             response = await c.request(method=method, url=path, json=body)
             if response.status_code == 401:
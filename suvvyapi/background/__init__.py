@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+
+class EventLoopThread(object):
+    """An event loop running in a daemon thread, for code
+    outside of it to run coroutines in"""
+
+    def __init__(self, name: str = "suvvyapi-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    def is_current(self) -> bool:
+        """Whether the caller runs in this loop"""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run coroutine in the loop, blocking until it is done"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Can't block the background loop to wait for itself")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def forward(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run coroutine in the loop from another loop. Cancelling
+        the caller cancels the coroutine too"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return await asyncio.wrap_future(future)
+
+    def stop(self) -> None:
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+
+async def _next_chunk(chunks: AsyncIterator[bytes]) -> bytes | None:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+class _SyncStream(httpx.SyncByteStream):
+    """Body of a response of the loop, read from a thread"""
+
+    def __init__(self, response: httpx.Response, loop: EventLoopThread):
+        self._response = response
+        self._loop = loop
+
+    def __iter__(self) -> Iterator[bytes]:
+        chunks = self._response.aiter_raw()
+        while (chunk := self._loop.run(_next_chunk(chunks))) is not None:
+            yield chunk
+
+    def close(self) -> None:
+        self._loop.run(self._response.aclose())
+
+
+class _AsyncStream(httpx.AsyncByteStream):
+    """Body of a response of the loop, read from another loop"""
+
+    def __init__(self, response: httpx.Response, loop: EventLoopThread):
+        self._response = response
+        self._loop = loop
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = self._response.aiter_raw()
+        while (chunk := await self._loop.forward(_next_chunk(chunks))) is not None:
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._loop.forward(self._response.aclose())
+
+
+def detach(
+    response: httpx.Response, loop: EventLoopThread, sync: bool
+) -> httpx.Response:
+    """Response that streams the body of a response of the loop
+    to a thread (sync) or another loop"""
+    stream = _SyncStream(response, loop) if sync else _AsyncStream(response, loop)
+    return httpx.Response(
+        response.status_code,
+        headers=response.headers,
+        stream=stream,
+        request=response.request,
+        extensions=response.extensions,
+    )
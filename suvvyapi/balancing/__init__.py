@@ -0,0 +1,214 @@
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Sequence
+
+import httpx
+
+
+class Strategy(str, Enum):
+    EWMA = "ewma"
+    ROUND_ROBIN = "round_robin"
+    PRIMARY_BACKUP = "primary_backup"
+
+
+@dataclass(frozen=True)
+class BalancingPolicy:
+    """How requests are spread over several API urls.
+
+    `ewma` sends a request to the url with the lowest smoothed latency
+    times requests in flight, `round_robin` takes urls in turn and
+    `primary_backup` uses the first healthy url of the list. After
+    `failures_to_eject` failures in a row (5xx, 429 or transport errors)
+    a url gets no traffic for `ejection_duration` seconds and then has to
+    answer a connection check before it is used again.
+
+    A latency not measured for `latency_half_life` seconds counts half as
+    much, so a url that lost its traffic while being slow is tried again."""
+
+    strategy: Strategy = Strategy.EWMA
+    failures_to_eject: int = 3
+    ejection_duration: float = 30.0
+    decay: float = 0.3
+    latency_half_life: float = 10.0
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "strategy", Strategy(self.strategy))
+        if not 0 < self.decay <= 1:
+            raise ValueError("decay must be between 0 and 1")
+        if self.latency_half_life <= 0:
+            raise ValueError("latency_half_life must be a positive number")
+
+
+@dataclass
+class EndpointMetrics:
+    healthy: bool
+    latency: float | None
+    in_flight: int
+    requests: int
+    failures: int
+    ejections: int
+
+
+class Endpoint(object):
+    __slots__ = (
+        "url",
+        "latency",
+        "measured_at",
+        "in_flight",
+        "requests",
+        "failures",
+        "failures_in_row",
+        "ejections",
+        "ejected_until",
+        "probing",
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: float | None = None
+        self.measured_at = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.failures_in_row = 0
+        self.ejections = 0
+        self.ejected_until: float | None = None
+        self.probing = False
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until is None
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r})"
+
+
+class LoadBalancer(object):
+    """Picks one of several API urls for every request"""
+
+    def __init__(self, urls: Sequence[str], policy: BalancingPolicy | None = None):
+        if not urls:
+            raise ValueError("At least one api url is required")
+        self.policy = policy or BalancingPolicy()
+        self.endpoints = [Endpoint(url.rstrip("/ \\\n")) for url in urls]
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def take_probes(self) -> list[Endpoint]:
+        """Ejected endpoints that are due for a connection check.
+        Each is handed out once, until probe_succeeded or probe_failed"""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                e
+                for e in self.endpoints
+                if e.ejected_until is not None
+                and e.ejected_until <= now
+                and not e.probing
+            ]
+            for endpoint in due:
+                endpoint.probing = True
+        return due
+
+    def probe_succeeded(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.probing = False
+            endpoint.ejected_until = None
+            endpoint.failures_in_row = 0
+
+    def probe_failed(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.probing = False
+            self._eject(endpoint)
+
+    def probe_abandoned(self, endpoint: Endpoint) -> None:
+        """The check was cancelled, hand the endpoint out again"""
+        with self._lock:
+            endpoint.probing = False
+
+    def _eject(self, endpoint: Endpoint) -> None:
+        endpoint.ejected_until = time.monotonic() + self.policy.ejection_duration
+        endpoint.ejections += 1
+
+    def pick(self, exclude: Endpoint | None = None) -> Endpoint:
+        """Endpoint for the next request, other than `exclude` if possible.
+        When all endpoints are ejected, the one ejected first is used"""
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.healthy]
+            if not healthy:
+                return min(self.endpoints, key=lambda e: e.ejected_until or 0.0)
+            candidates = [e for e in healthy if e is not exclude] or healthy
+
+            strategy = self.policy.strategy
+            if strategy is Strategy.PRIMARY_BACKUP:
+                return candidates[0]
+            # rotating the start spreads requests over equal endpoints
+            turn = next(self._turn) % len(candidates)
+            candidates = candidates[turn:] + candidates[:turn]
+            if strategy is Strategy.ROUND_ROBIN:
+                return candidates[0]
+            now = time.monotonic()
+            return min(
+                candidates, key=lambda e: self._latency(e, now) * (e.in_flight + 1)
+            )
+
+    def _latency(self, endpoint: Endpoint, now: float) -> float:
+        """Smoothed latency, fading while it isn't measured"""
+        if endpoint.latency is None:
+            return 0.0
+        age = now - endpoint.measured_at
+        return endpoint.latency * 0.5 ** (age / self.policy.latency_half_life)
+
+    def started(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.in_flight += 1
+
+    def finished(self, endpoint: Endpoint, failed: bool, latency: float) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.requests += 1
+            if failed:
+                endpoint.failures += 1
+                endpoint.failures_in_row += 1
+                if (
+                    endpoint.healthy
+                    and endpoint.failures_in_row >= self.policy.failures_to_eject
+                ):
+                    self._eject(endpoint)
+                return
+            endpoint.failures_in_row = 0
+            now = time.monotonic()
+            decay = self.policy.decay
+            endpoint.latency = (
+                latency
+                if endpoint.latency is None
+                else self._latency(endpoint, now) * (1 - decay) + latency * decay
+            )
+            endpoint.measured_at = now
+
+    def metrics(self) -> dict[str, EndpointMetrics]:
+        """Health and statistics of every url"""
+        with self._lock:
+            return {
+                e.url: EndpointMetrics(
+                    healthy=e.healthy,
+                    latency=e.latency,
+                    in_flight=e.in_flight,
+                    requests=e.requests,
+                    failures=e.failures,
+                    ejections=e.ejections,
+                )
+                for e in self.endpoints
+            }
+
+
+def direct(request: httpx.Request, endpoint: Endpoint, path: str) -> None:
+    """Point the request at the endpoint"""
+    url = httpx.URL(endpoint.url + path)
+    if request.url.query:
+        url = url.copy_with(query=request.url.query)
+    request.url = url
+    request.headers["Host"] = url.netloc.decode("ascii")
@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+from suvvyapi.exceptions.api import SuvvyAPIError
+from suvvyapi.models.history import Message
+from suvvyapi.models.responses import Prediction
+
+PredictJob = str | tuple[str] | tuple[str, dict | None]
+PredictMessageJob = (
+    tuple[str, list[Message] | Message]
+    | tuple[str, list[Message] | Message, dict | None]
+)
+
+_Call = tuple[str, Callable[[], Prediction | None]]
+_AsyncCall = tuple[str, Callable[[], Awaitable[Prediction | None]]]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a single job of a bulk prediction.
+    `prediction` is None when API refused to answer or `error` is set"""
+
+    unique_id: str
+    prediction: Prediction | None = None
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def unpack_predict_job(job: PredictJob) -> tuple[str, dict | None]:
+    if isinstance(job, str):
+        return job, None
+    if len(job) == 1:
+        return job[0], None
+    return job[0], job[1]  # type: ignore
+
+
+def unpack_predict_message_job(
+    job: PredictMessageJob,
+) -> tuple[str, list[Message] | Message, dict | None]:
+    if len(job) == 2:
+        return job[0], job[1], None  # type: ignore
+    return job  # type: ignore
+
+
+def _check_concurrency(concurrency: int) -> None:
+    if concurrency < 1:
+        raise ValueError("concurrency must be a positive number")
+
+
+def iter_completed(
+    calls: Iterable[_Call], concurrency: int, return_exceptions: bool
+) -> Iterator[BatchResult]:
+    """Run calls in a thread pool, at most `concurrency` at a time,
+    and yield results in completion order.
+
+    Jobs are pulled from `calls` lazily, so memory does not grow with the
+    batch size. Unless `return_exceptions` is set, the first error is
+    raised and jobs which have not started yet are dropped."""
+    _check_concurrency(concurrency)
+
+    calls = iter(calls)
+    pending: dict[Future, str] = {}
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def submit_next() -> bool:
+        for unique_id, call in calls:
+            # run in the caller's context to keep its deadline
+            context = contextvars.copy_context()
+            pending[executor.submit(context.run, call)] = unique_id
+            return True
+        return False
+
+    try:
+        while len(pending) < concurrency and submit_next():
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                unique_id = pending.pop(future)
+                try:
+                    yield BatchResult(unique_id, prediction=future.result())
+                except (Exception, SuvvyAPIError) as e:
+                    if not return_exceptions:
+                        raise
+                    yield BatchResult(unique_id, error=e)
+                submit_next()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def aiter_completed(
+    calls: Iterable[_AsyncCall], concurrency: int, return_exceptions: bool
+) -> AsyncIterator[BatchResult]:
+    """Run coroutines, at most `concurrency` at a time,
+    and yield results in completion order.
+
+    Jobs are pulled from `calls` lazily, so memory does not grow with the
+    batch size. Unless `return_exceptions` is set, the first error is
+    raised and all other running jobs are cancelled."""
+    _check_concurrency(concurrency)
+
+    calls = iter(calls)
+    pending: dict[asyncio.Task, str] = {}
+
+    def submit_next() -> bool:
+        for unique_id, call in calls:
+            pending[asyncio.ensure_future(call())] = unique_id
+            return True
+        return False
+
+    try:
+        while len(pending) < concurrency and submit_next():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                unique_id = pending.pop(task)
+                try:
+                    yield BatchResult(unique_id, prediction=task.result())
+                except (Exception, SuvvyAPIError) as e:
+                    if not return_exceptions:
+                        raise
+                    yield BatchResult(unique_id, error=e)
+                submit_next()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
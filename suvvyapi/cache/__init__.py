@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from suvvyapi.models.history import ChatHistory, HistoryMessage
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class HistoryCache(object):
+    """Thread-safe LRU cache of ChatHistory objects keyed by unique_id.
+
+    Entries expire `ttl` seconds after they were stored (never if ttl is
+    None). Stored histories are never mutated: appending messages replaces
+    the entry, and get() returns a copy with its own message list.
+
+    Every write of a history (put without `since`, append, invalidate) gets
+    a new generation, so a read sent before it can't store an older history
+    over it: the read takes generation() before it is sent and passes it to
+    put() as `since`."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = 60.0):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive number")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, ChatHistory]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._generation = 0
+        # generations of the last writes, the oldest of them are forgotten
+        self._written: OrderedDict[str, int] = OrderedDict()
+        self._forgotten = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, unique_id: str) -> bool:
+        with self._lock:
+            return self._lookup(unique_id) is not None
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**vars(self._stats))
+
+    def _expires_at(self) -> float:
+        return time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+
+    def _lookup(self, unique_id: str) -> ChatHistory | None:
+        """Return a live entry and mark it as recently used. Lock must be held"""
+        entry = self._entries.get(unique_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[unique_id]
+            self._stats.expirations += 1
+            return None
+        self._entries.move_to_end(unique_id)
+        return entry[1]
+
+    def _store(self, history: ChatHistory) -> None:
+        """Store history, evicting least recently used ones. Lock must be held"""
+        self._entries[history.unique_id] = (self._expires_at(), history)
+        self._entries.move_to_end(history.unique_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def get(self, unique_id: str) -> ChatHistory | None:
+        """Get cached history or None"""
+        with self._lock:
+            history = self._lookup(unique_id)
+            if history is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+        return history.model_copy(update={"history": list(history.history)})
+
+    def generation(self) -> int:
+        """Generation to pass to put() for a read sent now"""
+        with self._lock:
+            return self._generation
+
+    def _wrote(self, unique_id: str) -> None:
+        """Start a new generation of the history. Lock must be held"""
+        self._generation += 1
+        self._written[unique_id] = self._generation
+        self._written.move_to_end(unique_id)
+        while len(self._written) > self.maxsize:
+            _, generation = self._written.popitem(last=False)
+            self._forgotten = max(self._forgotten, generation)
+
+    def put(self, history: ChatHistory, since: int | None = None) -> None:
+        """Cache history received from API. A history read since
+        generation `since` is dropped if it has been written since"""
+        history = history.model_copy(update={"history": list(history.history)})
+        with self._lock:
+            if since is not None:
+                written = self._written.get(history.unique_id, self._forgotten)
+                if written > since:
+                    return
+            self._store(history)
+            if since is None:
+                self._wrote(history.unique_id)
+
+    def append(self, unique_id: str, messages: list[HistoryMessage]) -> None:
+        """Append new messages to cached history, if it is cached"""
+        if not messages:
+            return
+        with self._lock:
+            self._wrote(unique_id)
+            history = self._lookup(unique_id)
+            if history is None:
+                return
+            self._store(
+                history.model_copy(
+                    update={
+                        "history": history.history + messages,
+                        "last_interaction_time": messages[-1].time,
+                    }
+                )
+            )
+
+    def invalidate(self, unique_id: str) -> None:
+        """Drop cached history"""
+        with self._lock:
+            self._entries.pop(unique_id, None)
+            self._wrote(unique_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._written.clear()
+            self._generation += 1
+            self._forgotten = self._generation
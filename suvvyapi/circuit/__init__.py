@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Mapping
+
+from suvvyapi.exceptions.api import CircuitOpenError
+
+PROBE_PATH = "/api/check"
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitMetrics:
+    state: CircuitState
+    calls: int
+    failures: int
+    slow_calls: int
+    times_opened: int
+    rejected: int
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.calls if self.calls else 0.0
+
+    @property
+    def slow_call_rate(self) -> float:
+        return self.slow_calls / self.calls if self.calls else 0.0
+
+
+class _Circuit(object):
+    __slots__ = ("state", "outcomes", "opened_at", "times_opened", "rejected")
+
+    def __init__(self, window_size: int) -> None:
+        self.state = CircuitState.CLOSED
+        # (failed, slow) of the last calls
+        self.outcomes: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+
+
+class CircuitBreaker(object):
+    """Tracks outcomes of requests per endpoint path and stops sending
+    requests to a failing endpoint.
+
+    A circuit opens when, among the last `window_size` calls (and at least
+    `minimum_calls`), the share of failed ones reaches
+    `failure_rate_threshold` or the share of ones slower than
+    `slow_call_duration` reaches `slow_call_rate_threshold`. Requests to an
+    open circuit fail fast with CircuitOpenError. After `open_duration`
+    seconds the next request probes the API with /api/check: the circuit
+    closes if the probe succeeds and opens again otherwise.
+
+    `slow_call_duration` may be a mapping of paths to durations, as
+    predictions are naturally much slower than history reads."""
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 1.0,
+        slow_call_duration: float | Mapping[str, float] | None = None,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30.0,
+    ):
+        if window_size < 1 or minimum_calls < 1:
+            raise ValueError("window_size and minimum_calls must be positive numbers")
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.window_size = window_size
+        self.minimum_calls = min(minimum_calls, window_size)
+        self.open_duration = open_duration
+
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, path: str) -> _Circuit:
+        circuit = self._circuits.get(path)
+        if circuit is None:
+            circuit = self._circuits[path] = _Circuit(self.window_size)
+        return circuit
+
+    def _slow_duration(self, path: str) -> float | None:
+        if isinstance(self.slow_call_duration, Mapping):
+            return self.slow_call_duration.get(path)
+        return self.slow_call_duration
+
+    def _open(self, circuit: _Circuit) -> None:
+        circuit.state = CircuitState.OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.times_opened += 1
+        circuit.outcomes.clear()
+
+    def state(self, path: str) -> CircuitState:
+        with self._lock:
+            return self._circuit(path).state
+
+    def before_call(self, path: str) -> bool:
+        """Check that a request may be sent. Returns True if the caller
+        must probe the API first and report it with probe_succeeded(),
+        probe_failed() or probe_abandoned(). Raises CircuitOpenError
+        if the circuit is open"""
+        if path == PROBE_PATH:
+            return False
+
+        with self._lock:
+            circuit = self._circuit(path)
+            if circuit.state == CircuitState.CLOSED:
+                return False
+
+            remaining = circuit.opened_at + self.open_duration - time.monotonic()
+            if circuit.state == CircuitState.OPEN and remaining <= 0:
+                circuit.state = CircuitState.HALF_OPEN
+                return True
+
+            # open, or half-open with a probe already running
+            circuit.rejected += 1
+            raise CircuitOpenError(path, max(remaining, 0.0))
+
+    def probe_succeeded(self, path: str) -> None:
+        with self._lock:
+            circuit = self._circuit(path)
+            circuit.state = CircuitState.CLOSED
+            circuit.outcomes.clear()
+
+    def probe_failed(self, path: str) -> None:
+        with self._lock:
+            self._open(self._circuit(path))
+
+    def probe_abandoned(self, path: str) -> None:
+        """The probe was cancelled before it got an answer,
+        let the next call probe again right away"""
+        with self._lock:
+            circuit = self._circuit(path)
+            if circuit.state == CircuitState.HALF_OPEN:
+                circuit.state = CircuitState.OPEN
+
+    def record(self, path: str, failed: bool, duration: float) -> None:
+        """Record outcome of a request"""
+        if path == PROBE_PATH:
+            return
+
+        slow_duration = self._slow_duration(path)
+        slow = slow_duration is not None and duration >= slow_duration
+        with self._lock:
+            circuit = self._circuit(path)
+            if circuit.state != CircuitState.CLOSED:
+                return
+
+            circuit.outcomes.append((failed, slow))
+            calls = len(circuit.outcomes)
+            if calls < self.minimum_calls:
+                return
+            failures = sum(f for f, _ in circuit.outcomes)
+            slow_calls = sum(s for _, s in circuit.outcomes)
+            if (
+                failures / calls >= self.failure_rate_threshold
+                or slow_calls / calls >= self.slow_call_rate_threshold
+            ):
+                self._open(circuit)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._circuits.clear()
+
+    def metrics(self) -> dict[str, CircuitMetrics]:
+        """Current state and window statistics of every endpoint path"""
+        with self._lock:
+            return {
+                path: CircuitMetrics(
+                    state=circuit.state,
+                    calls=len(circuit.outcomes),
+                    failures=sum(f for f, _ in circuit.outcomes),
+                    slow_calls=sum(s for _, s in circuit.outcomes),
+                    times_opened=circuit.times_opened,
+                    rejected=circuit.rejected,
+                )
+                for path, circuit in self._circuits.items()
+            }
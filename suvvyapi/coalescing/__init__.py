@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable
+
+from suvvyapi.exceptions.api import SuvvyAPIError
+from suvvyapi.models.history import ChatHistory, Message
+
+_Send = Callable[[str, list[Message]], ChatHistory]
+_AsyncSend = Callable[[str, list[Message]], Awaitable[ChatHistory]]
+
+
+class _Batch(object):
+    __slots__ = ("messages", "previous", "full", "done", "result", "error")
+
+    def __init__(self, previous: "_Batch | None") -> None:
+        self.messages: list[Message] = []
+        self.previous = previous
+        self.full = False
+        self.done = threading.Event()
+        self.result: ChatHistory | None = None
+        self.error: BaseException | None = None
+
+
+class _AsyncBatch(object):
+    __slots__ = ("messages", "previous", "future", "timer")
+
+    def __init__(self, previous: "asyncio.Future | None") -> None:
+        self.messages: list[Message] = []
+        self.previous = previous
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class MessageCoalescer(object):
+    """Merges messages added to the same unique_id within `window` seconds
+    (or until `max_batch` messages are collected) into a single request.
+
+    Every caller gets the ChatHistory returned for the merged request.
+    Batches of one unique_id are sent in the order they were started."""
+
+    def __init__(
+        self, send: _Send, asend: _AsyncSend, window: float, max_batch: int = 20
+    ):
+        if window < 0:
+            raise ValueError("window can't be negative")
+        if max_batch < 1:
+            raise ValueError("max_batch must be a positive number")
+
+        self.window = window
+        self.max_batch = max_batch
+        self._send = send
+        self._asend = asend
+
+        self._cond = threading.Condition()
+        self._batches: dict[str, _Batch] = {}
+        self._last_batches: dict[str, _Batch] = {}
+
+        self._async_batches: dict[str, _AsyncBatch] = {}
+        self._async_last: dict[str, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def add(self, unique_id: str, messages: list[Message]) -> ChatHistory:
+        with self._cond:
+            batch = self._batches.get(unique_id)
+            leader = batch is None
+            if batch is None:
+                batch = _Batch(self._last_batches.get(unique_id))
+                self._batches[unique_id] = self._last_batches[unique_id] = batch
+            batch.messages.extend(messages)
+            if len(batch.messages) >= self.max_batch:
+                batch.full = True
+                del self._batches[unique_id]
+                self._cond.notify_all()
+
+            if leader:
+                deadline = time.monotonic() + self.window
+                while not batch.full:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._batches.get(unique_id) is batch:
+                    del self._batches[unique_id]
+
+        if leader:
+            self._send_batch(unique_id, batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.result  # type: ignore
+
+    def _send_batch(self, unique_id: str, batch: _Batch) -> None:
+        if batch.previous is not None:
+            batch.previous.done.wait()
+            batch.previous = None
+
+        try:
+            batch.result = self._send(unique_id, batch.messages)
+        except (Exception, SuvvyAPIError) as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+            with self._cond:
+                if self._last_batches.get(unique_id) is batch:
+                    del self._last_batches[unique_id]
+
+    async def aadd(self, unique_id: str, messages: list[Message]) -> ChatHistory:
+        batch = self._async_batches.get(unique_id)
+        if batch is None:
+            batch = _AsyncBatch(self._async_last.get(unique_id))
+            self._async_batches[unique_id] = batch
+            self._async_last[unique_id] = batch.future
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.window, self._aflush, unique_id, batch
+            )
+        batch.messages.extend(messages)
+        if len(batch.messages) >= self.max_batch:
+            self._aflush(unique_id, batch)
+
+        return await asyncio.shield(batch.future)
+
+    def _aflush(self, unique_id: str, batch: _AsyncBatch) -> None:
+        if self._async_batches.get(unique_id) is not batch:
+            return
+        del self._async_batches[unique_id]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.ensure_future(self._asend_batch(unique_id, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _asend_batch(self, unique_id: str, batch: _AsyncBatch) -> None:
+        if batch.previous is not None:
+            await asyncio.wait([batch.previous])
+            batch.previous = None
+
+        try:
+            batch.future.set_result(await self._asend(unique_id, batch.messages))
+        except (Exception, SuvvyAPIError) as e:
+            batch.future.set_exception(e)
+        finally:
+            if not batch.future.done():
+                batch.future.cancel()
+            if self._async_last.get(unique_id) is batch.future:
+                del self._async_last[unique_id]
@@ -0,0 +1,206 @@
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Sequence
+
+from suvvyapi.enums import Role
+from suvvyapi.models.history import ChatHistoryMetadata, HistoryMessage
+
+ROLES: tuple[Role, ...] = tuple(Role)
+ROLE_CODES: dict[str, int] = {role.value: code for code, role in enumerate(ROLES)}
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "NumPy is required for vectorised views, install it with `pip install numpy`"
+        ) from e
+    return numpy
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class CompactHistory(object):
+    """Memory-efficient, read-only representation of a ChatHistory.
+
+    Message ids, tokens, times (POSIX seconds) and role codes are kept in
+    packed arrays and all texts in a single UTF-8 buffer. Function details
+    and message contexts are not kept. Repeated strings of the metadata
+    are interned, so they are shared between histories."""
+
+    __slots__ = (
+        "unique_id",
+        "channel_name",
+        "stopped",
+        "stop_reason",
+        "last_interaction_time",
+        "created_time",
+        "message_ids",
+        "tokens",
+        "times",
+        "roles",
+        "_texts",
+        "_offsets",
+    )
+
+    def __init__(
+        self, metadata: ChatHistoryMetadata, messages: Iterable[HistoryMessage]
+    ):
+        self.unique_id = metadata.unique_id
+        self.channel_name = sys.intern(metadata.channel_name)
+        self.stopped = metadata.stopped
+        self.stop_reason = sys.intern(metadata.stop_reason)
+        self.last_interaction_time = _timestamp(metadata.last_interaction_time)
+        self.created_time = _timestamp(metadata.created_time)
+
+        self.message_ids = array("q")
+        self.tokens = array("q")
+        self.times = array("d")
+        self.roles = array("B")
+        self._offsets = array("Q", [0])
+
+        texts = bytearray()
+        for message in messages:
+            self.message_ids.append(message.message_id)
+            self.tokens.append(message.tokens)
+            self.times.append(_timestamp(message.time))
+            self.roles.append(ROLE_CODES[Role(message.role).value])
+            texts += message.text.encode()
+            self._offsets.append(len(texts))
+        self._texts = bytes(texts)
+
+    @classmethod
+    def from_chat_history(cls, history: ChatHistoryMetadata) -> "CompactHistory":
+        """Convert ChatHistory (or LazyChatHistory)"""
+        return cls(history, history.history)  # type: ignore
+
+    def __len__(self) -> int:
+        return len(self.message_ids)
+
+    def __repr__(self) -> str:
+        return f"CompactHistory({self.unique_id!r}, {len(self)} messages)"
+
+    def text(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return self._texts[self._offsets[index] : self._offsets[index + 1]].decode()
+
+    def texts(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self.text(index)
+
+    def role(self, index: int) -> Role:
+        return ROLES[self.roles[index]]
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of message data buffers"""
+        return sum(
+            a.itemsize * len(a)
+            for a in (
+                self.message_ids,
+                self.tokens,
+                self.times,
+                self.roles,
+                self._offsets,
+            )
+        ) + len(self._texts)
+
+    def numpy(self) -> dict[str, Any]:
+        """Zero-copy NumPy views of the message columns"""
+        np = _numpy()
+        return {
+            "message_id": np.frombuffer(self.message_ids, dtype=np.int64),
+            "tokens": np.frombuffer(self.tokens, dtype=np.int64),
+            "time": np.frombuffer(self.times, dtype=np.float64),
+            "role": np.frombuffer(self.roles, dtype=np.uint8),
+        }
+
+
+class HistoryStore(object):
+    """Collection of CompactHistory objects keyed by unique_id,
+    with aggregates over all of them"""
+
+    def __init__(self, histories: Iterable[CompactHistory] = ()):
+        self._histories: dict[str, CompactHistory] = {}
+        for history in histories:
+            self.add(history)
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    def __contains__(self, unique_id: str) -> bool:
+        return unique_id in self._histories
+
+    def __getitem__(self, unique_id: str) -> CompactHistory:
+        return self._histories[unique_id]
+
+    def __iter__(self) -> Iterator[CompactHistory]:
+        return iter(self._histories.values())
+
+    def add(self, history: CompactHistory | ChatHistoryMetadata) -> CompactHistory:
+        """Add history, replacing the one with the same unique_id.
+        ChatHistory objects are converted"""
+        if not isinstance(history, CompactHistory):
+            history = CompactHistory.from_chat_history(history)
+        self._histories[history.unique_id] = history
+        return history
+
+    def remove(self, unique_id: str) -> None:
+        del self._histories[unique_id]
+
+    def _concatenate(self, column: str) -> Any:
+        np = _numpy()
+        views = [h.numpy()[column] for h in self._histories.values()]
+        if not views:
+            return np.empty(
+                0, dtype={"role": np.uint8, "time": np.float64}.get(column, np.int64)
+            )
+        return np.concatenate(views)
+
+    def tokens_by_role(self) -> dict[Role, int]:
+        """Total tokens of messages of every role across all histories"""
+        np = _numpy()
+        totals = np.bincount(
+            self._concatenate("role"),
+            weights=self._concatenate("tokens"),
+            minlength=len(ROLES),
+        )
+        return {role: int(total) for role, total in zip(ROLES, totals)}
+
+    def activity(
+        self,
+        window: float,
+        start: float | None = None,
+        end: float | None = None,
+        roles: Sequence[Role] | None = None,
+    ) -> tuple[Any, Any]:
+        """Number of messages per time window of `window` seconds.
+        Returns NumPy arrays of window start times and message counts"""
+        np = _numpy()
+        times = self._concatenate("time")
+        if roles is not None:
+            codes = [ROLE_CODES[Role(r).value] for r in roles]
+            times = times[np.isin(self._concatenate("role"), codes)]
+        if not len(times):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+
+        start = times.min() if start is None else start
+        end = times.max() if end is None else end
+        bins = int((end - start) // window) + 1
+        counts, edges = np.histogram(
+            times, bins=bins, range=(start, start + bins * window)
+        )
+        return edges[:-1], counts
@@ -0,0 +1,132 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, TypeVar
+
+from suvvyapi.exceptions.api import SuvvyAPIError
+from suvvyapi.models.history import ChatHistory, Message
+from suvvyapi.models.responses import Prediction
+from suvvyapi.wrapper import Suvvy
+
+T = TypeVar("T")
+
+
+class _Mailbox(object):
+    __slots__ = ("jobs", "worker")
+
+    def __init__(self) -> None:
+        self.jobs: deque[tuple[Callable[[], Awaitable[Any]], asyncio.Future]] = deque()
+        self.worker: asyncio.Task | None = None
+
+
+class Dispatcher(object):
+    """Runs requests serially within a unique_id and concurrently across them.
+
+    Each conversation gets a mailbox with a single worker task. The mailbox
+    is dropped as soon as it is drained, so only conversations with queued
+    work take memory. `max_in_flight` bounds requests running at once
+    across all conversations."""
+
+    def __init__(self, suvvy: Suvvy, max_in_flight: int = 100):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be a positive number")
+
+        self._suvvy = suvvy
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._mailboxes: dict[str, _Mailbox] = {}
+        self._closed = False
+
+    def __len__(self) -> int:
+        """Number of conversations with queued or running requests"""
+        return len(self._mailboxes)
+
+    async def __aenter__(self) -> "Dispatcher":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def submit(self, unique_id: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Queue `call` after all previously submitted calls for unique_id
+        and wait for its result"""
+        if self._closed:
+            raise RuntimeError("Dispatcher is closed")
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        mailbox = self._mailboxes.get(unique_id)
+        if mailbox is None:
+            mailbox = self._mailboxes[unique_id] = _Mailbox()
+        mailbox.jobs.append((call, future))
+        if mailbox.worker is None:
+            mailbox.worker = asyncio.create_task(self._work(unique_id, mailbox))
+
+        # the request keeps running if the caller is cancelled,
+        # so that later requests for this unique_id stay in order
+        return await asyncio.shield(future)
+
+    async def _work(self, unique_id: str, mailbox: _Mailbox) -> None:
+        try:
+            while mailbox.jobs:
+                call, future = mailbox.jobs.popleft()
+                if future.done():
+                    continue
+                async with self._semaphore:
+                    try:
+                        result = await call()
+                    except (Exception, SuvvyAPIError) as e:
+                        if not future.done():
+                            future.set_exception(e)
+                        continue
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            for _, future in mailbox.jobs:
+                future.cancel()
+            if self._mailboxes.get(unique_id) is mailbox:
+                del self._mailboxes[unique_id]
+
+    async def apredict(
+        self,
+        unique_id: str,
+        placeholders: dict | None = None,
+        custom_log_info: dict | None = None,
+        source: str | None = None,
+    ) -> Prediction | None:
+        """Get answer from AI by unique_id in conversation order"""
+        return await self.submit(
+            unique_id,
+            lambda: self._suvvy.apredict_history(
+                unique_id, placeholders, custom_log_info, source
+            ),
+        )
+
+    async def apredict_add_message(
+        self,
+        unique_id: str,
+        message: list[Message] | Message,
+        placeholders: dict | None = None,
+        custom_log_info: dict | None = None,
+        source: str | None = None,
+    ) -> Prediction | None:
+        """Add message and get answer from AI by unique_id in conversation order"""
+        return await self.submit(
+            unique_id,
+            lambda: self._suvvy.apredict_history_add_message(
+                unique_id, message, placeholders, custom_log_info, source
+            ),
+        )
+
+    async def async_add_message(
+        self, unique_id: str, message: list[Message] | Message
+    ) -> ChatHistory:
+        """Add message to history by unique_id in conversation order"""
+        return await self.submit(
+            unique_id,
+            lambda: self._suvvy.async_add_message_to_history(unique_id, message),
+        )
+
+    async def aclose(self) -> None:
+        """Stop accepting requests and wait for queued ones to finish"""
+        self._closed = True
+        workers = [m.worker for m in self._mailboxes.values() if m.worker]
+        if workers:
+            await asyncio.wait(workers)
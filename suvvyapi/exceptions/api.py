@@ -2,11 +2,15 @@ import re
 from typing import Optional
 
 
-class InvalidAPITokenError(BaseException):
+class SuvvyAPIError(BaseException):
+    """Base class for all errors raised by the Suvvy AI API wrapper"""
+
+
+class InvalidAPITokenError(SuvvyAPIError):
     """Raised, when API token is invalid"""
 
 
-class NegativeBalanceError(BaseException):
+class NegativeBalanceError(SuvvyAPIError):
     """Raised, when your Suvvy AI balance is under zero"""
 
     balance: Optional[int] = None
@@ -24,33 +28,54 @@ class NegativeBalanceError(BaseException):
         return exc
 
 
-class HistoryStoppedError(BaseException):
+class HistoryStoppedError(SuvvyAPIError):
     """Raised, when history is marked as stopped"""
 
 
-class HistoryNotFoundError(BaseException):
+class HistoryNotFoundError(SuvvyAPIError):
     """Raised, when history with this unique id is not found"""
 
 
-class MessageNotFoundError(BaseException):
+class MessageNotFoundError(SuvvyAPIError):
     """Raised, when message with this message_id is not found"""
 
 
-class InternalMessageAdded(BaseException):
+class InternalMessageAdded(SuvvyAPIError):
     """Raised, when message with internal role or role-specific information is added"""
 
 
-class HistoryTooLongError(BaseException):
+class HistoryTooLongError(SuvvyAPIError):
     """Raised, when history is too long to process"""
 
 
-class MessageLimitExceededError(BaseException):
+class MessageLimitExceededError(SuvvyAPIError):
     """Raised, when message limit for that instance is exceeded"""
 
 
-class UnknownAPIError(BaseException):
+class UnknownAPIError(SuvvyAPIError):
     """Raised, when WE DON'T KNOW WHAT HAPPENED"""
 
 
-class InternalAPIError(BaseException):
+class InternalAPIError(SuvvyAPIError):
     """Raised, when internal api error occurred"""
+
+
+class RateLimitExceededError(SuvvyAPIError):
+    """Raised, when too many requests were made"""
+
+
+class ServiceUnavailableError(SuvvyAPIError):
+    """Raised, when Suvvy AI API is temporarily unavailable"""
+
+
+class CircuitOpenError(SuvvyAPIError):
+    """Raised, when requests to an endpoint are stopped after repeated failures"""
+
+    def __init__(self, path: str, retry_in: float):
+        super().__init__(f"Circuit for {path} is open, retry in {retry_in:.1f}s")
+        self.path = path
+        self.retry_in = retry_in
+
+
+class DeadlineExceededError(SuvvyAPIError):
+    """Raised, when the deadline of an operation passed before it completed"""
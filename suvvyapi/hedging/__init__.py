@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HedgingPolicy:
+    """When to send a second copy of an idempotent read.
+
+    A hedge is sent when the first request hasn't answered within the
+    `percentile` of the last `window` latencies of the same operation
+    (but not before `min_samples` are known). Hedges are limited to
+    `max_extra_load` of all requests, with bursts of up to `max_burst`.
+
+    Sync reads are hedged by up to `max_workers` threads; when all of
+    them are busy, a read is sent from the caller's thread unhedged."""
+
+    percentile: float = 0.95
+    max_extra_load: float = 0.05
+    max_burst: float = 10.0
+    window: int = 500
+    min_samples: int = 20
+    min_delay: float = 0.005
+    max_workers: int = 32
+
+    def __post_init__(self) -> None:
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be a positive number")
+        if not 0 < self.percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        if not 0 <= self.max_extra_load <= 1:
+            raise ValueError("max_extra_load must be between 0 and 1")
+
+
+@dataclass
+class HedgingStats:
+    requests: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+
+class Hedger(object):
+    """Runs reads under a HedgingPolicy. The first successful answer wins;
+    a losing coroutine is cancelled, a losing thread is left to finish
+    and its result is dropped"""
+
+    def __init__(self, policy: HedgingPolicy):
+        self.policy = policy
+        self._latencies: dict[str, deque[float]] = {}
+        self._credits = policy.max_burst
+        self._stats = HedgingStats()
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._busy = 0
+
+    @property
+    def stats(self) -> HedgingStats:
+        with self._lock:
+            return HedgingStats(**vars(self._stats))
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def delay(self, operation: str) -> float | None:
+        """Time to wait before hedging, None if not enough is known yet"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(operation, ()))
+        if len(latencies) < self.policy.min_samples:
+            return None
+        index = math.ceil(self.policy.percentile * len(latencies)) - 1
+        return max(self.policy.min_delay, latencies[index])
+
+    def _start(self) -> None:
+        with self._lock:
+            self._stats.requests += 1
+            self._credits = min(
+                self.policy.max_burst, self._credits + self.policy.max_extra_load
+            )
+
+    def _take_credit(self) -> bool:
+        with self._lock:
+            if self._credits < 1:
+                return False
+            self._credits -= 1
+            self._stats.hedged += 1
+            return True
+
+    def _finish(self, operation: str, started: float, hedge_won: bool) -> None:
+        with self._lock:
+            latencies = self._latencies.get(operation)
+            if latencies is None:
+                latencies = deque(maxlen=self.policy.window)
+                self._latencies[operation] = latencies
+            latencies.append(time.monotonic() - started)
+            if hedge_won:
+                self._stats.hedge_wins += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.policy.max_workers, thread_name_prefix="suvvyapi-hedge"
+                )
+            return self._executor
+
+    def _reserve(self, workers: int) -> bool:
+        """Take workers if as many are idle, so a read never queues"""
+        with self._lock:
+            if self._busy + workers > self.policy.max_workers:
+                return False
+            self._busy += workers
+            return True
+
+    def _release(self) -> None:
+        with self._lock:
+            self._busy -= 1
+
+    def _submit(self, fn: Callable[[], T]) -> "Future[T]":
+        """Run fn in a reserved worker"""
+        # every thread runs in its own copy of the caller's context
+        context = contextvars.copy_context()
+
+        def work() -> T:
+            try:
+                return context.run(fn)
+            finally:
+                self._release()
+
+        future = self._get_executor().submit(work)
+        future.add_done_callback(self._release_cancelled)
+        return future
+
+    def _release_cancelled(self, future: Future) -> None:
+        # a call cancelled before it started never runs to release its worker
+        if future.cancelled():
+            self._release()
+
+    def run(self, operation: str, fn: Callable[[], T]) -> T:
+        self._start()
+        started = time.monotonic()
+        delay = self.delay(operation)
+        if delay is None or not self._reserve(1):
+            result = fn()
+            self._finish(operation, started, False)
+            return result
+
+        primary = self._submit(fn)
+        pending = {primary}
+        if not wait(pending, timeout=delay).done and self._reserve(1):
+            if self._take_credit():
+                pending.add(self._submit(fn))
+            else:
+                self._release()
+
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self._finish(operation, started, future is not primary)
+                    return future.result()
+                error = error or future.exception()
+        assert error is not None
+        raise error
+
+    async def arun(self, operation: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self._start()
+        started = time.monotonic()
+        delay = self.delay(operation)
+        if delay is None:
+            result = await fn()
+            self._finish(operation, started, False)
+            return result
+
+        primary: asyncio.Future[T] = asyncio.ensure_future(fn())
+        pending: set[asyncio.Future[T]] = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self._take_credit():
+                pending.add(asyncio.ensure_future(fn()))
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self._finish(operation, started, task is not primary)
+                        return task.result()
+                    error = error or task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
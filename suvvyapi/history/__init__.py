@@ -1,11 +1,45 @@
+import threading
+from typing import Any
+
 from suvvyapi import Suvvy, Prediction, Message, ChatHistory
 
 
 class History(object):
     def __init__(self, unique_id: str, suvvy: Suvvy):
+        """Messages of buffer_message() are kept locally and sent together
+        with the next prediction or added message, or on flush() / close()"""
         self._suvvy = suvvy
         self.unique_id = unique_id
 
+        self._pending: list[Message] = []
+        self._pending_lock = threading.Lock()
+
+    def __enter__(self) -> "History":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "History":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    @property
+    def pending(self) -> list[Message]:
+        """Messages buffered locally and not sent yet"""
+        return list(self._pending)
+
+    def _take_pending(self) -> list[Message]:
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _restore_pending(self, messages: list[Message]) -> None:
+        with self._pending_lock:
+            self._pending = messages + self._pending
+
     def predict(
         self,
         placeholders: dict | None = None,
@@ -13,6 +47,8 @@ class History(object):
         source: str | None = None,
     ) -> Prediction | None:
         """Get answer from AI"""
+        if self._pending:
+            return self.predict_add_message([], placeholders, custom_log_info, source)
         return self._suvvy.predict_history(
             self.unique_id, placeholders, custom_log_info, source
         )
@@ -24,6 +60,10 @@ class History(object):
         source: str | None = None,
     ) -> Prediction | None:
         """Get answer from AI"""
+        if self._pending:
+            return await self.apredict_add_message(
+                [], placeholders, custom_log_info, source
+            )
         return await self._suvvy.apredict_history(
             self.unique_id, placeholders, custom_log_info, source
         )
@@ -36,9 +76,18 @@ class History(object):
         source: str | None = None,
     ) -> Prediction | None:
         """Add message and get answer from AI"""
-        return self._suvvy.predict_history_add_message(
-            self.unique_id, message, placeholders, custom_log_info, source
-        )
+        pending = self._take_pending()
+        try:
+            return self._suvvy.predict_history_add_message(
+                self.unique_id,
+                pending + _as_list(message),
+                placeholders,
+                custom_log_info,
+                source,
+            )
+        except BaseException:
+            self._restore_pending(pending)
+            raise
 
     async def apredict_add_message(
         self,
@@ -48,30 +97,98 @@ class History(object):
         source: str | None = None,
     ) -> Prediction | None:
         """Add message and get answer from AI"""
-        return await self._suvvy.apredict_history_add_message(
-            self.unique_id, message, placeholders, custom_log_info, source
-        )
+        pending = self._take_pending()
+        try:
+            return await self._suvvy.apredict_history_add_message(
+                self.unique_id,
+                pending + _as_list(message),
+                placeholders,
+                custom_log_info,
+                source,
+            )
+        except BaseException:
+            self._restore_pending(pending)
+            raise
 
     def get(self) -> ChatHistory:
         """Get history"""
+        self.flush()
         return self._suvvy.get_history(self.unique_id)
 
     async def aget(self) -> ChatHistory:
         """Get history"""
+        await self.aflush()
         return await self._suvvy.aget_history(self.unique_id)
 
     def reset(self) -> ChatHistory:
-        """Reset history"""
+        """Reset history. Buffered messages are dropped"""
+        self._take_pending()
         return self._suvvy.reset_history(self.unique_id)
 
     async def areset(self) -> ChatHistory:
-        """Reset history"""
+        """Reset history. Buffered messages are dropped"""
+        self._take_pending()
         return await self._suvvy.areset_history(self.unique_id)
 
+    def buffer_message(self, message: list[Message] | Message) -> None:
+        """Keep message locally, to be sent with the next request"""
+        with self._pending_lock:
+            self._pending.extend(_as_list(message))
+
     def add_message(self, message: list[Message] | Message) -> ChatHistory:
-        """Get history"""
-        return self._suvvy.add_message_to_history(self.unique_id, message)
+        """Add message to history, after the buffered ones"""
+        pending = self._take_pending()
+        try:
+            return self._suvvy.add_message_to_history(
+                self.unique_id, pending + _as_list(message)
+            )
+        except BaseException:
+            self._restore_pending(pending)
+            raise
 
     async def async_add_message(self, message: list[Message] | Message) -> ChatHistory:
-        """Get history"""
-        return await self._suvvy.async_add_message_to_history(self.unique_id, message)
+        """Add message to history, after the buffered ones"""
+        pending = self._take_pending()
+        try:
+            return await self._suvvy.async_add_message_to_history(
+                self.unique_id, pending + _as_list(message)
+            )
+        except BaseException:
+            self._restore_pending(pending)
+            raise
+
+    def flush(self) -> ChatHistory | None:
+        """Send buffered messages. Returns None if nothing was buffered"""
+        messages = self._take_pending()
+        if not messages:
+            return None
+        try:
+            return self._suvvy.add_message_to_history(self.unique_id, messages)
+        except BaseException:
+            self._restore_pending(messages)
+            raise
+
+    async def aflush(self) -> ChatHistory | None:
+        """Send buffered messages. Returns None if nothing was buffered"""
+        messages = self._take_pending()
+        if not messages:
+            return None
+        try:
+            return await self._suvvy.async_add_message_to_history(
+                self.unique_id, messages
+            )
+        except BaseException:
+            self._restore_pending(messages)
+            raise
+
+    def close(self) -> None:
+        """Send buffered messages"""
+        self.flush()
+
+    async def aclose(self) -> None:
+        """Send buffered messages"""
+        await self.aflush()
+
+
+def _as_list(message: list[Message] | Message) -> list[Message]:
+    return message if isinstance(message, list) else [message]
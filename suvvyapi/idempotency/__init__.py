@@ -0,0 +1,60 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def new_idempotency_key() -> str:
+    return str(uuid.uuid4())
+
+
+class IdempotencyStore(object):
+    """Thread-safe record of results of completed requests keyed by their
+    idempotency key (or a tuple that scopes it). Records expire `ttl`
+    seconds after they were stored, least recently stored ones are dropped
+    beyond `maxsize`."""
+
+    def __init__(self, ttl: float = 300.0, maxsize: int = 10000):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive number")
+
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._records: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key)[0]
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Return (True, result) for a completed key, (False, None) otherwise.
+        Result itself may be None"""
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                return False, None
+            if record[0] <= time.monotonic():
+                del self._records[key]
+                return False, None
+            return True, record[1]
+
+    def put(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+            self._records[key] = (time.monotonic() + self.ttl, result)
+            while len(self._records) > self.maxsize:
+                self._records.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable
+
+from suvvyapi.exceptions.api import SuvvyAPIError
+
+
+def _no_traffic() -> float:
+    return float("inf")
+
+
+class Warmer(object):
+    """Runs `check` in `connections` threads at once, so that each of them
+    takes a connection of its own. The threads are kept between runs"""
+
+    def __init__(self, check: Callable[[], object], connections: int):
+        self.connections = connections
+        self._check = check
+        self._start = threading.Barrier(connections)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            connections, thread_name_prefix="suvvyapi-warmup"
+        )
+
+    def _run_check(self) -> object:
+        self._start.wait()
+        return self._check()
+
+    def run(self) -> None:
+        with self._lock:
+            # the barrier may be broken by an error of the previous run
+            self._start.reset()
+            futures = [
+                self._executor.submit(contextvars.copy_context().run, self._run_check)
+                for _ in range(self.connections)
+            ]
+            for future in futures:
+                error = future.exception()
+                if error is not None:
+                    raise error
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class Heartbeat(object):
+    """Calls `ping` in a daemon thread until stopped, once the connections
+    have been idle for `interval` seconds by `idle`, so traffic keeps them
+    open on its own. Errors of a ping are dropped, the next one is tried
+    anyway"""
+
+    def __init__(
+        self,
+        interval: float,
+        ping: Callable[[], object],
+        idle: Callable[[], float] = _no_traffic,
+    ):
+        self.interval = interval
+        self._ping = ping
+        self._idle = idle
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="suvvyapi-keepalive", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        wait = self.interval
+        while not self._stopped.wait(wait):
+            idle = self._idle()
+            if idle < self.interval:
+                wait = self.interval - idle
+                continue
+            wait = self.interval
+            try:
+                self._ping()
+            except (Exception, SuvvyAPIError):
+                pass
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+class AsyncHeartbeat(object):
+    """Awaits `ping` in a task of the running loop, once the connections
+    have been idle for `interval` seconds by `idle`"""
+
+    def __init__(
+        self,
+        interval: float,
+        ping: Callable[[], Awaitable[object]],
+        idle: Callable[[], float] = _no_traffic,
+    ):
+        self.interval = interval
+        self._ping = ping
+        self._idle = idle
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        wait = self.interval
+        while True:
+            await asyncio.sleep(wait)
+            idle = self._idle()
+            if idle < self.interval:
+                wait = self.interval - idle
+                continue
+            wait = self.interval
+            try:
+                await self._ping()
+            except (Exception, SuvvyAPIError):
+                pass
+
+    @property
+    def running(self) -> bool:
+        return not self._task.done()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._task.get_loop()
+
+    async def stop(self) -> None:
+        loop = self.loop
+        if loop is not asyncio.get_running_loop():
+            # the task can only be awaited in its own loop
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._task.cancel)
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
@@ -29,8 +29,9 @@ class HistoryMessage(Message):
     context: str = ""
 
 
-class ChatHistory(BaseModel):
-    history: list[HistoryMessage]
+class ChatHistoryMetadata(BaseModel):
+    """Everything ChatHistory has, except for the messages"""
+
     unique_id: str
     stopped: bool = False
     stop_reason: str = "unknown"
@@ -39,3 +40,7 @@ class ChatHistory(BaseModel):
     channel_name: str
     last_source: str | None = None
     last_instance_id: int | None = None
+
+
+class ChatHistory(ChatHistoryMetadata):
+    history: list[HistoryMessage]
@@ -0,0 +1,150 @@
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    MutableSequence,
+    Sequence,
+    cast,
+    overload,
+)
+
+from pydantic import ConfigDict, field_serializer
+
+from suvvyapi.models.history import ChatHistory, ChatHistoryMetadata, HistoryMessage
+
+
+class LazyMessages(MutableSequence[HistoryMessage]):
+    """List of messages, which keeps raw payloads and builds a HistoryMessage
+    only when it is accessed for the first time. Messages put into it are
+    kept as they are"""
+
+    __slots__ = ("_raw", "_messages", "_build")
+
+    def __init__(
+        self,
+        raw: list[dict[str, Any]],
+        build: Callable[[dict[str, Any]], HistoryMessage],
+    ):
+        self._raw: list[dict[str, Any] | None] = list(raw)
+        self._messages: list[HistoryMessage | None] = [None] * len(raw)
+        self._build = build
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    @overload
+    def __getitem__(self, index: int) -> HistoryMessage:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[HistoryMessage]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> HistoryMessage | list[HistoryMessage]:
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        return self._get(self._index(index))
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return index
+
+    def _get(self, index: int) -> HistoryMessage:
+        message = self._messages[index]
+        if message is None:
+            raw = self._raw[index]
+            assert raw is not None
+            message = self._messages[index] = self._build(raw)
+        return message
+
+    @overload
+    def __setitem__(self, index: int, value: HistoryMessage) -> None:
+        ...
+
+    @overload
+    def __setitem__(self, index: slice, value: Iterable[HistoryMessage]) -> None:
+        ...
+
+    def __setitem__(
+        self,
+        index: int | slice,
+        value: HistoryMessage | Iterable[HistoryMessage],
+    ) -> None:
+        if isinstance(index, slice):
+            messages = list(cast(Iterable[HistoryMessage], value))
+            self._messages[index] = messages
+            self._raw[index] = [None] * len(messages)
+            return
+        index = self._index(index)
+        self._messages[index] = cast(HistoryMessage, value)
+        self._raw[index] = None
+
+    def __delitem__(self, index: int | slice) -> None:
+        if not isinstance(index, slice):
+            index = self._index(index)
+        del self._messages[index]
+        del self._raw[index]
+
+    def insert(self, index: int, value: HistoryMessage) -> None:
+        self._messages.insert(index, value)
+        self._raw.insert(index, None)
+
+    def __add__(self, other: Iterable[HistoryMessage]) -> "LazyMessages":
+        combined = self.copy()
+        combined.extend(other)
+        return combined
+
+    def __radd__(self, other: Iterable[HistoryMessage]) -> "LazyMessages":
+        combined = LazyMessages([], self._build)
+        combined.extend(other)
+        combined._raw += self._raw
+        combined._messages += self._messages
+        return combined
+
+    def __iter__(self) -> Iterator[HistoryMessage]:
+        for index in range(len(self)):
+            yield self._get(index)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"LazyMessages({len(self)} messages, {self.materialized} built)"
+
+    def copy(self) -> "LazyMessages":
+        """Shallow copy, which keeps the messages already built"""
+        copied = LazyMessages([], self._build)
+        copied._raw = list(self._raw)
+        copied._messages = list(self._messages)
+        return copied
+
+    @property
+    def materialized(self) -> int:
+        """Number of messages already built"""
+        return len(self) - self._messages.count(None)
+
+
+class LazyChatHistory(ChatHistoryMetadata):
+    """ChatHistory, which builds its messages on access.
+    Metadata is available right away"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    history: LazyMessages
+
+    @field_serializer("history")
+    def _serialize_history(self, history: LazyMessages) -> list[HistoryMessage]:
+        return list(history)
+
+    def materialize(self) -> ChatHistory:
+        """Build all messages and return a regular ChatHistory"""
+        return ChatHistory.model_construct(
+            self.model_fields_set | {"history"},
+            **{**dict(self), "history": list(self.history)},
+        )
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 
-from suvvyapi.models.history import HistoryMessage
+from suvvyapi.models.history import ChatHistory, HistoryMessage
 
 
 class TokenUsage(BaseModel):
@@ -33,3 +33,7 @@ class Prediction(BaseModel):
             return self.new_messages[-1]
         else:
             return None
+
+
+class DeletedHistory(BaseModel):
+    deleted_history: ChatHistory
@@ -0,0 +1,285 @@
+import asyncio
+import contextlib
+import threading
+import time
+import warnings
+from dataclasses import dataclass, replace
+from types import TracebackType
+from typing import AsyncGenerator, Type
+
+import httpx
+
+from suvvyapi.background import EventLoopThread
+from suvvyapi.balancing import BalancingPolicy, LoadBalancer
+from suvvyapi.ratelimit import Slots
+from suvvyapi.timeouts import OperationTimeouts
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass
+class TenantMetrics:
+    requests: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    total_latency: float = 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+
+class ConnectionPool(object):
+    """Pooled sync and async clients of one API url.
+
+    Many Suvvy instances with different tokens can share a pool and its
+    warm connections: the token is sent with every request, not set on
+    the clients. Several urls are balanced as `balancing` says.
+
+    With `background_loop`, the async client lives in an event loop of its
+    own thread. Sync requests and async ones of other loops are sent from
+    there, sharing its connections. Requests are counted per tenant, and with
+    `tenant_max_in_flight` no tenant can hold more of the connections."""
+
+    def __init__(
+        self,
+        api_url: str | list[str] = "https://api.suvvy.ai",
+        max_connections: int | None = 100,
+        max_keepalive_connections: int | None = 20,
+        keepalive_expiry: float | None = 5.0,
+        http2: bool = False,
+        max_concurrent_streams: int | None = 100,
+        tenant_max_in_flight: int | None = None,
+        timeout: httpx.Timeout | None = None,
+        balancing: BalancingPolicy | None = None,
+        background_loop: bool = False,
+    ):
+        urls = [api_url] if isinstance(api_url, str) else list(api_url)
+        # requests are built against the first url and pointed
+        # at the one picked by the balancer, if there are several
+        self.api_url = urls[0].rstrip("/ \\\n")
+        self.balancer: LoadBalancer | None = None
+        if len(urls) > 1 or balancing is not None:
+            self.balancer = LoadBalancer(urls, balancing)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # requests bring their own timeouts, this one is for the rest
+        self.timeout = timeout or OperationTimeouts().predict
+
+        if http2 and not _http2_available():
+            warnings.warn(
+                "HTTP/2 needs the h2 package (pip install suvvyapi[http2]), "
+                "falling back to HTTP/1.1",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            http2 = False
+        self.http2 = http2
+        # many requests multiplexed over one connection would otherwise
+        # queue inside it, running down their timeouts
+        self.streams: Slots | None = None
+        if http2 and max_concurrent_streams is not None:
+            self.streams = Slots(max_concurrent_streams)
+
+        self.tenant_max_in_flight = tenant_max_in_flight
+        self._tenant_slots: dict[str, Slots] = {}
+        self._metrics: dict[str, TenantMetrics] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._used_at = time.monotonic()
+
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
+        # async clients by event loop, with generators closing them
+        self._async_clients: dict[
+            asyncio.AbstractEventLoop,
+            tuple[httpx.AsyncClient, AsyncGenerator[None, None]],
+        ] = {}
+        self.background_loop = background_loop
+        self._loop_thread: EventLoopThread | None = None
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    def _client_options(self) -> dict:
+        """Keyword arguments shared by the sync and async clients"""
+        return {
+            "base_url": self.api_url,
+            "timeout": self.timeout,
+            "limits": self.limits,
+            "http2": self.http2,
+        }
+
+    def client(self) -> httpx.Client:
+        """Return the pooled sync client, creating it on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Return the pooled async client of the running event loop.
+
+        Connections can't outlive the loop they were opened in, so every
+        loop gets a client of its own. The client is closed when its loop
+        shuts down its async generators, as `asyncio.run` does, or by
+        aclose()."""
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is not None:
+            return entry[0]
+        with self._client_lock:
+            entry = self._async_clients.get(loop)
+            if entry is None:
+                # clients of loops closed without finalizing them are dropped
+                for closed in [l for l in self._async_clients if l.is_closed()]:
+                    del self._async_clients[closed]
+                client = httpx.AsyncClient(**self._client_options())
+                closer = self._close_with_loop(loop, client)
+                # starting the generator registers it with the loop; dropping
+                # it makes the loop finish it, unless the loop is closed
+                with contextlib.suppress(StopIteration):
+                    closer.asend(None).send(None)
+                entry = self._async_clients[loop] = (client, closer)
+        return entry[0]
+
+    async def _close_with_loop(
+        self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient
+    ) -> AsyncGenerator[None, None]:
+        """Suspends until the event loop finalizes it, then closes client"""
+        try:
+            yield
+        finally:
+            with self._client_lock:
+                entry = self._async_clients.get(loop)
+                if entry is not None and entry[0] is client:
+                    del self._async_clients[loop]
+            await client.aclose()
+
+    def loop_thread(self) -> EventLoopThread | None:
+        """The background loop that owns the async client,
+        None unless `background_loop` is on"""
+        if not self.background_loop:
+            return None
+        if self._loop_thread is None:
+            with self._client_lock:
+                if self._loop_thread is None:
+                    self._loop_thread = EventLoopThread()
+        return self._loop_thread
+
+    def _take_loop_thread(self) -> EventLoopThread | None:
+        with self._client_lock:
+            thread, self._loop_thread = self._loop_thread, None
+        return thread
+
+    async def _close_async_clients(self) -> None:
+        with self._client_lock:
+            clients, self._async_clients = self._async_clients, {}
+        entry = clients.pop(asyncio.get_running_loop(), None)
+        # closers of other loops are dropped, so those loops close them
+        clients.clear()
+        if entry is not None:
+            await entry[1].aclose()
+
+    def close(self) -> None:
+        """Close pooled sync connections, and async ones
+        together with the background loop"""
+        thread = self._take_loop_thread()
+        if thread is not None:
+            thread.run(self._close_async_clients())
+            thread.stop()
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        """Close pooled async and sync connections"""
+        thread = self._take_loop_thread()
+        if thread is not None:
+            await thread.forward(self._close_async_clients())
+            thread.stop()
+        else:
+            await self._close_async_clients()
+        self.close()
+
+    def tenant_slots(self, tenant: str) -> Slots | None:
+        """Requests in flight of the tenant, None if they are not limited"""
+        if self.tenant_max_in_flight is None:
+            return None
+        with self._lock:
+            slots = self._tenant_slots.get(tenant)
+            if slots is None:
+                slots = Slots(self.tenant_max_in_flight)
+                self._tenant_slots[tenant] = slots
+            return slots
+
+    def _tenant(self, tenant: str) -> TenantMetrics:
+        metrics = self._metrics.get(tenant)
+        if metrics is None:
+            metrics = self._metrics[tenant] = TenantMetrics()
+        return metrics
+
+    def started(self, tenant: str) -> None:
+        with self._lock:
+            self._tenant(tenant).in_flight += 1
+            self._in_flight += 1
+
+    def finished(self, tenant: str) -> None:
+        with self._lock:
+            self._tenant(tenant).in_flight -= 1
+            self._in_flight -= 1
+            self._used_at = time.monotonic()
+
+    def idle_for(self) -> float:
+        """Seconds since the last request of any tenant finished,
+        0 while one is in flight"""
+        with self._lock:
+            if self._in_flight:
+                return 0.0
+            return time.monotonic() - self._used_at
+
+    def record(self, tenant: str, failed: bool, latency: float) -> None:
+        with self._lock:
+            metrics = self._tenant(tenant)
+            metrics.requests += 1
+            metrics.failures += failed
+            metrics.total_latency += latency
+
+    def metrics(self) -> dict[str, TenantMetrics]:
+        """Requests sent so far by every tenant"""
+        with self._lock:
+            return {tenant: replace(m) for tenant, m in self._metrics.items()}
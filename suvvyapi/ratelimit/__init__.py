@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Mapping
+
+from suvvyapi.exceptions.api import DeadlineExceededError
+from suvvyapi.timeouts import remaining
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket refilled with `rate` tokens per second
+    up to `burst` tokens.
+
+    Callers reserve a token and then wait for the returned delay, so waiting
+    is the same for threads and coroutines, and callers are served in the
+    order they came."""
+
+    def __init__(self, rate: float, burst: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be a positive number")
+
+        self.rate = rate
+        self.burst = max(burst if burst is not None else rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_delay: float | None = None) -> float | None:
+        """Take a token, returning seconds to wait before using it.
+        If the wait would exceed `max_delay`, nothing is taken
+        and None is returned"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            delay = max(0.0, (1 - self._tokens) / self.rate)
+            if max_delay is not None and delay > max_delay:
+                return None
+            self._tokens -= 1
+            return delay
+
+
+class Slots(object):
+    """Counting semaphore shared by threads and event loops.
+
+    Released slots are handed over to waiters in the order they came,
+    whichever kind of waiter they are."""
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("limit must be a positive number")
+
+        self.limit = limit
+        self.in_use = 0
+        self._waiters: deque[threading.Event | asyncio.Future] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return True
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+
+        if waiter.wait(timeout):
+            return True
+        with self._lock:
+            if waiter not in self._waiters:
+                # handed over while timing out
+                return True
+            self._waiters.remove(waiter)
+        return False
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            future = loop.create_future()
+            self._waiters.append(future)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiting = future in self._waiters
+                if waiting:
+                    self._waiters.remove(future)
+            # a slot handed over before the cancellation must be passed on;
+            # if the hand-over is still scheduled, _hand_over passes it on
+            if not waiting and not future.cancelled():
+                self.release()
+            raise
+
+    def set_limit(self, limit: int) -> None:
+        """Change the limit, letting waiters in if it grew"""
+        if limit < 1:
+            raise ValueError("limit must be a positive number")
+        admitted = []
+        with self._lock:
+            self.limit = limit
+            while self._waiters and self.in_use < limit:
+                self.in_use += 1
+                admitted.append(self._waiters.popleft())
+        for waiter in admitted:
+            self._wake(waiter)
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters or self.in_use > self.limit:
+                self.in_use -= 1
+                return
+            waiter = self._waiters.popleft()
+        self._wake(waiter)
+
+    def _wake(self, waiter: threading.Event | asyncio.Future) -> None:
+        """Hand a slot over to the waiter"""
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        try:
+            waiter.get_loop().call_soon_threadsafe(self._hand_over, waiter)
+        except RuntimeError:
+            # the loop of the waiter is closed
+            self.release()
+
+    def _hand_over(self, future: asyncio.Future) -> None:
+        if future.done():
+            # waiter was cancelled in the meantime, pass the slot on
+            self.release()
+        else:
+            future.set_result(None)
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Requests per second (with bursts of up to `burst` requests)
+    and requests in flight. None means unlimited"""
+
+    rate: float | None = None
+    burst: float | None = None
+    max_in_flight: int | None = None
+
+
+class _Limiter(object):
+    __slots__ = ("bucket", "slots")
+
+    def __init__(self, bucket: TokenBucket | None, slots: Slots | None):
+        self.bucket = bucket
+        self.slots = slots
+
+
+class RateLimiter(object):
+    """Client-side rate limit and concurrency governor.
+
+    `limit` applies to all requests together, `endpoints` maps paths to
+    additional limits of their own. Waiting respects the current deadline:
+    DeadlineExceededError is raised instead of waiting past it.
+
+    One limiter may be shared by several Suvvy instances and used from
+    threads and event loops at the same time."""
+
+    def __init__(
+        self, limit: Limit | None = None, endpoints: Mapping[str, Limit] | None = None
+    ):
+        self._global = self._limiter("global", limit or Limit())
+        self._endpoints = {
+            path: self._limiter(path, endpoint)
+            for path, endpoint in (endpoints or {}).items()
+        }
+
+    def _limiter(self, name: str, limit: Limit) -> _Limiter:
+        return _Limiter(
+            TokenBucket(limit.rate, limit.burst) if limit.rate else None,
+            Slots(limit.max_in_flight) if limit.max_in_flight else None,
+        )
+
+    def _limiters(self, path: str) -> list[_Limiter]:
+        endpoint = self._endpoints.get(path)
+        return [self._global] if endpoint is None else [endpoint, self._global]
+
+    def _token_delay(self, path: str) -> float:
+        delay = 0.0
+        for limiter in self._limiters(path):
+            if limiter.bucket is None:
+                continue
+            left = remaining()
+            max_delay = None if left is None else max(left, 0.0)
+            reserved = limiter.bucket.reserve(max_delay)
+            if reserved is None:
+                raise DeadlineExceededError("Deadline exceeded waiting for rate limit")
+            delay = max(delay, reserved)
+        return delay
+
+    def acquire(self, path: str) -> None:
+        """Block until a request to path may be sent"""
+        time.sleep(self._token_delay(path))
+
+        acquired: list[Slots] = []
+        try:
+            for limiter in self._limiters(path):
+                if limiter.slots is None:
+                    continue
+                if not limiter.slots.acquire(remaining()):
+                    raise DeadlineExceededError(
+                        "Deadline exceeded waiting for a request slot"
+                    )
+                acquired.append(limiter.slots)
+        except BaseException:
+            for slots in acquired:
+                slots.release()
+            raise
+
+    async def aacquire(self, path: str) -> None:
+        """Wait until a request to path may be sent"""
+        await asyncio.sleep(self._token_delay(path))
+
+        acquired: list[Slots] = []
+        try:
+            for limiter in self._limiters(path):
+                if limiter.slots is None:
+                    continue
+                try:
+                    await asyncio.wait_for(limiter.slots.aacquire(), remaining())
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError(
+                        "Deadline exceeded waiting for a request slot"
+                    ) from None
+                acquired.append(limiter.slots)
+        except BaseException:
+            for slots in acquired:
+                slots.release()
+            raise
+
+    def release(self, path: str) -> None:
+        """Mark a request to path as finished"""
+        for limiter in reversed(self._limiters(path)):
+            if limiter.slots is not None:
+                limiter.slots.release()
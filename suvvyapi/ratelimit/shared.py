@@ -0,0 +1,174 @@
+"""Rate limits shared by all processes of a host, backed by file locks.
+
+Requires a POSIX system (fcntl)."""
+import asyncio
+import fcntl
+import os
+import re
+import stat
+import struct
+import tempfile
+import time
+from typing import Mapping
+
+from suvvyapi.ratelimit import Limit, RateLimiter, Slots, TokenBucket, _Limiter
+
+_STATE = struct.Struct("dd")  # tokens, updated at (monotonic clock)
+
+_POLL_INTERVAL = 0.005
+_MAX_POLL_INTERVAL = 0.05
+
+# a planted symlink must not make us create or lock another file
+_OPEN_FLAGS = os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW
+
+
+def _file_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_") or "root"
+
+
+def _default_directory() -> str:
+    """Directory of the current user, which other users can't write to"""
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    directory = os.path.join(base, f"suvvyapi-ratelimit-{os.getuid()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o022
+    ):
+        raise PermissionError(
+            f"{directory} is not a private directory of the current user, "
+            "pass directory to SharedRateLimiter"
+        )
+    return directory
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket with its state in a file, locked with flock while
+    updated. Relies on the monotonic clock being system-wide, as it is
+    on Linux and macOS"""
+
+    def __init__(self, path: str, rate: float, burst: float | None = None):
+        super().__init__(rate, burst)
+        self.path = path
+        self._fd: int | None = None
+        self._pid = 0
+
+    def __del__(self) -> None:
+        if self._fd is not None and self._pid == os.getpid():
+            os.close(self._fd)
+
+    def _file(self) -> int:
+        # a forked worker shares the open file (and its flock) with the
+        # parent, so every process opens the file on its own
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, _OPEN_FLAGS, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    def reserve(self, max_delay: float | None = None) -> float | None:
+        # flock is held per open file, so threads are serialized separately
+        with self._lock:
+            fd = self._file()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                now = time.monotonic()
+                data = os.pread(fd, _STATE.size, 0)
+                if len(data) == _STATE.size:
+                    tokens, updated = _STATE.unpack(data)
+                    # a file from before a reboot has time from the future
+                    tokens += max(0.0, now - updated) * self.rate
+                else:
+                    tokens = self.burst
+                tokens = min(self.burst, tokens)
+
+                delay = max(0.0, (1 - tokens) / self.rate)
+                if max_delay is not None and delay > max_delay:
+                    os.pwrite(fd, _STATE.pack(tokens, now), 0)
+                    return None
+                os.pwrite(fd, _STATE.pack(tokens - 1, now), 0)
+                return delay
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileSlots(Slots):
+    """In-flight limit as a set of `limit` lock files: a slot is taken by
+    holding an exclusive flock on one of them. Locks of a crashed process
+    are released by the system, so slots are never leaked"""
+
+    def __init__(self, prefix: str, limit: int):
+        super().__init__(limit)
+        self.paths = [f"{prefix}.{i}.slot" for i in range(limit)]
+        self._held: list[int] = []
+
+    def _try_acquire(self) -> bool:
+        for path in self.paths:
+            fd = os.open(path, _OPEN_FLAGS, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            with self._lock:
+                self._held.append(fd)
+                self.in_use = len(self._held)
+            return True
+        return False
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = _POLL_INTERVAL
+        while not self._try_acquire():
+            if deadline is not None and time.monotonic() + interval > deadline:
+                return False
+            time.sleep(interval)
+            interval = min(interval * 2, _MAX_POLL_INTERVAL)
+        return True
+
+    async def aacquire(self) -> None:
+        interval = _POLL_INTERVAL
+        while not self._try_acquire():
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, _MAX_POLL_INTERVAL)
+
+    def release(self) -> None:
+        # slots are interchangeable, so any held one is released
+        with self._lock:
+            fd = self._held.pop()
+            self.in_use = len(self._held)
+        os.close(fd)
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter shared by all processes of a host that use the same
+    `directory` (by default a private one of the current user, in
+    XDG_RUNTIME_DIR or the system temporary directory).
+
+    Token buckets are kept in files updated under flock, in-flight slots
+    are lock files. All processes must be configured with the same limits."""
+
+    def __init__(
+        self,
+        limit: Limit | None = None,
+        endpoints: Mapping[str, Limit] | None = None,
+        directory: str | None = None,
+    ):
+        if directory is None:
+            self.directory = _default_directory()
+        else:
+            self.directory = directory
+            os.makedirs(self.directory, exist_ok=True)
+        super().__init__(limit, endpoints)
+
+    def _limiter(self, name: str, limit: Limit) -> _Limiter:
+        prefix = os.path.join(self.directory, _file_name(name))
+        return _Limiter(
+            (
+                FileTokenBucket(f"{prefix}.bucket", limit.rate, limit.burst)
+                if limit.rate
+                else None
+            ),
+            FileSlots(prefix, limit.max_in_flight) if limit.max_in_flight else None,
+        )
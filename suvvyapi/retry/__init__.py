@@ -0,0 +1,142 @@
+import random
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from suvvyapi.timeouts import fits_deadline
+
+# The server refused these requests without processing them,
+# so they are safe to repeat for any endpoint
+SAFE_STATUSES = frozenset({429, 503})
+SAFE_ERRORS: tuple[type[Exception], ...] = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+
+# The request may have been processed, so only idempotent ones are repeated
+IDEMPOTENT_STATUSES = frozenset({500, 502, 504})
+IDEMPOTENT_ERRORS: tuple[type[Exception], ...] = (httpx.TransportError,)
+
+IDEMPOTENT_ENDPOINTS = frozenset(
+    {
+        ("GET", "/api/check"),
+        ("GET", "/api/v1/history"),
+    }
+)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before repeating a failed request.
+
+    Delays follow "decorrelated jitter" backoff: every delay is random
+    between `base_delay` and three times the previous one, capped by
+    `max_delay`. A longer Retry-After of the response is honoured.
+    No retry is made once `budget` seconds passed since the first attempt
+    or the next delay would exceed it or the current deadline.
+
+    Requests to endpoints outside of `idempotent_endpoints` (like
+    predictions) are only repeated when the server surely didn't process
+    them: connection failures, 429 and 503 responses. If the server
+    deduplicates requests by their Idempotency-Key header, set
+    `trust_idempotency_keys` to retry keyed requests as idempotent ones."""
+
+    max_attempts: int = 3
+    budget: float = 30.0
+    base_delay: float = 0.2
+    max_delay: float = 10.0
+    respect_retry_after: bool = True
+    trust_idempotency_keys: bool = False
+    idempotent_endpoints: frozenset[tuple[str, str]] = field(
+        default=IDEMPOTENT_ENDPOINTS
+    )
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be a positive number")
+
+    def is_idempotent(self, method: str, path: str) -> bool:
+        return (method.upper(), path) in self.idempotent_endpoints
+
+    def start(
+        self,
+        method: str,
+        path: str,
+        idempotent: Optional[bool] = None,
+        keyed: bool = False,
+    ) -> "RetryState":
+        """Begin tracking attempts of a single request"""
+        if idempotent is None:
+            idempotent = self.is_idempotent(method, path) or (
+                keyed and self.trust_idempotency_keys
+            )
+        return RetryState(self, idempotent)
+
+
+class RetryState(object):
+    """Attempts of a single request made under a RetryPolicy"""
+
+    def __init__(self, policy: RetryPolicy, idempotent: bool):
+        self.policy = policy
+        self.idempotent = idempotent
+        self.attempts = 1
+        self.started = time.monotonic()
+        self._delay = policy.base_delay
+
+    def _next_delay(self, retry_after: float | None = None) -> float | None:
+        policy = self.policy
+        if self.attempts >= policy.max_attempts:
+            return None
+
+        self._delay = min(
+            policy.max_delay, random.uniform(policy.base_delay, self._delay * 3)
+        )
+        delay = self._delay
+        if retry_after is not None and policy.respect_retry_after:
+            delay = max(delay, retry_after)
+
+        if time.monotonic() - self.started + delay > policy.budget:
+            return None
+        if not fits_deadline(delay):
+            return None
+        self.attempts += 1
+        return delay
+
+    def after_response(self, response: httpx.Response) -> float | None:
+        """Seconds to wait before repeating the request,
+        or None if the response is final"""
+        status = response.status_code
+        if status in SAFE_STATUSES or (
+            self.idempotent and status in IDEMPOTENT_STATUSES
+        ):
+            return self._next_delay(
+                parse_retry_after(response.headers.get("Retry-After"))
+            )
+        return None
+
+    def after_error(self, error: Exception) -> float | None:
+        """Seconds to wait before repeating the request,
+        or None if the error must be raised"""
+        if isinstance(error, SAFE_ERRORS) or (
+            self.idempotent and isinstance(error, IDEMPOTENT_ERRORS)
+        ):
+            return self._next_delay()
+        return None
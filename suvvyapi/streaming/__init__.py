@@ -0,0 +1,265 @@
+import codecs
+import json
+import re
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
+from typing import Any, AsyncIterator, Callable, Iterator
+
+import httpx
+
+from suvvyapi.models.history import ChatHistoryMetadata, HistoryMessage
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# parser states
+_START, _KEY, _COLON, _VALUE, _AFTER_VALUE = range(5)
+_ITEMS_START, _ITEM, _AFTER_ITEM, _DONE = range(5, 9)
+
+
+class HistoryParser(object):
+    """Incremental parser of a ChatHistory JSON body.
+
+    Feed it decoded text chunks; it returns raw items of the "history"
+    array as soon as they are complete, and collects all other top-level
+    keys into `metadata`. Only the unparsed tail of the body is buffered,
+    so memory is bounded by the chunk size plus one message."""
+
+    def __init__(self, array_key: str = "history"):
+        self.array_key = array_key
+        self.metadata: dict[str, Any] = {}
+
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        self._key = ""
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> list[Any]:
+        """Consume a chunk and return history items completed by it"""
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+
+        items: list[Any] = []
+        while self._step(items):
+            pass
+        return items
+
+    def close(self) -> None:
+        """Check that the whole body was consumed"""
+        self._skip_whitespace()
+        if self._state != _DONE or self._pos != len(self._buffer):
+            raise ValueError("History body ended unexpectedly")
+
+    def _skip_whitespace(self) -> None:
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()  # type: ignore
+
+    def _expect(self, chars: str) -> str | None:
+        """Consume one of `chars`, or return None if the buffer is empty"""
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            return None
+        char = self._buffer[self._pos]
+        if char not in chars:
+            raise ValueError(
+                f"Unexpected {char!r} at {self._pos} of history body, expected {chars!r}"
+            )
+        self._pos += 1
+        return char
+
+    def _decode(self) -> tuple[bool, Any]:
+        """Decode a complete JSON value or report that more data is needed"""
+        self._skip_whitespace()
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        # a value touching the end of buffer (like a number) may continue
+        # in the next chunk, and the body never ends with a bare value
+        if end >= len(self._buffer):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _step(self, items: list[Any]) -> bool:
+        state = self._state
+
+        if state == _START:
+            if self._expect("{") is None:
+                return False
+            self._state = _KEY
+        elif state == _KEY:
+            self._skip_whitespace()
+            if self._buffer.startswith("}", self._pos):
+                self._pos += 1
+                self._state = _DONE
+                return True
+            complete, key = self._decode()
+            if not complete:
+                return False
+            if not isinstance(key, str):
+                raise ValueError("History body keys must be strings")
+            self._key = key
+            self._state = _COLON
+        elif state == _COLON:
+            if self._expect(":") is None:
+                return False
+            self._state = _ITEMS_START if self._key == self.array_key else _VALUE
+        elif state == _VALUE:
+            complete, value = self._decode()
+            if not complete:
+                return False
+            self.metadata[self._key] = value
+            self._state = _AFTER_VALUE
+        elif state == _AFTER_VALUE:
+            char = self._expect(",}")
+            if char is None:
+                return False
+            self._state = _KEY if char == "," else _DONE
+        elif state == _ITEMS_START:
+            if self._expect("[") is None:
+                return False
+            self._skip_whitespace()
+            self._state = _ITEM
+            if self._buffer.startswith("]", self._pos):
+                self._pos += 1
+                self._state = _AFTER_VALUE
+        elif state == _ITEM:
+            complete, item = self._decode()
+            if not complete:
+                return False
+            items.append(item)
+            self._state = _AFTER_ITEM
+        elif state == _AFTER_ITEM:
+            char = self._expect(",]")
+            if char is None:
+                return False
+            self._state = _ITEM if char == "," else _AFTER_VALUE
+        else:
+            return False
+        return True
+
+
+class _BaseHistoryStream(object):
+    def __init__(
+        self,
+        build_message: Callable[[dict[str, Any]], HistoryMessage],
+        build_metadata: Callable[[dict[str, Any]], ChatHistoryMetadata],
+    ):
+        self._build_message = build_message
+        self._build_metadata = build_metadata
+        self._parser = HistoryParser()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._metadata: ChatHistoryMetadata | None = None
+
+    @property
+    def metadata(self) -> ChatHistoryMetadata | None:
+        """History metadata. None until all messages are read"""
+        return self._metadata
+
+    def _feed(self, chunk: bytes) -> list[HistoryMessage]:
+        return [
+            self._build_message(item)
+            for item in self._parser.feed(self._text.decode(chunk))
+        ]
+
+    def _finish(self) -> list[HistoryMessage]:
+        messages = [
+            self._build_message(item)
+            for item in self._parser.feed(self._text.decode(b"", final=True))
+        ]
+        self._parser.close()
+        self._metadata = self._build_metadata(self._parser.metadata)
+        return messages
+
+
+class HistoryStream(_BaseHistoryStream):
+    """Iterator over messages of a history, parsed while the body is
+    downloaded. Use as a context manager to make sure the connection
+    is released if iteration stops early."""
+
+    def __init__(
+        self,
+        open_response: Callable[[], AbstractContextManager[httpx.Response]],
+        build_message: Callable[[dict[str, Any]], HistoryMessage],
+        build_metadata: Callable[[dict[str, Any]], ChatHistoryMetadata],
+        chunk_size: int = 65536,
+    ):
+        super().__init__(build_message, build_metadata)
+        self._open_response = open_response
+        self._chunk_size = chunk_size
+        self._context: AbstractContextManager[httpx.Response] | None = None
+        self._response: httpx.Response | None = None
+
+    def __enter__(self) -> "HistoryStream":
+        if self._context is not None:
+            raise RuntimeError("History stream is already opened")
+        self._context = self._open_response()
+        self._response = self._context.__enter__()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        context, self._context, self._response = self._context, None, None
+        if context is not None:
+            context.__exit__(*exc_info)
+
+    def __iter__(self) -> Iterator[HistoryMessage]:
+        owns_response = self._context is None
+        if owns_response:
+            self.__enter__()
+        try:
+            for chunk in self._response.iter_bytes(self._chunk_size):  # type: ignore
+                yield from self._feed(chunk)
+            yield from self._finish()
+        finally:
+            if owns_response:
+                self.__exit__(None, None, None)
+
+
+class AsyncHistoryStream(_BaseHistoryStream):
+    """Async iterator over messages of a history, parsed while the body is
+    downloaded. Use as an async context manager to make sure the
+    connection is released if iteration stops early."""
+
+    def __init__(
+        self,
+        open_response: Callable[[], AbstractAsyncContextManager[httpx.Response]],
+        build_message: Callable[[dict[str, Any]], HistoryMessage],
+        build_metadata: Callable[[dict[str, Any]], ChatHistoryMetadata],
+        chunk_size: int = 65536,
+    ):
+        super().__init__(build_message, build_metadata)
+        self._open_response = open_response
+        self._chunk_size = chunk_size
+        self._context: AbstractAsyncContextManager[httpx.Response] | None = None
+        self._response: httpx.Response | None = None
+
+    async def __aenter__(self) -> "AsyncHistoryStream":
+        if self._context is not None:
+            raise RuntimeError("History stream is already opened")
+        self._context = self._open_response()
+        self._response = await self._context.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        context, self._context, self._response = self._context, None, None
+        if context is not None:
+            await context.__aexit__(*exc_info)
+
+    async def __aiter__(self) -> AsyncIterator[HistoryMessage]:
+        owns_response = self._context is None
+        if owns_response:
+            await self.__aenter__()
+        try:
+            async for chunk in self._response.aiter_bytes(  # type: ignore
+                self._chunk_size
+            ):
+                for message in self._feed(chunk):
+                    yield message
+            for message in self._finish():
+                yield message
+        finally:
+            if owns_response:
+                await self.__aexit__(None, None, None)
@@ -15,6 +15,7 @@ from suvvyapi.exceptions.api import (
 )
 from suvvyapi.models.history import ChatHistory, Message
 from suvvyapi.models.responses import Prediction
+from suvvyapi.timeouts import OperationTimeouts, bounded
 
 
 class SuvvyAPIWrapper:
@@ -30,11 +31,13 @@ class SuvvyAPIWrapper:
         check_connection: bool = True,
         placeholders: dict | None = None,
         custom_log_info: dict | None = None,
+        timeouts: OperationTimeouts | None = None,
     ):
         self.token = token
         self.base_url = base_url.lstrip("/")
         self.placeholders = placeholders or {}
         self.custom_log_info = custom_log_info or {}
+        self.timeouts = timeouts or OperationTimeouts()
 
         if check_connection:
             self._make_request("GET", "/api/check")
@@ -46,7 +49,10 @@ class SuvvyAPIWrapper:
         body: dict | None = None,
     ) -> httpx.Response:
         headers = {"Authorization": f"bearer {self.token}"}
-        with httpx.Client(headers=headers, base_url=self.base_url, timeout=300) as c:
+        timeout = bounded(self.timeouts.for_request(method, path))
+        with httpx.Client(
+            headers=headers, base_url=self.base_url, timeout=timeout
+        ) as c:
             response = c.request(method=method, url=path, json=body)
             if response.status_code == 401:
                 raise InvalidAPITokenError("API Token is invalid.")
@@ -0,0 +1,108 @@
+import contextlib
+import contextvars
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator
+
+import httpx
+
+from suvvyapi.exceptions.api import DeadlineExceededError
+
+# monotonic time the current operation must finish by
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "suvvyapi_deadline", default=None
+)
+
+
+def _timeout(total: float, connect: float = 5.0) -> httpx.Timeout:
+    return httpx.Timeout(total, connect=connect)
+
+
+@dataclass(frozen=True)
+class OperationTimeouts:
+    """httpx timeouts (connect/read/write/pool) of every kind of request"""
+
+    check: httpx.Timeout = field(default_factory=lambda: _timeout(10.0))
+    history_read: httpx.Timeout = field(default_factory=lambda: _timeout(30.0))
+    message_write: httpx.Timeout = field(default_factory=lambda: _timeout(30.0))
+    predict: httpx.Timeout = field(default_factory=lambda: _timeout(300.0))
+
+    def for_request(self, method: str, path: str) -> httpx.Timeout:
+        path = path.partition("?")[0]
+        if path == "/api/check":
+            return self.check
+        if path.endswith("/predict"):
+            return self.predict
+        if method.upper() == "GET":
+            return self.history_read
+        return self.message_write
+
+
+@contextlib.contextmanager
+def deadline(
+    timeout: float | None = None, at: float | datetime | None = None
+) -> Iterator[None]:
+    """Bound the total time of all requests made inside the block,
+    including retries, backoff and waits for a free connection.
+
+    `timeout` is relative, in seconds; `at` is absolute, a POSIX timestamp
+    or an aware datetime. Nested deadlines can only make it earlier.
+    The deadline follows the context into tasks created inside the block"""
+    candidates = []
+    if timeout is not None:
+        candidates.append(time.monotonic() + timeout)
+    if at is not None:
+        if isinstance(at, datetime):
+            at = at.timestamp()
+        candidates.append(time.monotonic() + at - time.time())
+    current = _deadline.get()
+    if current is not None:
+        candidates.append(current)
+
+    token = _deadline.set(min(candidates) if candidates else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left until the current deadline, None if there is none"""
+    current = _deadline.get()
+    if current is None:
+        return None
+    return current - time.monotonic()
+
+
+def check_deadline() -> float | None:
+    """Seconds left until the current deadline.
+    Raises DeadlineExceededError if it has passed"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("Deadline exceeded")
+    return left
+
+
+def fits_deadline(delay: float) -> bool:
+    """Whether waiting `delay` seconds leaves time before the deadline"""
+    left = remaining()
+    return left is None or delay < left
+
+
+def bounded(timeout: httpx.Timeout) -> httpx.Timeout:
+    """Shrink timeout so that no phase of a request outlives the deadline"""
+    left = check_deadline()
+    if left is None:
+        return timeout
+    limit = left
+
+    def clip(value: float | None) -> float:
+        return limit if value is None else min(value, limit)
+
+    return httpx.Timeout(
+        connect=clip(timeout.connect),
+        read=clip(timeout.read),
+        write=clip(timeout.write),
+        pool=clip(timeout.pool),
+    )
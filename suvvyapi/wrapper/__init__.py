@@ -1,8 +1,44 @@
-from typing import Type
+import asyncio
+import contextlib
+import inspect
+import threading
+import time
+from functools import partial
+from types import TracebackType
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Type,
+    TypeVar,
+    cast,
+    overload,
+)
 
 import httpx
+import pydantic_core
 
 from suvvyapi import ChatHistory, Message, Prediction
+from suvvyapi._parsing import ResponseParser
+from suvvyapi._singleflight import AsyncSingleFlight, SingleFlight
+from suvvyapi.adaptive import AdaptiveLimiter
+from suvvyapi.background import detach
+from suvvyapi.balancing import BalancingPolicy, Endpoint, LoadBalancer, direct
+from suvvyapi.batch import (
+    BatchResult,
+    PredictJob,
+    PredictMessageJob,
+    aiter_completed,
+    iter_completed,
+    unpack_predict_job,
+    unpack_predict_message_job,
+)
+from suvvyapi.cache import HistoryCache
+from suvvyapi.circuit import PROBE_PATH, CircuitBreaker
+from suvvyapi.coalescing import MessageCoalescer
 from suvvyapi.exceptions.api import (
     InvalidAPITokenError,
     NegativeBalanceError,
@@ -10,7 +46,39 @@ from suvvyapi.exceptions.api import (
     InternalAPIError,
     HistoryNotFoundError,
     InternalMessageAdded,
+    RateLimitExceededError,
+    ServiceUnavailableError,
+    UnknownAPIError,
+    SuvvyAPIError,
+    CircuitOpenError,
+    DeadlineExceededError,
 )
+from suvvyapi.hedging import Hedger, HedgingPolicy
+from suvvyapi.idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyStore,
+    new_idempotency_key,
+)
+from suvvyapi.keepalive import AsyncHeartbeat, Heartbeat, Warmer
+from suvvyapi.models.lazy import LazyChatHistory
+from suvvyapi.pool import ConnectionPool
+from suvvyapi.ratelimit import RateLimiter, Slots
+from suvvyapi.retry import RetryPolicy, RetryState
+from suvvyapi.streaming import AsyncHistoryStream, HistoryStream
+from suvvyapi.timeouts import OperationTimeouts, bounded, check_deadline, remaining
+
+T = TypeVar("T")
+
+
+def _json_content(body_json: dict | None, headers: dict | None = None) -> dict:
+    """Serialize request body straight to bytes. Models inside the body
+    are dumped by pydantic-core without building intermediate dicts"""
+    if body_json is None:
+        return {"headers": headers} if headers else {}
+    return {
+        "content": pydantic_core.to_json(body_json),
+        "headers": {"Content-Type": "application/json", **(headers or {})},
+    }
 
 
 def _handle_error(response: httpx.Response) -> None:
@@ -23,27 +91,215 @@ def _handle_error(response: httpx.Response) -> None:
         406: InternalMessageAdded,
         413: HistoryTooLongError,
         404: HistoryNotFoundError,
+        429: RateLimitExceededError,
         500: InternalAPIError,
+        502: ServiceUnavailableError,
+        503: ServiceUnavailableError,
+        504: ServiceUnavailableError,
     }
-    exception: Type[BaseException] = exceptions[response.status_code]  # type: ignore
-    raise exception(response.json().get("detail", None))
+    exception: Callable[[str], BaseException] = exceptions.get(  # type: ignore
+        response.status_code, UnknownAPIError
+    )
+
+    detail = None
+    try:
+        data = response.json()
+    except ValueError:
+        # proxies answer with HTML or plain text
+        data = None
+    if isinstance(data, dict):
+        detail = data.get("detail", None)
+    if detail is None:
+        detail = f"{response.status_code} {response.reason_phrase}".strip()
+    raise exception(detail)
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    """Whether the response tells that the endpoint is in trouble"""
+    return response.status_code >= 500 or response.status_code == 429
+
+
+def _own(result: T) -> T:
+    """Copy a shared history, so that changing it doesn't affect other callers"""
+    if isinstance(result, (ChatHistory, LazyChatHistory)):
+        copied = result.model_copy(update={"history": result.history.copy()})
+        return cast(T, copied)
+    return result
 
 
 class Suvvy(object):
     def __init__(
         self,
         api_token: str,
-        api_url: str = "https://api.suvvy.ai",
+        api_url: str | list[str] = "https://api.suvvy.ai",
         placeholders: dict | None = None,
         custom_log_info: dict | None = None,
         source: str | None = None,
+        max_connections: int | None = 100,
+        max_keepalive_connections: int | None = 20,
+        keepalive_expiry: float | None = 5.0,
+        coalesce_window: float | None = None,
+        coalesce_max_batch: int = 20,
+        history_cache: HistoryCache | None = None,
+        deduplicate_reads: bool = True,
+        validate_responses: bool = True,
+        retry: RetryPolicy | None = RetryPolicy(),
+        idempotency_ttl: float | None = 300.0,
+        circuit_breaker: CircuitBreaker | None = None,
+        timeouts: OperationTimeouts | None = None,
+        rate_limiter: RateLimiter | None = None,
+        adaptive_limiter: AdaptiveLimiter | None = None,
+        hedging: HedgingPolicy | None = None,
+        http2: bool = False,
+        max_concurrent_streams: int | None = 100,
+        keepalive_interval: float | None = None,
+        pool: ConnectionPool | None = None,
+        tenant: str = "default",
+        balancing: BalancingPolicy | None = None,
+        background_loop: bool = False,
     ):
         self.placeholders = placeholders or {}
         self.custom_log_info = custom_log_info or {}
         self.source = source or "https://github.com/suvvyai/suvvyapi"
 
+        # sent with every request, so that clients can be shared
         self._headers = {"Authorization": f"Bearer {api_token}"}
-        self._api_url = api_url.rstrip("/ \\\n")
+        self.tenant = tenant
+
+        self._owns_pool = pool is None
+        if pool is None:
+            pool = ConnectionPool(
+                api_url,
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+                http2=http2,
+                max_concurrent_streams=max_concurrent_streams,
+                timeout=(timeouts or OperationTimeouts()).predict,
+                balancing=balancing,
+                background_loop=background_loop,
+            )
+        else:
+            # these are options of the pool, they'd be silently lost
+            given = {
+                "api_url": api_url,
+                "max_connections": max_connections,
+                "max_keepalive_connections": max_keepalive_connections,
+                "keepalive_expiry": keepalive_expiry,
+                "http2": http2,
+                "max_concurrent_streams": max_concurrent_streams,
+                "balancing": balancing,
+                "background_loop": background_loop,
+            }
+            defaults = inspect.signature(Suvvy).parameters
+            ignored = [k for k, v in given.items() if v != defaults[k].default]
+            if ignored:
+                raise ValueError(
+                    f"{', '.join(ignored)} can't be set together with pool, "
+                    "set them on the ConnectionPool"
+                )
+        self.pool = pool
+
+        expiry = pool.limits.keepalive_expiry
+        if keepalive_interval is not None and expiry is not None:
+            if keepalive_interval >= expiry:
+                raise ValueError("keepalive_interval must be below keepalive_expiry")
+        self.keepalive_interval = keepalive_interval
+        self._heartbeat: Heartbeat | None = None
+        self._heartbeat_lock = threading.Lock()
+        self._warmer: Warmer | None = None
+        self._async_heartbeat: AsyncHeartbeat | None = None
+        # connection checks of ejected urls, running apart from requests
+        self._probes: set[asyncio.Future] = set()
+
+        self.history_cache = history_cache
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.timeouts = timeouts or OperationTimeouts()
+        self.rate_limiter = rate_limiter
+        self.adaptive_limiter = adaptive_limiter
+        self._hedger = Hedger(hedging) if hedging is not None else None
+        self._parser = ResponseParser(validate=validate_responses)
+
+        self._reads: SingleFlight | None = None
+        self._async_reads: AsyncSingleFlight | None = None
+        if deduplicate_reads:
+            self._reads = SingleFlight()
+            self._async_reads = AsyncSingleFlight()
+
+        # results of predictions by caller-provided idempotency keys
+        self._completed: IdempotencyStore | None = None
+        if idempotency_ttl is not None:
+            self._completed = IdempotencyStore(ttl=idempotency_ttl)
+        self._keyed = SingleFlight()
+        self._async_keyed = AsyncSingleFlight()
+
+        self._coalescer: MessageCoalescer | None = None
+        if coalesce_window is not None:
+            self._coalescer = MessageCoalescer(
+                self._add_messages,
+                self._async_add_messages,
+                window=coalesce_window,
+                max_batch=coalesce_max_batch,
+            )
+
+    def __enter__(self) -> "Suvvy":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "Suvvy":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    def _get_client(self) -> httpx.Client:
+        return self.pool.client()
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        return self.pool.async_client()
+
+    def close(self) -> None:
+        """Close pooled sync connections. A pool passed to
+        the constructor is left open for other instances"""
+        if self._hedger is not None:
+            self._hedger.close()
+        with self._heartbeat_lock:
+            heartbeat, self._heartbeat = self._heartbeat, None
+        if heartbeat is not None:
+            heartbeat.stop()
+        with self._heartbeat_lock:
+            warmer, self._warmer = self._warmer, None
+        if warmer is not None:
+            warmer.close()
+        if self._owns_pool:
+            self.pool.close()
+
+    async def aclose(self) -> None:
+        """Close pooled async and sync connections. A pool passed to
+        the constructor is left open for other instances"""
+        heartbeat, self._async_heartbeat = self._async_heartbeat, None
+        if heartbeat is not None:
+            await heartbeat.stop()
+        loop = asyncio.get_running_loop()
+        for probe in list(self._probes):
+            if probe.get_loop() is loop:
+                probe.cancel()
+        if self._owns_pool:
+            await self.pool.aclose()
+        self.close()
 
     def _get_placeholders(self, placeholders: dict | None = None) -> dict:
         placeholders = placeholders or {}
@@ -53,19 +309,422 @@ class Suvvy(object):
         custom_log_info = custom_log_info or {}
         return {**self.custom_log_info, **custom_log_info}
 
+    def _cache_history(
+        self, history: ChatHistory, since: int | None = None
+    ) -> ChatHistory:
+        """Cache history written or, with `since`, read from API"""
+        if self.history_cache is not None:
+            self.history_cache.put(history, since)
+        return history
+
+    def _cache_generation(self) -> int | None:
+        if self.history_cache is None:
+            return None
+        return self.history_cache.generation()
+
+    def _cache_prediction(
+        self,
+        unique_id: str,
+        prediction: Prediction | None,
+        sent: list[Message] | None = None,
+    ) -> Prediction | None:
+        """Append new messages to cached history. If it's not clear
+        whether the sent messages are among them, drop the history instead"""
+        if self.history_cache is None:
+            return prediction
+
+        if sent:
+            received = prediction.new_messages[: len(sent)] if prediction else []
+            if [m.text for m in received] != [m.text for m in sent]:
+                self.history_cache.invalidate(unique_id)
+                return prediction
+
+        if prediction is not None:
+            self.history_cache.append(unique_id, prediction.new_messages)
+        return prediction
+
+    def _start_retry(
+        self, request: httpx.Request, path: str, idempotent: bool | None
+    ) -> RetryState | None:
+        if self.retry is None:
+            return None
+        return self.retry.start(
+            request.method,
+            path,
+            idempotent,
+            keyed=IDEMPOTENCY_HEADER in request.headers,
+        )
+
+    def _record(
+        self,
+        path: str,
+        failed: bool,
+        started: float,
+        endpoint: Endpoint | None = None,
+    ) -> None:
+        """Report outcome of a request to the pool, the breaker
+        and the adaptive limiter"""
+        latency = time.monotonic() - started
+        self.pool.record(self.tenant, failed, latency)
+        if self.pool.balancer is not None and endpoint is not None:
+            self.pool.balancer.finished(endpoint, failed, latency)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(path, failed, latency)
+        adaptive = self._adaptive(path)
+        if adaptive is not None:
+            adaptive.observe(latency, failed)
+
+    def _pool_slots(self) -> list[Slots]:
+        """Limits of the shared pool: this tenant's share, then streams"""
+        tenant = self.pool.tenant_slots(self.tenant)
+        return [s for s in (tenant, self.pool.streams) if s is not None]
+
+    def _probe_url(self) -> str:
+        balancer = self.pool.balancer
+        if balancer is None:
+            return PROBE_PATH
+        return balancer.pick().url + PROBE_PATH
+
+    def _probe(self, balancer: LoadBalancer, endpoint: Endpoint) -> None:
+        """Check an ejected url apart from the request that found it due"""
+        try:
+            _handle_error(
+                self._get_client().get(
+                    endpoint.url + PROBE_PATH,
+                    headers=self._headers,
+                    timeout=self.timeouts.check,
+                )
+            )
+        except (Exception, SuvvyAPIError):
+            balancer.probe_failed(endpoint)
+        except BaseException:
+            balancer.probe_abandoned(endpoint)
+            raise
+        else:
+            balancer.probe_succeeded(endpoint)
+
+    async def _aprobe(self, balancer: LoadBalancer, endpoint: Endpoint) -> None:
+        """Check an ejected url apart from the request that found it due"""
+        try:
+            _handle_error(
+                await self._get_async_client().get(
+                    endpoint.url + PROBE_PATH,
+                    headers=self._headers,
+                    timeout=self.timeouts.check,
+                )
+            )
+        except (Exception, SuvvyAPIError):
+            balancer.probe_failed(endpoint)
+        except BaseException:
+            balancer.probe_abandoned(endpoint)
+            raise
+        else:
+            balancer.probe_succeeded(endpoint)
+
+    def _route(
+        self, request: httpx.Request, path: str, previous: Endpoint | None
+    ) -> Endpoint | None:
+        """Point the request at an API url, starting checks of ejected urls
+        that are due. A retry goes to another url when there is one"""
+        balancer = self.pool.balancer
+        if balancer is None:
+            return None
+        for endpoint in balancer.take_probes():
+            threading.Thread(
+                target=self._probe,
+                args=(balancer, endpoint),
+                name="suvvyapi-probe",
+                daemon=True,
+            ).start()
+        endpoint = balancer.pick(exclude=previous)
+        direct(request, endpoint, path)
+        return endpoint
+
+    async def _aroute(
+        self, request: httpx.Request, path: str, previous: Endpoint | None
+    ) -> Endpoint | None:
+        """Point the request at an API url, starting checks of ejected urls
+        that are due. A retry goes to another url when there is one"""
+        balancer = self.pool.balancer
+        if balancer is None:
+            return None
+        for endpoint in balancer.take_probes():
+            probe = asyncio.ensure_future(self._aprobe(balancer, endpoint))
+            self._probes.add(probe)
+            probe.add_done_callback(self._probes.discard)
+        endpoint = balancer.pick(exclude=previous)
+        direct(request, endpoint, path)
+        return endpoint
+
+    def _guard(self, path: str) -> None:
+        """Fail fast if the circuit of the path is open,
+        probing the API when it is time to close it"""
+        breaker = self.circuit_breaker
+        if breaker is None or not breaker.before_call(path):
+            return
+        try:
+            _handle_error(
+                self._get_client().get(
+                    self._probe_url(),
+                    headers=self._headers,
+                    timeout=bounded(self.timeouts.check),
+                )
+            )
+        except (Exception, SuvvyAPIError) as e:
+            breaker.probe_failed(path)
+            raise CircuitOpenError(path, breaker.open_duration) from e
+        except BaseException:
+            # cancelled or interrupted, the probe must not stay in flight
+            breaker.probe_abandoned(path)
+            raise
+        breaker.probe_succeeded(path)
+
+    async def _aguard(self, path: str) -> None:
+        """Fail fast if the circuit of the path is open,
+        probing the API when it is time to close it"""
+        breaker = self.circuit_breaker
+        if breaker is None or not breaker.before_call(path):
+            return
+        try:
+            _handle_error(
+                await self._get_async_client().get(
+                    self._probe_url(),
+                    headers=self._headers,
+                    timeout=bounded(self.timeouts.check),
+                )
+            )
+        except (Exception, SuvvyAPIError) as e:
+            breaker.probe_failed(path)
+            raise CircuitOpenError(path, breaker.open_duration) from e
+        except BaseException:
+            # cancelled or interrupted, the probe must not stay in flight
+            breaker.probe_abandoned(path)
+            raise
+        breaker.probe_succeeded(path)
+
+    def _adaptive(self, path: str) -> AdaptiveLimiter | None:
+        adaptive = self.adaptive_limiter
+        if adaptive is None or not adaptive.applies_to(path):
+            return None
+        return adaptive
+
+    @contextlib.contextmanager
+    def _hold_limits(self, path: str) -> Iterator[None]:
+        """Hold rate limits and concurrency limits of path"""
+        limiter = self.rate_limiter
+        adaptive = self._adaptive(path)
+        with contextlib.ExitStack() as stack:
+            if limiter is not None:
+                limiter.acquire(path)
+                stack.callback(limiter.release, path)
+            if adaptive is not None:
+                adaptive.acquire()
+                stack.callback(adaptive.release)
+            for slots in self._pool_slots():
+                if not slots.acquire(remaining()):
+                    raise DeadlineExceededError(
+                        "Deadline exceeded waiting for a request slot"
+                    )
+                stack.callback(slots.release)
+            self.pool.started(self.tenant)
+            stack.callback(self.pool.finished, self.tenant)
+            yield
+
+    @contextlib.asynccontextmanager
+    async def _ahold_limits(self, path: str) -> AsyncIterator[None]:
+        """Hold rate limits and concurrency limits of path"""
+        limiter = self.rate_limiter
+        adaptive = self._adaptive(path)
+        with contextlib.ExitStack() as stack:
+            if limiter is not None:
+                await limiter.aacquire(path)
+                stack.callback(limiter.release, path)
+            if adaptive is not None:
+                await adaptive.aacquire()
+                stack.callback(adaptive.release)
+            for slots in self._pool_slots():
+                try:
+                    await asyncio.wait_for(slots.aacquire(), remaining())
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError(
+                        "Deadline exceeded waiting for a request slot"
+                    ) from None
+                stack.callback(slots.release)
+            self.pool.started(self.tenant)
+            stack.callback(self.pool.finished, self.tenant)
+            yield
+
+    def _attempt(
+        self,
+        client: httpx.Client,
+        request: httpx.Request,
+        path: str,
+        timeout: httpx.Timeout,
+        stream: bool,
+        endpoint: Endpoint | None = None,
+    ) -> httpx.Response:
+        """Send request once, under the circuit breaker and limits"""
+        self._guard(path)
+        with self._hold_limits(path):
+            request.extensions["timeout"] = bounded(timeout).as_dict()
+            if self.pool.balancer is not None and endpoint is not None:
+                self.pool.balancer.started(endpoint)
+            started = time.monotonic()
+            try:
+                r = client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                self._record(path, True, started, endpoint)
+                if isinstance(e, httpx.TimeoutException):
+                    check_deadline()
+                raise
+            self._record(path, _is_failure(r), started, endpoint)
+            return r
+
+    async def _aattempt(
+        self,
+        client: httpx.AsyncClient,
+        request: httpx.Request,
+        path: str,
+        timeout: httpx.Timeout,
+        stream: bool,
+        endpoint: Endpoint | None = None,
+    ) -> httpx.Response:
+        """Send request once, under the circuit breaker and limits"""
+        await self._aguard(path)
+        async with self._ahold_limits(path):
+            request.extensions["timeout"] = bounded(timeout).as_dict()
+            if self.pool.balancer is not None and endpoint is not None:
+                self.pool.balancer.started(endpoint)
+            started = time.monotonic()
+            try:
+                r = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                self._record(path, True, started, endpoint)
+                if isinstance(e, httpx.TimeoutException):
+                    check_deadline()
+                raise
+            self._record(path, _is_failure(r), started, endpoint)
+            return r
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        body_json: dict | None = None,
+        params: dict | None = None,
+        stream: bool = False,
+        idempotent: bool | None = None,
+        headers: dict | None = None,
+    ) -> httpx.Response:
+        """Send request, repeating it according to the retry policy.
+        Error responses are raised as exceptions"""
+        loop = self.pool.loop_thread()
+        if loop is not None:
+            r = loop.run(
+                self._asend(
+                    method, path, body_json, params, stream, idempotent, headers
+                )
+            )
+            return detach(r, loop, sync=True) if stream else r
+
+        client = self._get_client()
+        request = client.build_request(
+            method,
+            path,
+            params=params,
+            **_json_content(body_json, {**self._headers, **(headers or {})}),
+        )
+        retry = self._start_retry(request, path, idempotent)
+        timeout = self.timeouts.for_request(method, path)
+        endpoint: Endpoint | None = None
+        while True:
+            endpoint = self._route(request, path, endpoint)
+            try:
+                r = self._attempt(client, request, path, timeout, stream, endpoint)
+            except httpx.TransportError as e:
+                delay = retry.after_error(e) if retry is not None else None
+                if delay is None:
+                    raise
+            else:
+                if r.status_code <= 299:
+                    return r
+                try:
+                    r.read()
+                finally:
+                    r.close()
+                delay = retry.after_response(r) if retry is not None else None
+                if delay is None:
+                    _handle_error(r)
+            time.sleep(delay)  # type: ignore
+
+    async def _asend(
+        self,
+        method: str,
+        path: str,
+        body_json: dict | None = None,
+        params: dict | None = None,
+        stream: bool = False,
+        idempotent: bool | None = None,
+        headers: dict | None = None,
+    ) -> httpx.Response:
+        """Send request, repeating it according to the retry policy.
+        Error responses are raised as exceptions"""
+        loop = self.pool.loop_thread()
+        if loop is not None and not loop.is_current():
+            r = await loop.forward(
+                self._asend(
+                    method, path, body_json, params, stream, idempotent, headers
+                )
+            )
+            return detach(r, loop, sync=False) if stream else r
+
+        client = self._get_async_client()
+        request = client.build_request(
+            method,
+            path,
+            params=params,
+            **_json_content(body_json, {**self._headers, **(headers or {})}),
+        )
+        retry = self._start_retry(request, path, idempotent)
+        timeout = self.timeouts.for_request(method, path)
+        endpoint: Endpoint | None = None
+        while True:
+            endpoint = await self._aroute(request, path, endpoint)
+            try:
+                r = await self._aattempt(
+                    client, request, path, timeout, stream, endpoint
+                )
+            except httpx.TransportError as e:
+                delay = retry.after_error(e) if retry is not None else None
+                if delay is None:
+                    raise
+            else:
+                if r.status_code <= 299:
+                    return r
+                try:
+                    await r.aread()
+                finally:
+                    await r.aclose()
+                delay = retry.after_response(r) if retry is not None else None
+                if delay is None:
+                    _handle_error(r)
+            await asyncio.sleep(delay)  # type: ignore
+
     def _sync_request(
         self,
         method: str,
         path: str,
         body_json: dict | None = None,
         params: dict | None = None,
+        idempotent: bool | None = None,
+        headers: dict | None = None,
     ) -> httpx.Response:
-        with httpx.Client(
-            headers=self._headers, base_url=self._api_url, timeout=300
-        ) as client:
-            r = client.request(method, path, json=body_json, params=params)
-            _handle_error(r)
-            return r
+        try:
+            return self._send(
+                method, path, body_json, params, idempotent=idempotent, headers=headers
+            )
+        finally:
+            self._written(method, params)
 
     async def _async_request(
         self,
@@ -73,87 +732,399 @@ class Suvvy(object):
         path: str,
         body_json: dict | None = None,
         params: dict | None = None,
+        idempotent: bool | None = None,
+        headers: dict | None = None,
     ) -> httpx.Response:
-        async with httpx.AsyncClient(
-            headers=self._headers, base_url=self._api_url, timeout=300
-        ) as client:
-            r = await client.request(method, path, json=body_json, params=params)
-            _handle_error(r)
-            return r
+        try:
+            return await self._asend(
+                method, path, body_json, params, idempotent=idempotent, headers=headers
+            )
+        finally:
+            self._written(method, params)
 
-    def check_connection(self) -> bool:
-        """Check connection and API token"""
+    def _written(self, method: str, params: dict | None) -> None:
+        """After a change of history, reads of it must not join
+        requests sent before the change"""
+        if method == "GET" or not params or "unique_id" not in params:
+            return
+        for key in (
+            ("history", params["unique_id"]),
+            ("lazy_history", params["unique_id"]),
+        ):
+            if self._reads is not None:
+                self._reads.forget(key)
+            if self._async_reads is not None:
+                self._async_reads.forget(key)
+
+    def _read(self, key: tuple, fn: Callable[[], T]) -> T:
+        """Share one request between concurrent identical reads,
+        hedging it if enabled. Every caller gets a history of its own"""
+        if self._hedger is not None:
+            fn = partial(self._hedger.run, key[0], fn)
+        if self._reads is None:
+            return fn()
+        return _own(self._reads.do(key, fn))
+
+    async def _aread(self, key: tuple, fn: Callable[[], Awaitable[T]]) -> T:
+        """Share one request between concurrent identical reads,
+        hedging it if enabled. Every caller gets a history of its own"""
+        if self._hedger is not None:
+            fn = partial(self._hedger.arun, key[0], fn)
+        if self._async_reads is None:
+            return await fn()
+        return _own(await self._async_reads.do(key, fn))
+
+    def _check_connection(self) -> bool:
         self._sync_request("GET", "/api/check")
         return True
 
-    async def acheck_connection(self) -> bool:
-        """Check connection and API token"""
+    async def _acheck_connection(self) -> bool:
         await self._async_request("GET", "/api/check")
         return True
 
-    def get_history(self, unique_id: str) -> ChatHistory:
-        """Get history by unique_id"""
+    @contextlib.contextmanager
+    def _sync_stream(
+        self, method: str, path: str, params: dict | None = None
+    ) -> Iterator[httpx.Response]:
+        """Like _sync_request, but the body is left to be streamed"""
+        r = self._send(method, path, params=params, stream=True)
+        try:
+            yield r
+        finally:
+            r.close()
+
+    @contextlib.asynccontextmanager
+    async def _async_stream(
+        self, method: str, path: str, params: dict | None = None
+    ) -> AsyncIterator[httpx.Response]:
+        """Like _async_request, but the body is left to be streamed"""
+        r = await self._asend(method, path, params=params, stream=True)
+        try:
+            yield r
+        finally:
+            await r.aclose()
+
+    def _warm_connections(self, connections: int) -> int:
+        """Number of connections to warm up, as many as the pool keeps"""
+        if connections < 1:
+            raise ValueError("connections must be at least 1")
+        for limit in (
+            self.pool.limits.max_connections,
+            self.pool.limits.max_keepalive_connections,
+        ):
+            if limit is not None:
+                connections = min(connections, limit)
+        return connections
+
+    def _warm(self, connections: int) -> None:
+        """Check connection over `connections` connections at once.
+        Goes past read deduplication and hedging, which would share one"""
+        with self._heartbeat_lock:
+            warmer = self._warmer
+            if warmer is None or warmer.connections != connections:
+                if warmer is not None:
+                    warmer.close()
+                warmer = self._warmer = Warmer(self._check_connection, connections)
+        warmer.run()
+
+    async def _awarm(self, connections: int) -> None:
+        await asyncio.gather(*(self._acheck_connection() for _ in range(connections)))
+
+    def warmup(self, connections: int = 1) -> None:
+        """Open pooled connections ahead of traffic, paying DNS, TCP and TLS
+        setup before the first real request. With keepalive_interval, they
+        are pinged in the background until the client is closed"""
+        connections = self._warm_connections(connections)
+        self._warm(connections)
+        if self.keepalive_interval is None:
+            return
+        with self._heartbeat_lock:
+            if self._heartbeat is None:
+                self._heartbeat = Heartbeat(
+                    self.keepalive_interval,
+                    partial(self._warm, connections),
+                    self.pool.idle_for,
+                )
+
+    async def awarmup(self, connections: int = 1) -> None:
+        """Open pooled connections ahead of traffic, paying DNS, TCP and TLS
+        setup before the first real request. With keepalive_interval, they
+        are pinged in the background until the client is closed"""
+        connections = self._warm_connections(connections)
+        await self._awarm(connections)
+        if self.keepalive_interval is None:
+            return
+        heartbeat = self._async_heartbeat
+        if heartbeat is not None and heartbeat.running:
+            if heartbeat.loop is asyncio.get_running_loop():
+                return
+            await heartbeat.stop()
+        self._async_heartbeat = AsyncHeartbeat(
+            self.keepalive_interval,
+            partial(self._awarm, connections),
+            self.pool.idle_for,
+        )
+
+    def check_connection(self) -> bool:
+        """Check connection and API token"""
+        return self._read(("check",), self._check_connection)
+
+    async def acheck_connection(self) -> bool:
+        """Check connection and API token"""
+        return await self._aread(("check",), self._acheck_connection)
+
+    def _get_history(self, unique_id: str) -> ChatHistory:
+        since = self._cache_generation()
         r = self._sync_request(
             "GET", "/api/v1/history", params={"unique_id": unique_id}
         )
-        return ChatHistory(**r.json())
+        return self._cache_history(self._parser.history(r.content), since)
 
-    async def aget_history(self, unique_id: str) -> ChatHistory:
-        """Get history by unique_id"""
+    async def _aget_history(self, unique_id: str) -> ChatHistory:
+        since = self._cache_generation()
         r = await self._async_request(
             "GET", "/api/v1/history", params={"unique_id": unique_id}
         )
-        return ChatHistory(**r.json())
+        return self._cache_history(self._parser.history(r.content), since)
 
-    def reset_history(self, unique_id: str) -> ChatHistory:
-        """Reset history by unique_id and return deleted history"""
+    def _get_lazy_history(self, unique_id: str) -> LazyChatHistory:
         r = self._sync_request(
-            "PUT", "/api/v1/history", params={"unique_id": unique_id}
+            "GET", "/api/v1/history", params={"unique_id": unique_id}
+        )
+        return self._parser.lazy_history(r.content)
+
+    async def _aget_lazy_history(self, unique_id: str) -> LazyChatHistory:
+        r = await self._async_request(
+            "GET", "/api/v1/history", params={"unique_id": unique_id}
+        )
+        return self._parser.lazy_history(r.content)
+
+    @overload
+    def get_history(self, unique_id: str, lazy: Literal[False] = False) -> ChatHistory:
+        ...
+
+    @overload
+    def get_history(self, unique_id: str, lazy: Literal[True]) -> LazyChatHistory:
+        ...
+
+    def get_history(
+        self, unique_id: str, lazy: bool = False
+    ) -> ChatHistory | LazyChatHistory:
+        """Get history by unique_id.
+        A lazy history builds messages only when they are accessed
+        and bypasses the history cache"""
+        if lazy:
+            return self._read(
+                ("lazy_history", unique_id),
+                partial(self._get_lazy_history, unique_id),
+            )
+
+        if self.history_cache is not None:
+            cached = self.history_cache.get(unique_id)
+            if cached is not None:
+                return cached
+
+        return self._read(("history", unique_id), partial(self._get_history, unique_id))
+
+    @overload
+    async def aget_history(
+        self, unique_id: str, lazy: Literal[False] = False
+    ) -> ChatHistory:
+        ...
+
+    @overload
+    async def aget_history(
+        self, unique_id: str, lazy: Literal[True]
+    ) -> LazyChatHistory:
+        ...
+
+    async def aget_history(
+        self, unique_id: str, lazy: bool = False
+    ) -> ChatHistory | LazyChatHistory:
+        """Get history by unique_id.
+        A lazy history builds messages only when they are accessed
+        and bypasses the history cache"""
+        if lazy:
+            return await self._aread(
+                ("lazy_history", unique_id),
+                partial(self._aget_lazy_history, unique_id),
+            )
+
+        if self.history_cache is not None:
+            cached = self.history_cache.get(unique_id)
+            if cached is not None:
+                return cached
+
+        return await self._aread(
+            ("history", unique_id), partial(self._aget_history, unique_id)
+        )
+
+    def iter_history(self, unique_id: str, chunk_size: int = 65536) -> HistoryStream:
+        """Iterate over history messages by unique_id while they are
+        downloaded, without loading the whole history into memory.
+        History metadata is available in `metadata` after iteration"""
+        return HistoryStream(
+            partial(
+                self._sync_stream,
+                "GET",
+                "/api/v1/history",
+                params={"unique_id": unique_id},
+            ),
+            self._parser.message,
+            self._parser.metadata,
+            chunk_size=chunk_size,
+        )
+
+    def aiter_history(
+        self, unique_id: str, chunk_size: int = 65536
+    ) -> AsyncHistoryStream:
+        """Iterate over history messages by unique_id while they are
+        downloaded, without loading the whole history into memory.
+        History metadata is available in `metadata` after iteration"""
+        return AsyncHistoryStream(
+            partial(
+                self._async_stream,
+                "GET",
+                "/api/v1/history",
+                params={"unique_id": unique_id},
+            ),
+            self._parser.message,
+            self._parser.metadata,
+            chunk_size=chunk_size,
         )
+
+    def reset_history(self, unique_id: str) -> ChatHistory:
+        """Reset history by unique_id and return deleted history"""
+        if self.history_cache is not None:
+            self.history_cache.invalidate(unique_id)
+
+        try:
+            r = self._sync_request(
+                "PUT", "/api/v1/history", params={"unique_id": unique_id}
+            )
+        finally:
+            # reads sent meanwhile may have cached the history before reset
+            if self.history_cache is not None:
+                self.history_cache.invalidate(unique_id)
         if r.status_code == 202:
             raise HistoryNotFoundError
-        return ChatHistory(**r.json()["deleted_history"])
+        return self._parser.deleted_history(r.content)
 
     async def areset_history(self, unique_id: str) -> ChatHistory:
         """Reset history by unique_id and return deleted history"""
-        r = await self._async_request(
-            "PUT", "/api/v1/history", params={"unique_id": unique_id}
-        )
+        if self.history_cache is not None:
+            self.history_cache.invalidate(unique_id)
+
+        try:
+            r = await self._async_request(
+                "PUT", "/api/v1/history", params={"unique_id": unique_id}
+            )
+        finally:
+            # reads sent meanwhile may have cached the history before reset
+            if self.history_cache is not None:
+                self.history_cache.invalidate(unique_id)
         if r.status_code == 202:
             raise HistoryNotFoundError
-        return ChatHistory(**r.json()["deleted_history"])
+        return self._parser.deleted_history(r.content)
+
+    def _add_messages(self, unique_id: str, messages: list[Message]) -> ChatHistory:
+        r = self._sync_request(
+            "POST",
+            "/api/v1/history/message",
+            params={"unique_id": unique_id},
+            body_json={"messages": messages},
+        )
+        return self._cache_history(self._parser.history(r.content))
+
+    async def _async_add_messages(
+        self, unique_id: str, messages: list[Message]
+    ) -> ChatHistory:
+        r = await self._async_request(
+            "POST",
+            "/api/v1/history/message",
+            params={"unique_id": unique_id},
+            body_json={"messages": messages},
+        )
+        return self._cache_history(self._parser.history(r.content))
 
     def add_message_to_history(
         self, unique_id: str, message: list[Message] | Message
     ) -> ChatHistory:
-        """Add message to history by unique_id"""
+        """Add message to history by unique_id.
+        With coalescing enabled, messages added within the window
+        are sent in one request, and every caller gets its own history"""
         if not isinstance(message, list):
             message = [message]
-        message = [m.model_dump() for m in message]
 
-        r = self._sync_request(
-            "POST",
-            "/api/v1/history/message",
-            params={"unique_id": unique_id},
-            body_json={"messages": message},
-        )
-        return ChatHistory(**r.json())
+        if self._coalescer is not None:
+            return _own(self._coalescer.add(unique_id, message))
+        return self._add_messages(unique_id, message)
 
     async def async_add_message_to_history(
         self, unique_id: str, message: list[Message] | Message
     ) -> ChatHistory:
-        """Add message to history by unique_id"""
+        """Add message to history by unique_id.
+        With coalescing enabled, messages added within the window
+        are sent in one request, and every caller gets its own history"""
         if not isinstance(message, list):
             message = [message]
-        message = [m.model_dump() for m in message]
 
-        r = await self._async_request(
-            "POST",
-            "/api/v1/history/message",
-            params={"unique_id": unique_id},
-            body_json={"messages": message},
-        )
-        return ChatHistory(**r.json())
+        if self._coalescer is not None:
+            return _own(await self._coalescer.aadd(unique_id, message))
+        return await self._async_add_messages(unique_id, message)
+
+    def _once(
+        self, scope: tuple[str, str], key: str | None, send: Callable[[str], T]
+    ) -> T:
+        """Call send(key) once per idempotency key within scope (path and
+        unique_id), so a key reused for another request isn't answered
+        with a result of the first one. Duplicate calls wait for the running
+        one or get the recorded result. Without a key a new one is
+        generated, so retries of this call are still deduplicated"""
+        if key is None:
+            return send(new_idempotency_key())
+        known = key
+        record = (*scope, key)
+
+        def run() -> T:
+            if self._completed is not None:
+                found, result = self._completed.get(record)
+                if found:
+                    return result
+            result = send(known)
+            if self._completed is not None:
+                self._completed.put(record, result)
+            return result
+
+        return self._keyed.do(record, run)
+
+    async def _aonce(
+        self,
+        scope: tuple[str, str],
+        key: str | None,
+        send: Callable[[str], Awaitable[T]],
+    ) -> T:
+        """Call send(key) once per idempotency key within scope (path and
+        unique_id), so a key reused for another request isn't answered
+        with a result of the first one. Duplicate calls wait for the running
+        one or get the recorded result. Without a key a new one is
+        generated, so retries of this call are still deduplicated"""
+        if key is None:
+            return await send(new_idempotency_key())
+        known = key
+        record = (*scope, key)
+
+        async def run() -> T:
+            if self._completed is not None:
+                found, result = self._completed.get(record)
+                if found:
+                    return result
+            result = await send(known)
+            if self._completed is not None:
+                self._completed.put(record, result)
+            return result
+
+        return await self._async_keyed.do(record, run)
 
     def predict_history(
         self,
@@ -161,25 +1132,31 @@ class Suvvy(object):
         placeholders: dict | None = None,
         custom_log_info: dict | None = None,
         source: str | None = None,
+        idempotency_key: str | None = None,
     ) -> Prediction | None:
         """Get answer from AI by unique_id.
-        None means API refused to answer"""
+        None means API refused to answer.
+        Calls with the same idempotency_key are processed only once"""
 
-        r = self._sync_request(
-            method="POST",
-            path="/api/v1/history/predict",
-            params={"unique_id": unique_id},
-            body_json={
-                "placeholders": self._get_placeholders(placeholders),
-                "custom_log_info": self._get_custom_log_info(custom_log_info),
-                "source": source or self.source,
-            },
-        )
+        def send(key: str) -> Prediction | None:
+            r = self._sync_request(
+                method="POST",
+                path="/api/v1/history/predict",
+                params={"unique_id": unique_id},
+                body_json={
+                    "placeholders": self._get_placeholders(placeholders),
+                    "custom_log_info": self._get_custom_log_info(custom_log_info),
+                    "source": source or self.source,
+                },
+                headers={IDEMPOTENCY_HEADER: key},
+            )
 
-        if r.status_code == 202:
-            return None
+            if r.status_code == 202:
+                return None
 
-        return Prediction(**r.json())
+            return self._cache_prediction(unique_id, self._parser.prediction(r.content))
+
+        return self._once(("/api/v1/history/predict", unique_id), idempotency_key, send)
 
     async def apredict_history(
         self,
@@ -187,25 +1164,33 @@ class Suvvy(object):
         placeholders: dict | None = None,
         custom_log_info: dict | None = None,
         source: str | None = None,
+        idempotency_key: str | None = None,
     ) -> Prediction | None:
         """Get answer from AI by unique_id.
-        None means API refused to answer"""
+        None means API refused to answer.
+        Calls with the same idempotency_key are processed only once"""
 
-        r = await self._async_request(
-            method="POST",
-            path="/api/v1/history/predict",
-            params={"unique_id": unique_id},
-            body_json={
-                "placeholders": self._get_placeholders(placeholders),
-                "custom_log_info": self._get_custom_log_info(custom_log_info),
-                "source": source or self.source,
-            },
-        )
+        async def send(key: str) -> Prediction | None:
+            r = await self._async_request(
+                method="POST",
+                path="/api/v1/history/predict",
+                params={"unique_id": unique_id},
+                body_json={
+                    "placeholders": self._get_placeholders(placeholders),
+                    "custom_log_info": self._get_custom_log_info(custom_log_info),
+                    "source": source or self.source,
+                },
+                headers={IDEMPOTENCY_HEADER: key},
+            )
 
-        if r.status_code == 202:
-            return None
+            if r.status_code == 202:
+                return None
+
+            return self._cache_prediction(unique_id, self._parser.prediction(r.content))
 
-        return Prediction(**r.json())
+        return await self._aonce(
+            ("/api/v1/history/predict", unique_id), idempotency_key, send
+        )
 
     def predict_history_add_message(
         self,
@@ -214,30 +1199,38 @@ class Suvvy(object):
         placeholders: dict | None = None,
         custom_log_info: dict | None = None,
         source: str | None = None,
+        idempotency_key: str | None = None,
     ) -> Prediction | None:
         """Add message and get answer from AI by unique_id.
-        None means API refused to answer"""
+        None means API refused to answer.
+        Calls with the same idempotency_key are processed only once"""
 
-        if not isinstance(message, list):
-            message = [message]
-        message = [m.model_dump() for m in message]
+        messages = message if isinstance(message, list) else [message]
 
-        r = self._sync_request(
-            method="POST",
-            path="/api/v1/history/message/predict",
-            params={"unique_id": unique_id},
-            body_json={
-                "placeholders": self._get_placeholders(placeholders),
-                "custom_log_info": self._get_custom_log_info(custom_log_info),
-                "source": source or self.source,
-                "messages": message,
-            },
-        )
+        def send(key: str) -> Prediction | None:
+            r = self._sync_request(
+                method="POST",
+                path="/api/v1/history/message/predict",
+                params={"unique_id": unique_id},
+                body_json={
+                    "placeholders": self._get_placeholders(placeholders),
+                    "custom_log_info": self._get_custom_log_info(custom_log_info),
+                    "source": source or self.source,
+                    "messages": messages,
+                },
+                headers={IDEMPOTENCY_HEADER: key},
+            )
 
-        if r.status_code == 202:
-            return None
+            if r.status_code == 202:
+                return self._cache_prediction(unique_id, None, messages)
+
+            return self._cache_prediction(
+                unique_id, self._parser.prediction(r.content), messages
+            )
 
-        return Prediction(**r.json())
+        return self._once(
+            ("/api/v1/history/message/predict", unique_id), idempotency_key, send
+        )
 
     async def apredict_history_add_message(
         self,
@@ -246,30 +1239,144 @@ class Suvvy(object):
         placeholders: dict | None = None,
         custom_log_info: dict | None = None,
         source: str | None = None,
+        idempotency_key: str | None = None,
     ) -> Prediction | None:
         """Add message and get answer from AI by unique_id.
-        None means API refused to answer"""
+        None means API refused to answer.
+        Calls with the same idempotency_key are processed only once"""
 
-        if not isinstance(message, list):
-            message = [message]
-        message = [m.model_dump() for m in message]
+        messages = message if isinstance(message, list) else [message]
 
-        r = await self._async_request(
-            method="POST",
-            path="/api/v1/history/message/predict",
-            params={"unique_id": unique_id},
-            body_json={
-                "placeholders": self._get_placeholders(placeholders),
-                "custom_log_info": self._get_custom_log_info(custom_log_info),
-                "source": source or self.source,
-                "messages": message,
-            },
+        async def send(key: str) -> Prediction | None:
+            r = await self._async_request(
+                method="POST",
+                path="/api/v1/history/message/predict",
+                params={"unique_id": unique_id},
+                body_json={
+                    "placeholders": self._get_placeholders(placeholders),
+                    "custom_log_info": self._get_custom_log_info(custom_log_info),
+                    "source": source or self.source,
+                    "messages": messages,
+                },
+                headers={IDEMPOTENCY_HEADER: key},
+            )
+
+            if r.status_code == 202:
+                return self._cache_prediction(unique_id, None, messages)
+
+            return self._cache_prediction(
+                unique_id, self._parser.prediction(r.content), messages
+            )
+
+        return await self._aonce(
+            ("/api/v1/history/message/predict", unique_id), idempotency_key, send
         )
 
-        if r.status_code == 202:
-            return None
+    def predict_many(
+        self,
+        jobs: Iterable[PredictJob],
+        concurrency: int = 10,
+        return_exceptions: bool = False,
+        custom_log_info: dict | None = None,
+        source: str | None = None,
+    ) -> Iterator[BatchResult]:
+        """Get answers from AI for many unique_ids using a thread pool.
+        Jobs are unique_ids or (unique_id, placeholders) tuples.
+        Results are yielded as they complete"""
+
+        def calls() -> Iterator[tuple]:
+            for job in jobs:
+                unique_id, placeholders = unpack_predict_job(job)
+                yield unique_id, partial(
+                    self.predict_history,
+                    unique_id,
+                    placeholders,
+                    custom_log_info,
+                    source,
+                )
+
+        return iter_completed(calls(), concurrency, return_exceptions)
+
+    async def apredict_many(
+        self,
+        jobs: Iterable[PredictJob],
+        concurrency: int = 10,
+        return_exceptions: bool = False,
+        custom_log_info: dict | None = None,
+        source: str | None = None,
+    ) -> AsyncIterator[BatchResult]:
+        """Get answers from AI for many unique_ids concurrently.
+        Jobs are unique_ids or (unique_id, placeholders) tuples.
+        Results are yielded as they complete"""
+
+        def calls() -> Iterator[tuple]:
+            for job in jobs:
+                unique_id, placeholders = unpack_predict_job(job)
+                yield unique_id, partial(
+                    self.apredict_history,
+                    unique_id,
+                    placeholders,
+                    custom_log_info,
+                    source,
+                )
+
+        async for result in aiter_completed(calls(), concurrency, return_exceptions):
+            yield result
+
+    def predict_add_message_many(
+        self,
+        jobs: Iterable[PredictMessageJob],
+        concurrency: int = 10,
+        return_exceptions: bool = False,
+        custom_log_info: dict | None = None,
+        source: str | None = None,
+    ) -> Iterator[BatchResult]:
+        """Add messages and get answers from AI for many unique_ids using a
+        thread pool. Jobs are (unique_id, message) or
+        (unique_id, message, placeholders) tuples.
+        Results are yielded as they complete"""
+
+        def calls() -> Iterator[tuple]:
+            for job in jobs:
+                unique_id, message, placeholders = unpack_predict_message_job(job)
+                yield unique_id, partial(
+                    self.predict_history_add_message,
+                    unique_id,
+                    message,
+                    placeholders,
+                    custom_log_info,
+                    source,
+                )
+
+        return iter_completed(calls(), concurrency, return_exceptions)
+
+    async def apredict_add_message_many(
+        self,
+        jobs: Iterable[PredictMessageJob],
+        concurrency: int = 10,
+        return_exceptions: bool = False,
+        custom_log_info: dict | None = None,
+        source: str | None = None,
+    ) -> AsyncIterator[BatchResult]:
+        """Add messages and get answers from AI for many unique_ids
+        concurrently. Jobs are (unique_id, message) or
+        (unique_id, message, placeholders) tuples.
+        Results are yielded as they complete"""
+
+        def calls() -> Iterator[tuple]:
+            for job in jobs:
+                unique_id, message, placeholders = unpack_predict_message_job(job)
+                yield unique_id, partial(
+                    self.apredict_history_add_message,
+                    unique_id,
+                    message,
+                    placeholders,
+                    custom_log_info,
+                    source,
+                )
 
-        return Prediction(**r.json())
+        async for result in aiter_completed(calls(), concurrency, return_exceptions):
+            yield result
 
     def as_history(self, unique_id: str) -> "History":  # type: ignore
         """Represent history as a History object"""
@@ -0,0 +1,10 @@
+# mypy: ignore_errors
+import pytest
+
+from tests.mock_api import MockSuvvyAPI
+
+
+@pytest.fixture
+def mock_api():
+    with MockSuvvyAPI() as server:
+        yield server
@@ -0,0 +1,236 @@
+# mypy: ignore_errors
+"""A tiny in-memory imitation of the Suvvy API for offline tests and benchmarks"""
+import datetime
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def make_history(unique_id: str, messages: list[dict] | None = None) -> dict:
+    """Build a ChatHistory-shaped payload"""
+    return {
+        "history": messages or [],
+        "unique_id": unique_id,
+        "stopped": False,
+        "stop_reason": "unknown",
+        "last_interaction_time": _now(),
+        "created_time": _now(),
+        "channel_name": "api",
+        "last_source": None,
+        "last_instance_id": None,
+    }
+
+
+def make_message(message_id: int, text: str, role: str = "human") -> dict:
+    """Build a HistoryMessage-shaped payload"""
+    return {
+        "text": text,
+        "role": role,
+        "function": None,
+        "tokens": len(text.split()),
+        "time": _now(),
+        "message_id": message_id,
+        "context": "",
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "MockSuvvyAPI"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _send(self, status: int, body: dict | None, headers: dict | None = None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str):
+        url = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        self.server.record(method, url.path, params, body, dict(self.headers))
+        self.server.started()
+        try:
+            self._respond(method, url.path, params, body)
+        finally:
+            self.server.finished()
+
+    def _respond(self, method: str, path: str, params: dict, body):
+        latency = self.server.latency
+        if callable(latency):
+            latency = latency(method, path)
+        if latency:
+            time.sleep(latency)
+
+        failure = self.server.next_failure(path)
+        if failure is not None:
+            status, headers = failure
+            return self._send(status, {"detail": "Injected failure"}, headers)
+
+        status, response = self.server.dispatch(method, path, params, body)
+        delay = self.server.delay
+        if callable(delay):
+            delay = delay(method, path)
+        if delay:
+            # the stored history keeps changing in the meantime
+            response = json.loads(json.dumps(response))
+            time.sleep(delay)
+        self._send(status, response)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+
+class MockSuvvyAPI(ThreadingHTTPServer):
+    """Threaded HTTP server implementing the subset of the API used by Suvvy.
+
+    ``latency`` may be a number of seconds or a callable ``(method, path)``;
+    ``fail(path, status, headers, times)`` scripts failures for the next calls.
+    ``delay`` is like latency, but after the response is made, so that it
+    carries the state from before the requests that land meanwhile.
+    ``peak_in_flight`` is the most requests ever handled at once.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency: float = 0.0, answer: str = "Hello from mock"):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.delay = 0.0
+        self.answer = answer
+        self.histories: dict[str, dict] = {}
+        self.requests: list[tuple] = []
+        self.connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._failures: list[tuple[str | None, int, dict]] = []
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_request(self):
+        request = super().get_request()
+        with self._lock:
+            self.connections += 1
+        return request
+
+    def handle_error(self, request, client_address):
+        # clients giving up on slow responses are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, method, path, params, body, headers):
+        with self._lock:
+            self.requests.append((method, path, params, body, headers))
+
+    def fail(
+        self,
+        status: int,
+        path: str | None = None,
+        headers: dict | None = None,
+        times: int = 1,
+    ) -> None:
+        with self._lock:
+            self._failures.extend([(path, status, headers or {})] * times)
+
+    def next_failure(self, path: str) -> tuple[int, dict] | None:
+        with self._lock:
+            for i, (fail_path, status, headers) in enumerate(self._failures):
+                if fail_path is None or fail_path == path:
+                    del self._failures[i]
+                    return status, headers
+        return None
+
+    def _append(self, unique_id: str, messages: list[dict]) -> list[dict]:
+        history = self.histories.setdefault(unique_id, make_history(unique_id))
+        added = []
+        for message in messages:
+            added.append(
+                make_message(
+                    len(history["history"]) + 1,
+                    message.get("text", ""),
+                    message.get("role", "human"),
+                )
+            )
+            history["history"].append(added[-1])
+        history["last_interaction_time"] = _now()
+        return added
+
+    def _predict(self, unique_id: str) -> dict:
+        new_messages = self._append(unique_id, [{"text": self.answer, "role": "ai"}])
+        return {"new_messages": new_messages}
+
+    def dispatch(self, method, path, params, body) -> tuple[int, dict | None]:
+        unique_id = params.get("unique_id", "")
+        with self._lock:
+            match method, path:
+                case "GET", "/api/check":
+                    return 200, {"status": "ok"}
+                case "GET", "/api/v1/history":
+                    if unique_id not in self.histories:
+                        return 404, {"detail": "History not found"}
+                    return 200, self.histories[unique_id]
+                case "PUT", "/api/v1/history":
+                    if unique_id not in self.histories:
+                        return 202, None
+                    return 200, {"deleted_history": self.histories.pop(unique_id)}
+                case "POST", "/api/v1/history/message":
+                    self._append(unique_id, body["messages"])
+                    return 200, self.histories[unique_id]
+                case "POST", "/api/v1/history/predict":
+                    return 200, self._predict(unique_id)
+                case "POST", "/api/v1/history/message/predict":
+                    self._append(unique_id, body["messages"])
+                    return 200, self._predict(unique_id)
+        return 404, {"detail": "Not found"}
+
+    def start(self) -> "MockSuvvyAPI":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockSuvvyAPI":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,109 @@
+# mypy: ignore_errors
+import asyncio
+import threading
+import time
+
+import pytest
+
+from suvvyapi import Suvvy
+from suvvyapi.adaptive import AdaptiveLimiter
+from suvvyapi.exceptions.api import InternalAPIError
+
+PREDICT = "/api/v1/history/predict"
+
+
+def _server_with_capacity(mock_api, capacity, base=0.01):
+    """Predictions slow down proportionally once more than `capacity` run"""
+    active = 0
+    lock = threading.Lock()
+
+    def latency(method, path):
+        nonlocal active
+        if path != PREDICT:
+            return 0
+        with lock:
+            active += 1
+            load = active
+        time.sleep(base * max(1.0, load / capacity))
+        with lock:
+            active -= 1
+        return 0
+
+    mock_api.latency = latency
+
+
+async def _predict_all(suvvy, count, concurrency):
+    jobs = [str(i) for i in range(count)]
+    return [r async for r in suvvy.apredict_many(jobs, concurrency=concurrency)]
+
+
+async def test_limit_grows_while_latency_is_stable(mock_api):
+    _server_with_capacity(mock_api, capacity=100)
+    adaptive = AdaptiveLimiter(initial_limit=2)
+    async with Suvvy("token", api_url=mock_api.url, adaptive_limiter=adaptive) as s:
+        await _predict_all(s, 150, concurrency=30)
+    assert adaptive.limit > 4
+    assert adaptive.in_flight == 0
+
+
+async def test_limit_shrinks_when_server_gets_overloaded(mock_api):
+    _server_with_capacity(mock_api, capacity=100)
+    adaptive = AdaptiveLimiter(initial_limit=16)
+    async with Suvvy("token", api_url=mock_api.url, adaptive_limiter=adaptive) as s:
+        await _predict_all(s, 100, concurrency=40)
+        grown = adaptive.limit
+
+        # an incident: the API now handles only two predictions at a time
+        _server_with_capacity(mock_api, capacity=2)
+        lowest = grown
+
+        async def watch():
+            nonlocal lowest
+            while True:
+                lowest = min(lowest, adaptive.limit)
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.create_task(watch())
+        await _predict_all(s, 100, concurrency=40)
+        watcher.cancel()
+    assert lowest < grown
+    assert lowest <= 8
+
+
+async def test_errors_cut_the_limit(mock_api):
+    mock_api.fail(500, PREDICT, times=3)
+    adaptive = AdaptiveLimiter(initial_limit=16, backoff=0.5)
+    async with Suvvy(
+        "token", api_url=mock_api.url, adaptive_limiter=adaptive, retry=None
+    ) as suvvy:
+        with pytest.raises(InternalAPIError):
+            await suvvy.apredict_history("errors")
+    assert adaptive.limit == 8
+
+
+async def test_requests_wait_for_a_slot(mock_api):
+    mock_api.latency = 0.05
+    adaptive = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, adaptive.in_flight)
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch())
+    async with Suvvy("token", api_url=mock_api.url, adaptive_limiter=adaptive) as s:
+        await _predict_all(s, 5, concurrency=5)
+        # other endpoints are not limited
+        await asyncio.gather(*(s.acheck_connection() for _ in range(3)))
+    watcher.cancel()
+    assert peak == 1
+
+
+def test_sync_requests_share_the_limit(mock_api):
+    adaptive = AdaptiveLimiter(initial_limit=2)
+    with Suvvy("token", api_url=mock_api.url, adaptive_limiter=adaptive) as suvvy:
+        results = list(suvvy.predict_many([str(i) for i in range(6)], concurrency=6))
+    assert len(results) == 6
+    assert adaptive.in_flight == 0
@@ -0,0 +1,69 @@
+# mypy: ignore_errors
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import DeadlineExceededError
+from suvvyapi.timeouts import deadline
+
+
+async def test_sync_and_async_share_one_client(mock_api):
+    async with Suvvy("token", api_url=mock_api.url, background_loop=True) as suvvy:
+        loop = suvvy.pool.loop_thread()
+        assert await asyncio.to_thread(suvvy.check_connection)
+        assert await suvvy.acheck_connection()
+        await asyncio.to_thread(
+            suvvy.add_message_to_history, "shared", Message(text="Привет!")
+        )
+        assert (await suvvy.aget_history("shared")).unique_id == "shared"
+
+        assert suvvy.pool._client is None
+        assert list(suvvy.pool._async_clients) == [loop.loop]
+        assert mock_api.connections == 1
+    assert suvvy.pool._loop_thread is None
+    assert loop.loop.is_closed()
+
+
+def test_sync_calls_from_many_threads(mock_api):
+    mock_api.latency = 0.02
+    with Suvvy(
+        "token", api_url=mock_api.url, background_loop=True, max_connections=4
+    ) as suvvy:
+        with ThreadPoolExecutor(16) as pool:
+            predictions = list(pool.map(suvvy.predict_history, map(str, range(32))))
+    assert all(p.new_messages[0].text == mock_api.answer for p in predictions)
+    assert mock_api.connections <= 4
+
+
+def test_sync_stream_is_read_from_the_loop(mock_api):
+    with Suvvy("token", api_url=mock_api.url, background_loop=True) as suvvy:
+        suvvy.add_message_to_history(
+            "stream", [Message(text=str(i)) for i in range(50)]
+        )
+        with suvvy.iter_history("stream", chunk_size=128) as stream:
+            texts = [m.text for m in stream]
+    assert texts == [str(i) for i in range(50)]
+
+
+async def test_async_stream_from_another_loop(mock_api):
+    async with Suvvy("token", api_url=mock_api.url, background_loop=True) as suvvy:
+        await suvvy.async_add_message_to_history(
+            "astream", [Message(text=str(i)) for i in range(20)]
+        )
+        texts = [m.text async for m in suvvy.aiter_history("astream", chunk_size=64)]
+    assert texts == [str(i) for i in range(20)]
+
+
+def test_deadline_follows_the_call(mock_api):
+    mock_api.latency = 0.5
+    with Suvvy(
+        "token", api_url=mock_api.url, retry=None, background_loop=True
+    ) as suvvy:
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            with deadline(0.2):
+                suvvy.check_connection()
+        assert time.monotonic() - started < 0.45
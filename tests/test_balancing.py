@@ -0,0 +1,144 @@
+# mypy: ignore_errors
+import asyncio
+import time
+
+import pytest
+
+from suvvyapi import Suvvy
+from suvvyapi.balancing import BalancingPolicy, LoadBalancer
+from suvvyapi.retry import RetryPolicy
+from tests.mock_api import MockSuvvyAPI
+
+PREDICT = "/api/v1/history/predict"
+FAST = RetryPolicy(base_delay=0.001, max_delay=0.01)
+
+
+@pytest.fixture
+def backup_api():
+    with MockSuvvyAPI() as server:
+        yield server
+
+
+def _calls(server, path=PREDICT):
+    return sum(1 for r in server.requests if r[1] == path)
+
+
+def test_round_robin_takes_urls_in_turn(mock_api, backup_api):
+    with Suvvy(
+        "token",
+        api_url=[mock_api.url, backup_api.url],
+        balancing=BalancingPolicy(strategy="round_robin"),
+    ) as suvvy:
+        for i in range(6):
+            suvvy.predict_history(str(i))
+    assert _calls(mock_api) == _calls(backup_api) == 3
+    assert backup_api.requests[0][4]["Host"] == backup_api.url.split("//")[1]
+
+
+def test_primary_fails_over_to_backup_and_back(mock_api, backup_api):
+    policy = BalancingPolicy(
+        strategy="primary_backup", failures_to_eject=2, ejection_duration=0.2
+    )
+    mock_api.fail(503, PREDICT, times=2)
+    with Suvvy(
+        "token", api_url=[mock_api.url, backup_api.url], balancing=policy, retry=FAST
+    ) as suvvy:
+        # the retry goes to the backup
+        suvvy.predict_history("failover")
+        assert (_calls(mock_api), _calls(backup_api)) == (1, 1)
+
+        suvvy.predict_history("failover")
+        metrics = suvvy.pool.balancer.metrics()
+        assert not metrics[mock_api.url].healthy
+        suvvy.predict_history("failover")
+        assert (_calls(mock_api), _calls(backup_api)) == (2, 3)
+
+        # once the ejection is over, a connection check brings it back
+        time.sleep(0.25)
+        suvvy.predict_history("failover")
+        assert (_calls(mock_api), _calls(backup_api)) == (2, 4)
+        _wait_until_healthy(suvvy, mock_api.url)
+        assert _calls(mock_api, "/api/check") == 1
+        suvvy.predict_history("failover")
+        assert (_calls(mock_api), _calls(backup_api)) == (3, 4)
+
+
+def _wait_until_healthy(suvvy, url, timeout=1.0):
+    stop = time.monotonic() + timeout
+    while not suvvy.pool.balancer.metrics()[url].healthy:
+        assert time.monotonic() < stop
+        time.sleep(0.01)
+
+
+async def test_checks_dont_hold_up_requests(mock_api, backup_api):
+    policy = BalancingPolicy(
+        strategy="primary_backup", failures_to_eject=1, ejection_duration=0.05
+    )
+    mock_api.fail(503, PREDICT)
+    async with Suvvy(
+        "token", api_url=[mock_api.url, backup_api.url], balancing=policy, retry=FAST
+    ) as suvvy:
+        await suvvy.apredict_history("slow check")
+        await asyncio.sleep(0.1)
+        mock_api.latency = lambda method, path: 0.5 if path == "/api/check" else 0
+        started = time.monotonic()
+        await suvvy.apredict_history("slow check")
+        assert time.monotonic() - started < 0.3
+        assert _calls(backup_api) == 2
+        while not suvvy.pool.balancer.metrics()[mock_api.url].healthy:
+            await asyncio.sleep(0.01)
+        await suvvy.apredict_history("slow check")
+    assert (_calls(mock_api), _calls(backup_api)) == (2, 2)
+
+
+async def test_ewma_prefers_the_faster_url(mock_api, backup_api):
+    mock_api.latency = 0.03
+    async with Suvvy("token", api_url=[mock_api.url, backup_api.url]) as suvvy:
+        for i in range(20):
+            await suvvy.apredict_history(str(i))
+        metrics = suvvy.pool.balancer.metrics()
+    assert _calls(backup_api) >= 17
+    assert metrics[backup_api.url].latency < metrics[mock_api.url].latency
+
+
+async def test_concurrent_requests_spill_over(mock_api, backup_api):
+    backup_api.latency = 0.02
+    mock_api.latency = 0.03
+    async with Suvvy("token", api_url=[mock_api.url, backup_api.url]) as suvvy:
+        await asyncio.gather(suvvy.apredict_history("a"), suvvy.apredict_history("b"))
+        await asyncio.gather(*(suvvy.apredict_history(str(i)) for i in range(20)))
+    assert _calls(mock_api) >= 4 and _calls(backup_api) >= 4
+
+
+def test_all_ejected_uses_the_first_to_recover():
+    balancer = LoadBalancer(
+        ["http://a", "http://b"], BalancingPolicy(failures_to_eject=1)
+    )
+    first, second = balancer.endpoints
+    for endpoint in (first, second):
+        balancer.started(endpoint)
+        balancer.finished(endpoint, True, 0.1)
+    assert balancer.pick() is first
+    assert balancer.take_probes() == []
+
+
+def test_unmeasured_latency_fades(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    balancer = LoadBalancer(
+        ["http://a", "http://b"], BalancingPolicy(latency_half_life=10.0)
+    )
+    slow, fast = balancer.endpoints
+    for endpoint, latency in ((slow, 0.8), (fast, 0.3)):
+        balancer.started(endpoint)
+        balancer.finished(endpoint, False, latency)
+    assert balancer.pick() is fast
+
+    # the slow one gets no traffic, but its latency isn't trusted forever
+    now += 30.0
+    for _ in range(3):
+        balancer.started(fast)
+        balancer.finished(fast, False, 0.3)
+    assert balancer.pick() is slow
+    with pytest.raises(ValueError):
+        BalancingPolicy(latency_half_life=0)
@@ -0,0 +1,47 @@
+# mypy: ignore_errors
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import HistoryTooLongError
+
+
+def test_predict_add_message_many(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        jobs = [(f"batch-{i}", Message(text="Привет!")) for i in range(20)]
+        results = list(suvvy.predict_add_message_many(jobs, concurrency=4))
+
+    assert sorted(r.unique_id for r in results) == sorted(j[0] for j in jobs)
+    assert all(r.ok and r.prediction.actual_response for r in results)
+
+
+def test_predict_many_collects_errors(mock_api):
+    mock_api.fail(413, path="/api/v1/history/predict")
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        results = list(
+            suvvy.predict_many(["a", ("b", {"name": "Bob"})], return_exceptions=True)
+        )
+
+    errors = [r for r in results if not r.ok]
+    assert len(results) == 2 and len(errors) == 1
+    assert isinstance(errors[0].error, HistoryTooLongError)
+
+
+async def test_apredict_add_message_many_limits_concurrency(mock_api):
+    mock_api.latency = 0.05
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        jobs = ((f"abatch-{i}", Message(text="Привет!"), None) for i in range(12))
+        results = [
+            r async for r in suvvy.apredict_add_message_many(jobs, concurrency=3)
+        ]
+
+    assert len(results) == 12
+    assert mock_api.connections <= 3
+    assert mock_api.peak_in_flight == 3
+
+
+async def test_apredict_many_fails_fast(mock_api):
+    mock_api.fail(413, path="/api/v1/history/predict")
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        with pytest.raises(HistoryTooLongError):
+            async for _ in suvvy.apredict_many(["a", "b", "c"], concurrency=1):
+                pass
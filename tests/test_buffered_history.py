@@ -0,0 +1,71 @@
+# mypy: ignore_errors
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import InternalAPIError
+
+
+def _paths(mock_api):
+    return [r[1] for r in mock_api.requests]
+
+
+def test_messages_are_sent_with_prediction(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        history = suvvy.as_history("buffered")
+        history.buffer_message(Message(text="Привет!"))
+        history.buffer_message(Message(text="Как дела?"))
+        assert len(history.pending) == 2
+
+        r = history.predict()
+
+    assert r.actual_response.text == mock_api.answer
+    assert _paths(mock_api) == ["/api/v1/history/message/predict"]
+    assert [m["text"] for m in mock_api.requests[0][3]["messages"]] == [
+        "Привет!",
+        "Как дела?",
+    ]
+    assert not history.pending
+
+
+def test_pending_messages_are_flushed_on_close(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        with suvvy.as_history("flushed") as history:
+            history.buffer_message(Message(text="Привет!"))
+        assert _paths(mock_api) == ["/api/v1/history/message"]
+        assert history.flush() is None
+
+
+async def test_async_predict_add_message_sends_pending_first(mock_api):
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        async with suvvy.as_history("abuffered") as history:
+            history.buffer_message(Message(text="1"))
+            await history.apredict_add_message(Message(text="2"))
+            r = await history.aget()
+
+    assert [m.text for m in r.history] == ["1", "2", mock_api.answer]
+    assert _paths(mock_api) == [
+        "/api/v1/history/message/predict",
+        "/api/v1/history",
+    ]
+
+
+def test_pending_messages_survive_failed_prediction(mock_api):
+    mock_api.fail(500)
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        history = suvvy.as_history("failed")
+        history.buffer_message(Message(text="Привет!"))
+        with pytest.raises(InternalAPIError):
+            history.predict()
+        assert [m.text for m in history.pending] == ["Привет!"]
+
+
+async def test_added_message_goes_after_buffered_ones(mock_api):
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        history = suvvy.as_history("ordered")
+        history.buffer_message(Message(text="1"))
+        added = await history.async_add_message(Message(text="2"))
+        assert [m.text for m in added.history] == ["1", "2"]
+        assert not history.pending
+        added = history.add_message(Message(text="3"))
+    assert [m.text for m in added.history] == ["1", "2", "3"]
+    assert _paths(mock_api) == ["/api/v1/history/message"] * 2
@@ -0,0 +1,102 @@
+# mypy: ignore_errors
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.cache import HistoryCache
+
+
+def _gets(mock_api):
+    return [r for r in mock_api.requests if r[0] == "GET"]
+
+
+def test_get_history_is_served_from_cache(mock_api):
+    with Suvvy("token", api_url=mock_api.url, history_cache=HistoryCache()) as suvvy:
+        suvvy.add_message_to_history("cached", Message(text="Привет!"))
+        for _ in range(3):
+            r = suvvy.get_history("cached")
+
+        assert [m.text for m in r.history] == ["Привет!"]
+        assert not _gets(mock_api)
+        assert suvvy.history_cache.stats.hits == 3
+
+
+def test_prediction_is_appended_to_cache(mock_api):
+    with Suvvy("token", api_url=mock_api.url, history_cache=HistoryCache()) as suvvy:
+        suvvy.add_message_to_history("appended", Message(text="Привет!"))
+        suvvy.predict_history("appended")
+        r = suvvy.get_history("appended")
+
+        assert [m.text for m in r.history] == ["Привет!", mock_api.answer]
+        assert not _gets(mock_api)
+
+
+def test_unclear_prediction_invalidates_cache(mock_api):
+    with Suvvy("token", api_url=mock_api.url, history_cache=HistoryCache()) as suvvy:
+        suvvy.add_message_to_history("unclear", Message(text="1"))
+        suvvy.predict_history_add_message("unclear", Message(text="2"))
+        r = suvvy.get_history("unclear")
+
+        assert [m.text for m in r.history] == ["1", "2", mock_api.answer]
+        assert len(_gets(mock_api)) == 1
+
+
+async def test_reset_invalidates_cache(mock_api):
+    async with Suvvy(
+        "token", api_url=mock_api.url, history_cache=HistoryCache()
+    ) as suvvy:
+        await suvvy.async_add_message_to_history("reset", Message(text="1"))
+        await suvvy.areset_history("reset")
+        assert "reset" not in suvvy.history_cache
+
+
+def test_lru_eviction_and_ttl(mock_api):
+    cache = HistoryCache(maxsize=2, ttl=0.1)
+    with Suvvy("token", api_url=mock_api.url, history_cache=cache) as suvvy:
+        for unique_id in ("a", "b", "c"):
+            suvvy.add_message_to_history(unique_id, Message(text="Привет!"))
+        assert "a" not in cache and len(cache) == 2
+
+        time.sleep(0.15)
+        assert cache.get("c") is None
+
+    stats = cache.stats
+    assert stats.evictions == 1
+    assert stats.misses == 1 and stats.expirations >= 1
+
+
+def _delay_reads(method, path):
+    return 0.2 if method == "GET" else 0.0
+
+
+async def test_read_sent_before_write_doesnt_overwrite_it(mock_api):
+    async with Suvvy(
+        "token", api_url=mock_api.url, history_cache=HistoryCache()
+    ) as suvvy:
+        await suvvy.async_add_message_to_history("race", Message(text="first"))
+        suvvy.history_cache.clear()
+        mock_api.delay = _delay_reads
+
+        read = asyncio.create_task(suvvy.aget_history("race"))
+        await asyncio.sleep(0.05)
+        await suvvy.async_add_message_to_history("race", Message(text="second"))
+        assert [m.text for m in (await read).history] == ["first"]
+
+        cached = suvvy.history_cache.get("race")
+    assert [m.text for m in cached.history] == ["first", "second"]
+
+
+def test_read_during_reset_isnt_cached(mock_api):
+    with Suvvy("token", api_url=mock_api.url, history_cache=HistoryCache()) as suvvy:
+        suvvy.add_message_to_history("reset race", Message(text="old"))
+        suvvy.history_cache.clear()
+        mock_api.delay = _delay_reads
+        mock_api.latency = lambda method, path: 0.1 if method == "PUT" else 0.0
+
+        with ThreadPoolExecutor(1) as executor:
+            reset = executor.submit(suvvy.reset_history, "reset race")
+            time.sleep(0.02)
+            suvvy.get_history("reset race")
+            reset.result()
+        assert "reset race" not in suvvy.history_cache
@@ -0,0 +1,134 @@
+# mypy: ignore_errors
+import asyncio
+import time
+
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.circuit import CircuitBreaker, CircuitState
+from suvvyapi.exceptions.api import (
+    CircuitOpenError,
+    HistoryNotFoundError,
+    InternalAPIError,
+    ServiceUnavailableError,
+)
+
+HISTORY = "/api/v1/history"
+PREDICT = "/api/v1/history/predict"
+
+
+def _breaker(**kwargs):
+    options = dict(window_size=4, minimum_calls=4, open_duration=0.2)
+    return CircuitBreaker(**{**options, **kwargs})
+
+
+def _calls(mock_api, path):
+    return sum(1 for r in mock_api.requests if r[1] == path)
+
+
+def _suvvy(mock_api, breaker):
+    return Suvvy("token", api_url=mock_api.url, retry=None, circuit_breaker=breaker)
+
+
+def test_circuit_opens_on_failures_and_fails_fast(mock_api):
+    mock_api.fail(500, HISTORY, times=4)
+    breaker = _breaker()
+    with _suvvy(mock_api, breaker) as suvvy:
+        for _ in range(4):
+            with pytest.raises(InternalAPIError):
+                suvvy.get_history("circuit")
+        with pytest.raises(CircuitOpenError) as e:
+            suvvy.get_history("circuit")
+    assert e.value.path == HISTORY
+    assert _calls(mock_api, HISTORY) == 4
+
+    metrics = breaker.metrics()[HISTORY]
+    assert metrics.state == CircuitState.OPEN
+    assert metrics.times_opened == 1 and metrics.rejected == 1
+
+
+def test_client_errors_do_not_open_circuit(mock_api):
+    breaker = _breaker()
+    with _suvvy(mock_api, breaker) as suvvy:
+        for _ in range(6):
+            with pytest.raises(HistoryNotFoundError):
+                suvvy.get_history("missing")
+    assert breaker.state(HISTORY) == CircuitState.CLOSED
+    assert breaker.metrics()[HISTORY].failure_rate == 0.0
+
+
+def test_successful_probe_closes_circuit(mock_api):
+    mock_api.fail(503, HISTORY, times=4)
+    breaker = _breaker()
+    with _suvvy(mock_api, breaker) as suvvy:
+        suvvy.add_message_to_history("circuit", Message(text="Привет!"))
+        for _ in range(4):
+            with pytest.raises(ServiceUnavailableError):
+                suvvy.get_history("circuit")
+        time.sleep(0.25)
+        assert suvvy.get_history("circuit").unique_id == "circuit"
+    assert breaker.state(HISTORY) == CircuitState.CLOSED
+    assert _calls(mock_api, "/api/check") == 1
+
+
+def test_failed_probe_reopens_circuit(mock_api):
+    mock_api.fail(503, HISTORY, times=4)
+    breaker = _breaker()
+    with _suvvy(mock_api, breaker) as suvvy:
+        for _ in range(4):
+            with pytest.raises(ServiceUnavailableError):
+                suvvy.get_history("circuit")
+        time.sleep(0.25)
+        mock_api.fail(503, "/api/check")
+        with pytest.raises(CircuitOpenError):
+            suvvy.get_history("circuit")
+    assert breaker.metrics()[HISTORY].times_opened == 2
+    assert _calls(mock_api, HISTORY) == 4
+
+
+def test_slow_calls_open_circuit(mock_api):
+    mock_api.latency = lambda method, path: 0.05 if path == HISTORY else 0
+    breaker = _breaker(slow_call_duration={HISTORY: 0.04}, slow_call_rate_threshold=0.5)
+    with _suvvy(mock_api, breaker) as suvvy:
+        for _ in range(4):
+            with pytest.raises(HistoryNotFoundError):
+                suvvy.get_history("slow")
+        with pytest.raises(CircuitOpenError):
+            suvvy.get_history("slow")
+        # other endpoints are not affected
+        assert suvvy.check_connection()
+        suvvy.predict_history("slow")
+
+
+async def test_async_circuit_opens_and_recovers(mock_api):
+    mock_api.fail(500, "/api/v1/history/predict", times=4)
+    breaker = _breaker()
+    async with _suvvy(mock_api, breaker) as suvvy:
+        for _ in range(4):
+            with pytest.raises(InternalAPIError):
+                await suvvy.apredict_history("acircuit")
+        with pytest.raises(CircuitOpenError):
+            await suvvy.apredict_history("acircuit")
+        time.sleep(0.25)
+        assert await suvvy.apredict_history("acircuit") is not None
+    assert breaker.state("/api/v1/history/predict") == CircuitState.CLOSED
+
+
+async def test_cancelled_probe_lets_the_next_call_probe(mock_api):
+    mock_api.fail(500, PREDICT, times=4)
+    breaker = _breaker()
+    async with _suvvy(mock_api, breaker) as suvvy:
+        for _ in range(4):
+            with pytest.raises(InternalAPIError):
+                await suvvy.apredict_history("cancel")
+        await asyncio.sleep(0.25)
+
+        mock_api.latency = lambda method, path: 0.5 if path == "/api/check" else 0
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(suvvy.apredict_history("cancel"), 0.1)
+        assert breaker.state(PREDICT) == CircuitState.OPEN
+
+        mock_api.latency = 0
+        assert await suvvy.apredict_history("cancel") is not None
+    assert breaker.state(PREDICT) == CircuitState.CLOSED
+    assert breaker.metrics()[PREDICT].times_opened == 1
@@ -0,0 +1,85 @@
+# mypy: ignore_errors
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from suvvyapi import Suvvy, Message
+
+
+def _posts(mock_api):
+    return [r for r in mock_api.requests if r[1] == "/api/v1/history/message"]
+
+
+async def test_async_messages_are_coalesced(mock_api):
+    async with Suvvy("token", api_url=mock_api.url, coalesce_window=0.05) as suvvy:
+        histories = await asyncio.gather(
+            *(
+                suvvy.async_add_message_to_history("burst", Message(text=str(i)))
+                for i in range(5)
+            )
+        )
+
+    assert len(_posts(mock_api)) == 1
+    assert all(len(h.history) == 5 for h in histories)
+    assert [m.text for m in histories[0].history] == [str(i) for i in range(5)]
+
+
+async def test_async_max_batch_flushes_early(mock_api):
+    async with Suvvy(
+        "token", api_url=mock_api.url, coalesce_window=10, coalesce_max_batch=2
+    ) as suvvy:
+        await asyncio.wait_for(
+            asyncio.gather(
+                *(
+                    suvvy.async_add_message_to_history("full", Message(text=str(i)))
+                    for i in range(4)
+                )
+            ),
+            timeout=2,
+        )
+
+    assert len(_posts(mock_api)) == 2
+    assert [m["text"] for m in mock_api.histories["full"]["history"]] == [
+        "0",
+        "1",
+        "2",
+        "3",
+    ]
+
+
+def test_sync_messages_are_coalesced(mock_api):
+    with Suvvy("token", api_url=mock_api.url, coalesce_window=0.2) as suvvy:
+        history = suvvy.as_history("sync-burst")
+        with ThreadPoolExecutor(5) as executor:
+            results = list(
+                executor.map(
+                    lambda i: history.add_message(Message(text=str(i))), range(5)
+                )
+            )
+
+    assert len(_posts(mock_api)) == 1
+    assert all(len(r.history) == 5 for r in results)
+
+
+async def test_async_callers_get_histories_of_their_own(mock_api):
+    async with Suvvy("token", api_url=mock_api.url, coalesce_window=0.05) as suvvy:
+        first, second = await asyncio.gather(
+            suvvy.async_add_message_to_history("own", Message(text="a")),
+            suvvy.async_add_message_to_history("own", Message(text="b")),
+        )
+
+    first.history.append(Message(text="c"))
+    assert len(_posts(mock_api)) == 1
+    assert [m.text for m in second.history] == ["a", "b"]
+
+
+def test_sync_callers_get_histories_of_their_own(mock_api):
+    with Suvvy("token", api_url=mock_api.url, coalesce_window=0.2) as suvvy:
+        with ThreadPoolExecutor(2) as executor:
+            first, second = executor.map(
+                lambda text: suvvy.add_message_to_history("own", Message(text=text)),
+                ["a", "b"],
+            )
+
+    first.history.clear()
+    assert len(_posts(mock_api)) == 1
+    assert len(second.history) == 2
@@ -0,0 +1,60 @@
+# mypy: ignore_errors
+import json
+
+import pytest
+
+from suvvyapi import ChatHistory
+from suvvyapi.columnar import CompactHistory, HistoryStore
+from suvvyapi.enums import Role
+from tests.mock_api import make_history, make_message
+
+
+def _history(unique_id, roles):
+    messages = [
+        make_message(i, f"Сообщение {i}", role.value) for i, role in enumerate(roles)
+    ]
+    return ChatHistory.model_validate_json(
+        json.dumps(make_history(unique_id, messages))
+    )
+
+
+def test_compact_history_keeps_messages():
+    history = _history("compact", [Role.HUMAN, Role.AI, Role.HUMAN])
+    compact = CompactHistory.from_chat_history(history)
+
+    assert len(compact) == 3
+    assert list(compact.texts()) == [m.text for m in history.history]
+    assert compact.text(-1) == "Сообщение 2"
+    for index in (3, -4):
+        with pytest.raises(IndexError):
+            compact.text(index)
+    assert compact.role(1) is Role.AI
+    assert list(compact.message_ids) == [0, 1, 2]
+    assert compact.total_tokens == sum(m.tokens for m in history.history)
+    assert compact.times[0] == history.history[0].time.timestamp()
+
+
+def test_store_aggregates():
+    pytest.importorskip("numpy")
+    store = HistoryStore()
+    store.add(_history("a", [Role.HUMAN, Role.AI]))
+    store.add(CompactHistory.from_chat_history(_history("b", [Role.HUMAN] * 3)))
+
+    tokens = store.tokens_by_role()
+    assert tokens[Role.HUMAN] == 8 and tokens[Role.AI] == 2
+    assert tokens[Role.FUNCTION_CALL] == 0
+
+    starts, counts = store.activity(window=3600)
+    assert counts.sum() == 5
+    _, human = store.activity(window=3600, roles=[Role.HUMAN])
+    assert human.sum() == 4
+
+
+def test_numpy_views_share_memory():
+    np = pytest.importorskip("numpy")
+    compact = CompactHistory.from_chat_history(_history("views", [Role.AI] * 4))
+    views = compact.numpy()
+
+    assert views["role"].dtype == np.uint8
+    assert not views["tokens"].flags.owndata
+    assert views["tokens"].sum() == compact.total_tokens
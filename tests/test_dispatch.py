@@ -0,0 +1,49 @@
+# mypy: ignore_errors
+import asyncio
+import time
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.dispatch import Dispatcher
+
+
+async def test_ordered_within_conversation(mock_api):
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        async with Dispatcher(suvvy) as dispatcher:
+            await asyncio.gather(
+                *(
+                    dispatcher.async_add_message("ordered", Message(text=str(i)))
+                    for i in range(10)
+                )
+            )
+            assert len(dispatcher) == 0
+
+        history = await suvvy.aget_history("ordered")
+
+    assert [m.text for m in history.history] == [str(i) for i in range(10)]
+
+
+async def test_parallel_across_conversations(mock_api):
+    mock_api.latency = 0.1
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        dispatcher = Dispatcher(suvvy, max_in_flight=5)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                dispatcher.apredict_add_message(f"parallel-{i}", Message(text="Hi"))
+                for i in range(5)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        await dispatcher.aclose()
+
+    assert all(r.actual_response for r in results)
+    assert elapsed < 0.4
+
+
+async def test_max_in_flight(mock_api):
+    mock_api.latency = 0.05
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        dispatcher = Dispatcher(suvvy, max_in_flight=2)
+        await asyncio.gather(*(dispatcher.apredict(f"limited-{i}") for i in range(6)))
+
+    assert mock_api.connections <= 2
@@ -0,0 +1,142 @@
+# mypy: ignore_errors
+import asyncio
+import threading
+import time
+
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.hedging import Hedger, HedgingPolicy
+
+POLICY = HedgingPolicy(percentile=0.9, min_samples=5, max_extra_load=0.5)
+
+
+def _slow_first_history_read(mock_api, slow=0.5):
+    """Make every other history read hang, like a bad connection would"""
+    reads = 0
+    lock = threading.Lock()
+
+    def latency(method, path):
+        nonlocal reads
+        if (method, path) != ("GET", "/api/v1/history"):
+            return 0
+        with lock:
+            reads += 1
+            return slow if reads % 2 else 0
+
+    mock_api.latency = latency
+
+
+def _warm_up(hedger, operation, latency=0.01, count=5):
+    for _ in range(count):
+        hedger._finish(operation, time.monotonic() - latency, False)
+
+
+def test_no_hedging_until_latency_is_known():
+    hedger = Hedger(POLICY)
+    assert hedger.delay("history") is None
+    assert hedger.run("history", lambda: 1) == 1
+    _warm_up(hedger, "history")
+    assert 0.01 <= hedger.delay("history") < 0.05
+    assert hedger.stats.hedged == 0
+
+
+def test_slow_read_is_hedged(mock_api):
+    with Suvvy("token", api_url=mock_api.url, hedging=POLICY) as suvvy:
+        suvvy.add_message_to_history("hedge", Message(text="Привет!"))
+        _warm_up(suvvy._hedger, "history")
+        _slow_first_history_read(mock_api)
+
+        started = time.monotonic()
+        history = suvvy.get_history("hedge")
+        assert time.monotonic() - started < 0.4
+        assert history.unique_id == "hedge"
+        stats = suvvy._hedger.stats
+    assert stats.hedged == 1 and stats.hedge_wins == 1
+
+
+def test_extra_load_is_capped(mock_api):
+    policy = HedgingPolicy(min_samples=5, max_extra_load=0.0, max_burst=1.0)
+    mock_api.latency = 0.05
+    with Suvvy("token", api_url=mock_api.url, hedging=policy) as suvvy:
+        _warm_up(suvvy._hedger, "check")
+        for _ in range(3):
+            suvvy.check_connection()
+        stats = suvvy._hedger.stats
+    # the burst allows one hedge, and no load is earned back
+    assert stats.requests == 3 and stats.hedged == 1
+
+
+def test_errors_wait_for_the_other_request():
+    hedger = Hedger(POLICY)
+    _warm_up(hedger, "check")
+    calls = []
+
+    def flaky():
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(0.05)
+            raise ValueError("first request failed")
+        time.sleep(0.1)
+        return "ok"
+
+    assert hedger.run("check", flaky) == "ok"
+    hedger.close()
+
+
+def test_busy_workers_dont_queue_reads():
+    hedger = Hedger(HedgingPolicy(min_samples=5, max_extra_load=0.0, max_workers=1))
+    _warm_up(hedger, "check", latency=1.0)
+    threads = []
+
+    def read():
+        threads.append(threading.current_thread().name)
+        time.sleep(0.1)
+        return "ok"
+
+    callers = [
+        threading.Thread(target=hedger.run, args=("check", read)) for _ in range(4)
+    ]
+    started = time.monotonic()
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    hedger.close()
+
+    assert time.monotonic() - started < 0.3
+    assert sum(name.startswith("suvvyapi-hedge") for name in threads) == 1
+    with pytest.raises(ValueError):
+        HedgingPolicy(max_workers=0)
+
+
+async def test_async_slow_read_is_hedged(mock_api):
+    async with Suvvy("token", api_url=mock_api.url, hedging=POLICY) as suvvy:
+        await suvvy.async_add_message_to_history("ahedge", Message(text="Привет!"))
+        _warm_up(suvvy._hedger, "history")
+        _slow_first_history_read(mock_api, slow=1.0)
+
+        started = time.monotonic()
+        history = await suvvy.aget_history("ahedge")
+        assert time.monotonic() - started < 0.5
+        assert history.unique_id == "ahedge"
+    assert suvvy._hedger.stats.hedge_wins == 1
+
+
+async def test_async_loser_is_cancelled():
+    hedger = Hedger(POLICY)
+    _warm_up(hedger, "check")
+    cancelled = []
+
+    async def read(delay):
+        try:
+            await asyncio.sleep(delay)
+            return delay
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+
+    delays = iter([1.0, 0.01])
+    assert await hedger.arun("check", lambda: read(next(delays))) == 0.01
+    await asyncio.sleep(0)
+    assert cancelled == [1.0]
@@ -0,0 +1,58 @@
+# mypy: ignore_errors
+import asyncio
+import warnings
+
+import pytest
+
+from suvvyapi import Suvvy
+from suvvyapi import pool
+
+
+def test_falls_back_to_http1_without_h2(mock_api, monkeypatch):
+    monkeypatch.setattr(pool, "_http2_available", lambda: False)
+    with pytest.warns(RuntimeWarning, match="HTTP/1.1"):
+        suvvy = Suvvy("token", api_url=mock_api.url, http2=True)
+    assert not suvvy.pool.http2
+    with suvvy:
+        assert suvvy.check_connection()
+    assert suvvy.pool.streams is None
+
+
+def test_http1_by_default(mock_api):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        suvvy = Suvvy("token", api_url=mock_api.url)
+    assert not suvvy.pool.http2
+    assert "http2" in suvvy.pool._client_options()
+
+
+async def test_async_client_fallback(mock_api, monkeypatch):
+    monkeypatch.setattr(pool, "_http2_available", lambda: False)
+    with pytest.warns(RuntimeWarning):
+        suvvy = Suvvy("token", api_url=mock_api.url, http2=True)
+    async with suvvy:
+        assert await suvvy.acheck_connection()
+        assert suvvy.pool.async_client()._transport._pool._http2 is False
+
+
+async def test_streams_are_limited(mock_api):
+    pytest.importorskip("h2")
+    mock_api.latency = 0.05
+    async with Suvvy(
+        "token", api_url=mock_api.url, http2=True, max_concurrent_streams=2
+    ) as suvvy:
+        assert suvvy.pool.streams is not None
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, suvvy.pool.streams.in_use)
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.create_task(watch())
+        # a cleartext server is spoken to over HTTP/1.1 even with http2 on
+        await asyncio.gather(*(suvvy.acheck_connection() for _ in range(6)))
+        watcher.cancel()
+        assert suvvy.pool.async_client()._transport._pool._http2 is True
+    assert peak == 2
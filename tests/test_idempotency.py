@@ -0,0 +1,118 @@
+# mypy: ignore_errors
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import InternalAPIError
+from suvvyapi.idempotency import IdempotencyStore
+from suvvyapi.retry import RetryPolicy
+
+
+def _keys(mock_api, path):
+    return [
+        {k.lower(): v for k, v in r[4].items()}.get("idempotency-key")
+        for r in mock_api.requests
+        if r[1] == path
+    ]
+
+
+def test_keys_are_generated_per_call(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        suvvy.predict_history("idem")
+        suvvy.predict_history("idem")
+    keys = _keys(mock_api, "/api/v1/history/predict")
+    assert len(keys) == 2 and all(keys) and keys[0] != keys[1]
+
+
+def test_completed_key_returns_recorded_prediction(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        first = suvvy.predict_history_add_message(
+            "idem", Message(text="Привет!"), idempotency_key="order-1"
+        )
+        second = suvvy.predict_history_add_message(
+            "idem", Message(text="Привет!"), idempotency_key="order-1"
+        )
+    assert first == second
+    assert _keys(mock_api, "/api/v1/history/message/predict") == ["order-1"]
+    assert len(mock_api.histories["idem"]["history"]) == 2
+
+
+def test_key_reused_for_another_conversation_is_sent(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        suvvy.predict_history_add_message(
+            "conv-a", Message(text="Привет!"), idempotency_key="msg-1"
+        )
+        suvvy.predict_history_add_message(
+            "conv-b", Message(text="Hello!"), idempotency_key="msg-1"
+        )
+        suvvy.predict_history("conv-b", idempotency_key="msg-1")
+    assert [m["text"] for m in mock_api.histories["conv-b"]["history"]] == [
+        "Hello!",
+        mock_api.answer,
+        mock_api.answer,
+    ]
+    assert len(_keys(mock_api, "/api/v1/history/message/predict")) == 2
+
+
+def test_concurrent_duplicates_share_one_request(mock_api):
+    mock_api.latency = 0.1
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        with ThreadPoolExecutor(4) as pool:
+            results = list(
+                pool.map(
+                    lambda _: suvvy.predict_history("idem", idempotency_key="k"),
+                    range(4),
+                )
+            )
+    assert all(r == results[0] for r in results)
+    assert len(_keys(mock_api, "/api/v1/history/predict")) == 1
+
+
+def test_keyed_prediction_is_retried_with_the_same_key(mock_api):
+    mock_api.fail(500, "/api/v1/history/message/predict")
+    policy = RetryPolicy(base_delay=0.01, trust_idempotency_keys=True)
+    with Suvvy("token", api_url=mock_api.url, retry=policy) as suvvy:
+        suvvy.predict_history_add_message("idem", Message(text="Привет!"))
+    keys = _keys(mock_api, "/api/v1/history/message/predict")
+    assert len(keys) == 2 and keys[0] == keys[1]
+
+
+def test_failed_key_is_not_recorded(mock_api):
+    mock_api.fail(500, "/api/v1/history/predict")
+    with Suvvy("token", api_url=mock_api.url, retry=None) as suvvy:
+        with pytest.raises(InternalAPIError):
+            suvvy.predict_history("idem", idempotency_key="k")
+        assert suvvy.predict_history("idem", idempotency_key="k") is not None
+    assert len(_keys(mock_api, "/api/v1/history/predict")) == 2
+
+
+async def test_async_duplicates_share_one_request(mock_api):
+    mock_api.latency = 0.1
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        results = await asyncio.gather(
+            *(
+                suvvy.apredict_history_add_message(
+                    "aidem", Message(text="Привет!"), idempotency_key="k"
+                )
+                for _ in range(4)
+            )
+        )
+        again = await suvvy.apredict_history_add_message(
+            "aidem", Message(text="Привет!"), idempotency_key="k"
+        )
+    assert all(r == again for r in results)
+    assert len(_keys(mock_api, "/api/v1/history/message/predict")) == 1
+
+
+def test_store_expires_records():
+    store = IdempotencyStore(ttl=0.0)
+    store.put("k", None)
+    assert store.get("k") == (False, None)
+
+    store = IdempotencyStore(maxsize=1)
+    store.put("a", 1)
+    store.put("b", None)
+    assert "a" not in store
+    assert store.get("b") == (True, None)
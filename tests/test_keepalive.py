@@ -0,0 +1,102 @@
+# mypy: ignore_errors
+import asyncio
+import threading
+import time
+
+import pytest
+
+from suvvyapi import Suvvy
+
+
+def _checks(mock_api):
+    return sum(1 for r in mock_api.requests if r[1] == "/api/check")
+
+
+def test_warmup_opens_connections(mock_api):
+    mock_api.latency = 0.05
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        suvvy.warmup(connections=5)
+        assert mock_api.connections == 5
+        assert _checks(mock_api) == 5
+
+        # warm connections are reused by the traffic that follows
+        for _ in range(3):
+            suvvy.check_connection()
+    assert mock_api.connections == 5
+
+
+def test_warmup_is_capped_by_the_pool(mock_api):
+    mock_api.latency = 0.05
+    with Suvvy("token", api_url=mock_api.url, max_keepalive_connections=3) as suvvy:
+        suvvy.warmup(connections=10)
+    assert mock_api.connections == 3
+    with pytest.raises(ValueError):
+        Suvvy("token").warmup(connections=0)
+
+
+async def test_async_warmup_opens_connections(mock_api):
+    mock_api.latency = 0.05
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        await suvvy.awarmup(connections=4)
+        assert mock_api.connections == 4
+        await asyncio.gather(*(suvvy.acheck_connection() for _ in range(4)))
+    assert mock_api.connections == 4
+
+
+def test_keepalive_holds_idle_connections(mock_api):
+    suvvy = Suvvy(
+        "token",
+        api_url=mock_api.url,
+        keepalive_expiry=0.3,
+        keepalive_interval=0.1,
+    )
+    with suvvy:
+        suvvy.warmup(connections=2)
+        time.sleep(0.8)
+        assert _checks(mock_api) > 2
+        assert mock_api.connections <= 3
+        # the pings reuse the threads of the warmup
+        warmup_threads = [
+            t for t in threading.enumerate() if t.name.startswith("suvvyapi-warmup")
+        ]
+        assert len(warmup_threads) == 2
+    sent = _checks(mock_api)
+    time.sleep(0.3)
+    assert _checks(mock_api) == sent
+
+
+async def test_async_keepalive_stops_on_close(mock_api):
+    suvvy = Suvvy(
+        "token",
+        api_url=mock_api.url,
+        keepalive_expiry=0.3,
+        keepalive_interval=0.1,
+    )
+    async with suvvy:
+        await suvvy.awarmup()
+        await asyncio.sleep(0.5)
+        assert _checks(mock_api) > 1
+        heartbeat = suvvy._async_heartbeat
+    assert not heartbeat.running
+    assert suvvy._async_heartbeat is None
+
+
+def test_no_pings_while_there_is_traffic(mock_api):
+    with Suvvy(
+        "token", api_url=mock_api.url, keepalive_expiry=0.3, keepalive_interval=0.1
+    ) as suvvy:
+        suvvy.warmup(connections=2)
+        stop = time.monotonic() + 0.5
+        while time.monotonic() < stop:
+            suvvy.predict_history("busy")
+            time.sleep(0.02)
+        assert _checks(mock_api) == 2
+
+        # pings start once the traffic is over
+        time.sleep(0.25)
+        assert _checks(mock_api) > 2
+
+
+def test_keepalive_interval_must_beat_expiry():
+    with pytest.raises(ValueError):
+        Suvvy("token", keepalive_expiry=5.0, keepalive_interval=5.0)
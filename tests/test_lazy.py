@@ -0,0 +1,62 @@
+# mypy: ignore_errors
+import pytest
+
+from suvvyapi import Suvvy, Message, LazyChatHistory
+
+
+@pytest.fixture
+def filled_api(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        suvvy.add_message_to_history("lazy", [Message(text=str(i)) for i in range(20)])
+    return mock_api
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_messages_are_built_on_access(filled_api, validate):
+    with Suvvy("token", api_url=filled_api.url, validate_responses=validate) as suvvy:
+        history = suvvy.get_history("lazy", lazy=True)
+
+    assert isinstance(history, LazyChatHistory)
+    assert history.unique_id == "lazy" and not history.stopped
+    assert history.history.materialized == 0
+
+    assert [m.text for m in history.history[-5:]] == ["15", "16", "17", "18", "19"]
+    assert history.history[0].text == "0"
+    assert history.history.materialized == 6
+    assert len(history.history) == 20
+
+
+async def test_lazy_history_behaves_like_chat_history(filled_api):
+    async with Suvvy("token", api_url=filled_api.url) as suvvy:
+        lazy = await suvvy.aget_history("lazy", lazy=True)
+        eager = await suvvy.aget_history("lazy")
+
+    assert lazy.history == eager.history
+    assert [m.text for m in lazy.history] == [m.text for m in eager.history]
+    assert lazy.materialize() == eager
+    assert lazy.model_dump() == eager.model_dump()
+
+
+def test_lazy_messages_can_be_changed(filled_api):
+    with Suvvy("token", api_url=filled_api.url) as suvvy:
+        history = suvvy.get_history("lazy", lazy=True)
+        extra = suvvy.get_history("lazy").history[:2]
+
+    messages = history.history
+    messages.append(extra[0])
+    messages += [extra[1]]
+    assert len(messages) == 22 and messages[-1] is extra[1]
+    assert messages.materialized == 2
+
+    del messages[0]
+    messages[0] = extra[0]
+    messages.insert(1, extra[1])
+    assert [m.text for m in messages[:3]] == ["0", "1", "2"]
+    messages[1:3] = []
+    assert [m.text for m in messages[:2]] == ["0", "3"]
+
+    combined = messages + extra
+    assert isinstance(combined, type(messages)) and len(combined) == len(messages) + 2
+    combined = extra + messages
+    assert [m.text for m in combined[:3]] == ["0", "1", "0"]
+    assert len(messages) == 20
@@ -0,0 +1,78 @@
+# mypy: ignore_errors
+import json
+
+from suvvyapi import Suvvy, Message, ChatHistory, Prediction
+from suvvyapi._parsing import ResponseParser
+from suvvyapi.cache import HistoryCache
+from tests.mock_api import make_history, make_message
+
+
+def test_trusted_history_matches_validated():
+    message = make_message(1, "Привет!")
+    message["time"] = "2024-01-01T12:00:00.123Z"
+    message["function"] = {"name": "search", "args": {"q": "suvvy"}}
+    content = json.dumps(make_history("trusted", [message])).encode()
+
+    trusted = ResponseParser(validate=False).history(content)
+
+    assert trusted == ChatHistory.model_validate_json(content)
+    assert trusted.history[0].function.args == {"q": "suvvy"}
+
+
+def test_trusted_prediction_fills_defaults():
+    message = make_message(1, "Ответ", "ai")
+    del message["context"]
+    content = json.dumps({"new_messages": [message]}).encode()
+
+    trusted = ResponseParser(validate=False).prediction(content)
+
+    assert trusted == Prediction.model_validate_json(content)
+    assert trusted.actual_response.context == ""
+    assert trusted.generation_info.token_usage.total_tokens == 0
+
+
+def test_strict_validation_env_switch(monkeypatch):
+    monkeypatch.setenv("SUVVYAPI_STRICT_VALIDATION", "1")
+    assert ResponseParser(validate=False).validate
+
+
+def test_suvvy_without_validation(mock_api):
+    with Suvvy("token", api_url=mock_api.url, validate_responses=False) as suvvy:
+        suvvy.add_message_to_history("trusted", Message(text="Привет!"))
+        prediction = suvvy.predict_history("trusted")
+        history = suvvy.get_history("trusted")
+
+    assert prediction.actual_response.text == mock_api.answer
+    assert [m.text for m in history.history] == ["Привет!", mock_api.answer]
+
+
+def test_trusted_models_can_be_changed():
+    content = json.dumps(
+        make_history("mutable", [make_message(1, "Привет!"), make_message(2, "Hi")])
+    ).encode()
+    history = ResponseParser(validate=False).history(content)
+
+    history.stopped = True
+    history.history[0].text = "Изменено"
+    copy = history.model_copy(update={"unique_id": "copy"})
+
+    assert history.stopped and history.history[0].text == "Изменено"
+    assert copy.unique_id == "copy" and history.unique_id == "mutable"
+    assert "text" in history.history[0].model_fields_set
+    # messages don't share one set of fields
+    assert (
+        history.history[1].model_fields_set is not history.history[0].model_fields_set
+    )
+
+
+def test_trusted_parsing_with_history_cache(mock_api):
+    with Suvvy(
+        "token",
+        api_url=mock_api.url,
+        validate_responses=False,
+        history_cache=HistoryCache(),
+    ) as suvvy:
+        suvvy.add_message_to_history("cached", Message(text="Привет!"))
+        suvvy.predict_history("cached")
+        history = suvvy.get_history("cached")
+    assert [m.text for m in history.history] == ["Привет!", mock_api.answer]
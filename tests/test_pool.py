@@ -0,0 +1,73 @@
+# mypy: ignore_errors
+import asyncio
+import gc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from suvvyapi import Suvvy, Message
+
+
+def test_sync_client_reuses_connection(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        for _ in range(5):
+            assert suvvy.check_connection()
+        suvvy.add_message_to_history("pool", Message(text="Привет!"))
+        suvvy.get_history("pool")
+        assert mock_api.connections == 1
+    assert suvvy.pool._client is None
+
+
+async def test_async_client_reuses_connection(mock_api):
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        for _ in range(5):
+            assert await suvvy.acheck_connection()
+        await suvvy.async_add_message_to_history("apool", Message(text="Привет!"))
+        await suvvy.aget_history("apool")
+        assert mock_api.connections == 1
+    assert not suvvy.pool._async_clients
+
+
+async def _checked_client(suvvy):
+    assert await suvvy.acheck_connection()
+    return suvvy.pool.async_client()
+
+
+def test_async_client_is_closed_with_its_loop(mock_api):
+    suvvy = Suvvy("token", api_url=mock_api.url)
+    clients = []
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        for _ in range(5):
+            clients.append(asyncio.run(_checked_client(suvvy)))
+        gc.collect()
+    assert all(client.is_closed for client in clients)
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+    suvvy.close()
+
+
+def test_pool_limits_are_applied(mock_api):
+    suvvy = Suvvy("token", api_url=mock_api.url, max_connections=3)
+    assert suvvy._get_client() is suvvy._get_client()
+    assert suvvy.pool.limits.max_connections == 3
+    suvvy.close()
+
+
+def test_event_loops_of_many_threads_share_a_pool(mock_api):
+    mock_api.latency = 0.01
+    suvvy = Suvvy("token", api_url=mock_api.url, deduplicate_reads=False)
+
+    async def calls():
+        results = await asyncio.gather(
+            *(suvvy.acheck_connection() for _ in range(5)), return_exceptions=True
+        )
+        for _ in range(15):
+            results.append(await suvvy.acheck_connection())
+        return results
+
+    with ThreadPoolExecutor(4) as executor:
+        runs = [executor.submit(asyncio.run, calls()) for _ in range(4)]
+        results = [r for run in runs for r in run.result()]
+    suvvy.close()
+
+    assert results == [True] * 80
+    assert not suvvy.pool._async_clients
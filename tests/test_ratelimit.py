@@ -0,0 +1,105 @@
+# mypy: ignore_errors
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from suvvyapi import Suvvy
+from suvvyapi.exceptions.api import DeadlineExceededError
+from suvvyapi.ratelimit import Limit, RateLimiter, Slots, TokenBucket
+from suvvyapi.timeouts import deadline
+
+PREDICT = "/api/v1/history/predict"
+
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=10, burst=2)
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.1, abs=0.01)
+    assert delays[3] == pytest.approx(0.2, abs=0.01)
+    assert bucket.reserve(max_delay=0.1) is None
+
+
+def test_rate_limit_smooths_sync_requests(mock_api):
+    limiter = RateLimiter(Limit(rate=20, burst=1))
+    with Suvvy("token", api_url=mock_api.url, rate_limiter=limiter) as suvvy:
+        started = time.monotonic()
+        with ThreadPoolExecutor(5) as pool:
+            list(pool.map(lambda _: suvvy.check_connection(), range(6)))
+        # deduplicated reads would hide requests, so count them on the server
+        calls = sum(1 for r in mock_api.requests if r[1] == "/api/check")
+        assert time.monotonic() - started >= (calls - 1) / 20 * 0.9
+
+
+def test_endpoint_in_flight_limit(mock_api):
+    active = peak = 0
+    lock = threading.Lock()
+
+    def latency(method, path):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return 0
+
+    mock_api.latency = latency
+    limiter = RateLimiter(endpoints={PREDICT: Limit(max_in_flight=2)})
+    with Suvvy("token", api_url=mock_api.url, rate_limiter=limiter) as suvvy:
+        results = list(suvvy.predict_many([str(i) for i in range(8)], concurrency=8))
+    assert len(results) == 8
+    assert peak == 2
+
+
+async def test_async_in_flight_limit(mock_api):
+    mock_api.latency = 0.05
+    limiter = RateLimiter(Limit(max_in_flight=3))
+    slots = limiter._global.slots
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, slots.in_use)
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch())
+    async with Suvvy("token", api_url=mock_api.url, rate_limiter=limiter) as suvvy:
+        await asyncio.gather(*(suvvy.apredict_history(str(i)) for i in range(9)))
+    watcher.cancel()
+    assert peak == 3
+    assert slots.in_use == 0
+
+
+def test_waiting_respects_deadline(mock_api):
+    limiter = RateLimiter(Limit(rate=1, burst=1))
+    with Suvvy("token", api_url=mock_api.url, rate_limiter=limiter) as suvvy:
+        suvvy.predict_history("deadline")
+        with pytest.raises(DeadlineExceededError):
+            with deadline(0.1):
+                suvvy.predict_history("deadline")
+
+
+async def test_slots_are_shared_by_threads_and_coroutines():
+    slots = Slots(1)
+    assert slots.acquire()
+    waiter = asyncio.create_task(slots.aacquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    threading.Timer(0.02, slots.release).start()
+    await asyncio.wait_for(waiter, 1)
+    assert not slots.acquire(timeout=0.01)
+
+    cancelled = asyncio.create_task(slots.aacquire())
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    slots.release()
+    await asyncio.sleep(0.01)
+    # the slot handed over to the cancelled waiter is not lost
+    assert slots.acquire(timeout=0)
@@ -0,0 +1,124 @@
+# mypy: ignore_errors
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import (
+    InternalAPIError,
+    RateLimitExceededError,
+    ServiceUnavailableError,
+    UnknownAPIError,
+)
+from suvvyapi.retry import RetryPolicy, parse_retry_after
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05)
+
+
+def _calls(mock_api, path):
+    return sum(1 for r in mock_api.requests if r[1] == path)
+
+
+def test_idempotent_read_is_retried(mock_api):
+    mock_api.fail(500, "/api/check", times=2)
+    with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        assert suvvy.check_connection()
+    assert _calls(mock_api, "/api/check") == 3
+
+
+def test_gives_up_after_max_attempts(mock_api):
+    mock_api.fail(502, "/api/check", times=3)
+    with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        with pytest.raises(ServiceUnavailableError):
+            suvvy.check_connection()
+    assert _calls(mock_api, "/api/check") == 3
+
+
+def test_predict_is_not_retried_after_server_error(mock_api):
+    mock_api.fail(500, "/api/v1/history/predict")
+    with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        with pytest.raises(InternalAPIError):
+            suvvy.predict_history("retry")
+    assert _calls(mock_api, "/api/v1/history/predict") == 1
+
+
+def test_predict_is_retried_when_rejected(mock_api):
+    mock_api.fail(429, "/api/v1/history/message/predict", {"Retry-After": "0"})
+    mock_api.fail(503, "/api/v1/history/message/predict")
+    with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        prediction = suvvy.predict_history_add_message("retry", Message(text="Привет!"))
+    assert prediction.new_messages[0].text == mock_api.answer
+    assert len(mock_api.histories["retry"]["history"]) == 2
+
+
+def test_retry_after_is_respected(mock_api):
+    mock_api.fail(429, "/api/check", {"Retry-After": "0.3"})
+    with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        started = time.monotonic()
+        suvvy.check_connection()
+        assert time.monotonic() - started >= 0.3
+
+
+def test_retry_after_beyond_budget_gives_up(mock_api):
+    mock_api.fail(429, "/api/check", {"Retry-After": "60"})
+    policy = RetryPolicy(budget=1.0, base_delay=0.01)
+    with Suvvy("token", api_url=mock_api.url, retry=policy) as suvvy:
+        with pytest.raises(RateLimitExceededError):
+            suvvy.check_connection()
+    assert _calls(mock_api, "/api/check") == 1
+
+
+def test_retry_can_be_disabled(mock_api):
+    mock_api.fail(503, "/api/check")
+    with Suvvy("token", api_url=mock_api.url, retry=None) as suvvy:
+        with pytest.raises(ServiceUnavailableError):
+            suvvy.check_connection()
+
+
+def test_unmapped_status_raises_unknown_error(mock_api):
+    mock_api.fail(418, "/api/check")
+    with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        with pytest.raises(UnknownAPIError):
+            suvvy.check_connection()
+
+
+def test_connect_errors_are_retried():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        if len(attempts) < 3:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"status": "ok"})
+
+    suvvy = Suvvy("token", api_url="http://suvvy.test", retry=FAST)
+    suvvy.pool._client = httpx.Client(
+        base_url="http://suvvy.test", transport=httpx.MockTransport(handler)
+    )
+    assert suvvy.check_connection()
+    assert len(attempts) == 3
+
+
+async def test_async_predict_is_retried_when_rejected(mock_api):
+    mock_api.fail(503, "/api/v1/history/predict", times=2)
+    async with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        prediction = await suvvy.apredict_history("aretry")
+    assert prediction.new_messages[0].text == mock_api.answer
+    assert _calls(mock_api, "/api/v1/history/predict") == 3
+
+
+async def test_async_history_stream_is_retried(mock_api):
+    async with Suvvy("token", api_url=mock_api.url, retry=FAST) as suvvy:
+        await suvvy.async_add_message_to_history("astream", Message(text="Привет!"))
+        mock_api.fail(504, "/api/v1/history")
+        messages = [m async for m in suvvy.aiter_history("astream")]
+    assert [m.text for m in messages] == ["Привет!"]
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 8 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
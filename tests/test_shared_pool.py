@@ -0,0 +1,77 @@
+# mypy: ignore_errors
+import asyncio
+
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import InternalAPIError
+from suvvyapi.pool import ConnectionPool
+
+
+def _tokens(mock_api):
+    return [r[4].get("Authorization") for r in mock_api.requests]
+
+
+def test_tenants_share_connections(mock_api):
+    with ConnectionPool(mock_api.url) as pool:
+        first = Suvvy("first-token", pool=pool, tenant="first")
+        second = Suvvy("second-token", pool=pool, tenant="second")
+        for _ in range(3):
+            first.check_connection()
+            second.add_message_to_history("pool", Message(text="Привет!"))
+
+        # a tenant going away leaves the pool open for the others
+        first.close()
+        assert second.check_connection()
+        assert mock_api.connections == 1
+    assert _tokens(mock_api) == ["Bearer first-token", "Bearer second-token"] * 3 + [
+        "Bearer second-token"
+    ]
+
+
+def test_tenants_are_counted_apart(mock_api):
+    mock_api.fail(500, "/api/v1/history")
+    with ConnectionPool(mock_api.url) as pool:
+        Suvvy("a", pool=pool, tenant="a").predict_history("one")
+        tenant = Suvvy("b", pool=pool, tenant="b", retry=None)
+        tenant.check_connection()
+        with pytest.raises(InternalAPIError):
+            tenant.get_history("missing")
+        metrics = pool.metrics()
+    assert metrics["a"].requests == 1 and metrics["a"].failures == 0
+    assert metrics["b"].requests == 2 and metrics["b"].failures == 1
+    assert metrics["b"].in_flight == 0 and metrics["b"].mean_latency > 0
+
+
+async def test_tenant_in_flight_is_capped(mock_api):
+    mock_api.latency = 0.05
+    async with ConnectionPool(mock_api.url, tenant_max_in_flight=2) as pool:
+        busy = Suvvy("busy", pool=pool, tenant="busy")
+        quiet = Suvvy("quiet", pool=pool, tenant="quiet")
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, pool.metrics().get("busy").in_flight)
+                await asyncio.sleep(0.005)
+
+        await busy.acheck_connection()
+        watcher = asyncio.create_task(watch())
+        predictions = asyncio.gather(*(busy.apredict_history(str(i)) for i in range(6)))
+        # the other tenant doesn't wait behind the busy one
+        await asyncio.wait_for(quiet.acheck_connection(), 0.09)
+        await predictions
+        watcher.cancel()
+    assert peak == 2
+    assert _tokens(mock_api).count("Bearer busy") == 7
+
+
+def test_pool_options_cant_be_given_with_pool(mock_api):
+    with ConnectionPool(mock_api.url) as pool:
+        with pytest.raises(ValueError, match="max_connections, http2"):
+            Suvvy("token", pool=pool, max_connections=5, http2=True)
+        with pytest.raises(ValueError, match="api_url"):
+            Suvvy("token", pool=pool, api_url=mock_api.url)
+        # defaults passed explicitly change nothing
+        Suvvy("token", pool=pool, max_connections=100, retry=None)
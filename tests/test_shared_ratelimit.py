@@ -0,0 +1,100 @@
+# mypy: ignore_errors
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from suvvyapi import Suvvy
+from suvvyapi.ratelimit import Limit
+
+shared = pytest.importorskip("suvvyapi.ratelimit.shared")
+
+RATE = 40
+
+
+def _take_tokens(directory, count, results):
+    limiter = shared.SharedRateLimiter(Limit(rate=RATE, burst=1), directory=directory)
+    for _ in range(count):
+        limiter.acquire("/api/check")
+        results.put(time.monotonic())
+        limiter.release("/api/check")
+
+
+def _hold_slots(directory, count, results):
+    limiter = shared.SharedRateLimiter(Limit(max_in_flight=2), directory=directory)
+    for _ in range(count):
+        limiter.acquire("/api/check")
+        started = time.monotonic()
+        time.sleep(0.03)
+        results.put((started, time.monotonic()))
+        limiter.release("/api/check")
+
+
+def _run(target, directory, processes, count):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [
+        context.Process(target=target, args=(directory, count, results))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    collected = [results.get(timeout=30) for _ in range(processes * count)]
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+    return collected
+
+
+def test_processes_share_one_rate(tmp_path):
+    times = sorted(_run(_take_tokens, str(tmp_path), processes=4, count=15))
+    # any RATE consecutive requests of all processes together span a second
+    for first, last in zip(times, times[RATE:]):
+        assert last - first >= 0.95
+    assert times[-1] - times[0] >= (len(times) - 1) / RATE * 0.95
+
+
+def test_processes_share_in_flight_slots(tmp_path):
+    intervals = _run(_hold_slots, str(tmp_path), processes=4, count=5)
+    events = sorted(
+        [(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals]
+    )
+    active = peak = 0
+    for _, change in events:
+        active += change
+        peak = max(peak, active)
+    assert peak == 2
+
+
+async def test_shared_limiter_in_suvvy(mock_api, tmp_path):
+    limiter = shared.SharedRateLimiter(
+        Limit(rate=100, max_in_flight=1), directory=str(tmp_path)
+    )
+    async with Suvvy("token", api_url=mock_api.url, rate_limiter=limiter) as suvvy:
+        assert await suvvy.apredict_history("shared") is not None
+    with Suvvy("token", api_url=mock_api.url, rate_limiter=limiter) as suvvy:
+        assert suvvy.check_connection()
+    assert limiter._global.slots.in_use == 0
+
+
+def test_default_directory_is_private(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    limiter = shared.SharedRateLimiter(Limit(rate=10))
+    info = os.stat(limiter.directory)
+    assert info.st_uid == os.getuid() and info.st_mode & 0o077 == 0
+
+    # a directory others can write to isn't trusted
+    os.chmod(limiter.directory, 0o777)
+    with pytest.raises(PermissionError):
+        shared.SharedRateLimiter(Limit(rate=10))
+
+
+def test_lock_files_dont_follow_symlinks(tmp_path):
+    target = tmp_path / "target"
+    target.write_bytes(b"")
+    os.symlink(target, tmp_path / "global.bucket")
+    limiter = shared.SharedRateLimiter(Limit(rate=10), directory=str(tmp_path))
+    with pytest.raises(OSError):
+        limiter.acquire("/api/check")
+    assert target.read_bytes() == b""
@@ -0,0 +1,86 @@
+# mypy: ignore_errors
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import HistoryNotFoundError
+
+
+def _gets(mock_api, path):
+    return [r for r in mock_api.requests if r[0] == "GET" and r[1] == path]
+
+
+async def test_concurrent_aget_history_share_request(mock_api):
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        await suvvy.async_add_message_to_history("shared", Message(text="Привет!"))
+        mock_api.latency = 0.1
+        results = await asyncio.gather(
+            *(suvvy.aget_history("shared") for _ in range(10))
+        )
+
+    assert len(_gets(mock_api, "/api/v1/history")) == 1
+    assert all(r == results[0] for r in results)
+
+    # each caller gets a history of its own
+    results[0].history.clear()
+    assert all(len(r.history) == 1 for r in results[1:])
+
+
+async def test_read_after_write_does_not_join_older_request(mock_api):
+    mock_api.latency = lambda method, path: 0.2 if method == "GET" else 0.0
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        await suvvy.async_add_message_to_history("fresh", Message(text="first"))
+        before = asyncio.create_task(suvvy.aget_history("fresh"))
+        await asyncio.sleep(0.05)
+        await suvvy.async_add_message_to_history("fresh", Message(text="second"))
+        after = await suvvy.aget_history("fresh")
+        await before
+
+    assert [m.text for m in after.history] == ["first", "second"]
+    assert len(_gets(mock_api, "/api/v1/history")) == 2
+
+
+def test_sync_read_after_write_does_not_join_older_request(mock_api):
+    mock_api.latency = lambda method, path: 0.2 if method == "GET" else 0.0
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        suvvy.add_message_to_history("fresh", Message(text="first"))
+        with ThreadPoolExecutor(1) as executor:
+            before = executor.submit(suvvy.get_history, "fresh")
+            time.sleep(0.05)
+            suvvy.add_message_to_history("fresh", Message(text="second"))
+            after = suvvy.get_history("fresh")
+            before.result()
+
+    assert [m.text for m in after.history] == ["first", "second"]
+    assert len(_gets(mock_api, "/api/v1/history")) == 2
+
+
+def test_concurrent_check_connection_share_request(mock_api):
+    mock_api.latency = 0.1
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: suvvy.check_connection(), range(8)))
+
+    assert all(results)
+    assert len(_gets(mock_api, "/api/check")) == 1
+
+
+async def test_errors_are_shared(mock_api):
+    mock_api.latency = 0.05
+    async with Suvvy("token", api_url=mock_api.url) as suvvy:
+        results = await asyncio.gather(
+            *(suvvy.aget_history("missing") for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(r, HistoryNotFoundError) for r in results)
+    assert len(_gets(mock_api, "/api/v1/history")) == 1
+
+
+async def test_deduplication_can_be_disabled(mock_api):
+    mock_api.latency = 0.05
+    async with Suvvy("token", api_url=mock_api.url, deduplicate_reads=False) as suvvy:
+        await asyncio.gather(*(suvvy.acheck_connection() for _ in range(3)))
+
+    assert len(_gets(mock_api, "/api/check")) == 3
@@ -0,0 +1,64 @@
+# mypy: ignore_errors
+import json
+
+import pytest
+
+from suvvyapi import Suvvy, Message
+from suvvyapi.exceptions.api import HistoryNotFoundError
+from suvvyapi.streaming import HistoryParser
+from tests.mock_api import make_history, make_message
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_parser_handles_any_chunking(chunk_size):
+    messages = [make_message(i, f'Сообщение {i} "в кавычках"') for i in range(30)]
+    history = make_history("chunks", messages)
+    history["last_instance_id"] = 12345
+    body = json.dumps(history, indent=1, ensure_ascii=False)
+
+    parser = HistoryParser()
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items.extend(parser.feed(body[start : start + chunk_size]))
+    parser.close()
+
+    assert items == messages
+    assert parser.metadata == {k: v for k, v in history.items() if k != "history"}
+
+
+def test_parser_rejects_truncated_body():
+    body = json.dumps(make_history("broken", [make_message(1, "Привет!")]))
+    parser = HistoryParser()
+    parser.feed(body[:-10])
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_iter_history(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        suvvy.add_message_to_history(
+            "stream", [Message(text=str(i)) for i in range(100)]
+        )
+        with suvvy.iter_history("stream", chunk_size=256) as stream:
+            texts = [m.text for m in stream]
+
+    assert texts == [str(i) for i in range(100)]
+    assert stream.metadata.unique_id == "stream"
+
+
+async def test_aiter_history(mock_api):
+    async with Suvvy("token", api_url=mock_api.url, validate_responses=False) as suvvy:
+        await suvvy.async_add_message_to_history(
+            "astream", [Message(text=str(i)) for i in range(10)]
+        )
+        stream = suvvy.aiter_history("astream", chunk_size=64)
+        texts = [m.text async for m in stream]
+
+    assert texts == [str(i) for i in range(10)]
+    assert stream.metadata.channel_name == "api"
+
+
+def test_iter_history_raises_api_errors(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        with pytest.raises(HistoryNotFoundError):
+            list(suvvy.iter_history("missing"))
@@ -0,0 +1,89 @@
+# mypy: ignore_errors
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from suvvyapi import Suvvy
+from suvvyapi.exceptions.api import DeadlineExceededError, ServiceUnavailableError
+from suvvyapi.retry import RetryPolicy
+from suvvyapi.timeouts import OperationTimeouts, deadline, remaining
+
+
+def test_timeouts_are_chosen_per_operation():
+    timeouts = OperationTimeouts(history_read=httpx.Timeout(1.0))
+    assert timeouts.for_request("GET", "/api/check") == timeouts.check
+    assert timeouts.for_request("GET", "/api/v1/history") == httpx.Timeout(1.0)
+    assert timeouts.for_request("POST", "/api/v1/history/message") == (
+        timeouts.message_write
+    )
+    assert timeouts.for_request("POST", "/api/v1/history/predict?unique_id=1") == (
+        timeouts.predict
+    )
+
+
+def test_read_timeout_applies(mock_api):
+    mock_api.latency = 0.3
+    timeouts = OperationTimeouts(check=httpx.Timeout(0.1))
+    with Suvvy("token", api_url=mock_api.url, timeouts=timeouts, retry=None) as s:
+        with pytest.raises(httpx.ReadTimeout):
+            s.check_connection()
+        # other operations keep their own timeouts
+        s.predict_history("timeouts")
+
+
+def test_nested_deadlines_take_the_earliest():
+    assert remaining() is None
+    with deadline(10):
+        with deadline(at=datetime.now(timezone.utc) + timedelta(seconds=1)):
+            assert 0.5 < remaining() <= 1
+            with deadline(5):
+                assert remaining() <= 1
+        assert 9 < remaining() <= 10
+    assert remaining() is None
+
+
+def test_deadline_bounds_a_slow_request(mock_api):
+    mock_api.latency = 0.5
+    with Suvvy("token", api_url=mock_api.url, retry=None) as suvvy:
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            with deadline(0.2):
+                suvvy.check_connection()
+        assert time.monotonic() - started < 0.45
+
+
+def test_deadline_bounds_retries(mock_api):
+    mock_api.fail(503, "/api/check", {"Retry-After": "1"}, times=5)
+    with Suvvy("token", api_url=mock_api.url, retry=RetryPolicy(max_attempts=5)) as s:
+        started = time.monotonic()
+        with pytest.raises(ServiceUnavailableError):
+            with deadline(0.5):
+                s.check_connection()
+        assert time.monotonic() - started < 0.45
+
+
+def test_passed_deadline_fails_before_sending(mock_api):
+    with Suvvy("token", api_url=mock_api.url) as suvvy:
+        with pytest.raises(DeadlineExceededError):
+            with deadline(at=time.time() - 1):
+                suvvy.check_connection()
+    assert mock_api.requests == []
+
+
+def test_deadline_reaches_batch_threads(mock_api):
+    mock_api.latency = 0.5
+    with Suvvy("token", api_url=mock_api.url, retry=None) as suvvy:
+        with deadline(0.1):
+            results = list(suvvy.predict_many(["a", "b"], return_exceptions=True))
+    assert all(isinstance(r.error, DeadlineExceededError) for r in results)
+
+
+async def test_async_deadline(mock_api):
+    mock_api.latency = 0.5
+    async with Suvvy("token", api_url=mock_api.url, retry=None) as suvvy:
+        with deadline(0.2):
+            with pytest.raises(DeadlineExceededError):
+                await asyncio.create_task(suvvy.apredict_history("adeadline"))